@@ -0,0 +1,328 @@
+"""
+MTTR, downtime and cost analytics for the Incident Management System.
+
+Two rollup tables hold one row per (report day, category, equipment,
+location): incident_analytics_daily with incident and resolution counts,
+summed time-to-resolve, downtime and cost, and
+incident_analytics_resolve_buckets with a histogram of time-to-resolve for
+percentiles. Both are filled with INSERT ... SELECT ... GROUP BY over the
+incidents table, so no incident is loaded into Python.
+
+refresh_analytics() is incremental: it finds the report days of incidents
+changed since the last refresh (via the indexed updated_at column), plus the
+days Incident mapper events marked stale because an incident was deleted or
+its date_reported moved away, and rebuilds only those days. `flask refresh-analytics` runs it, typically from
+cron every few minutes; `--full` rebuilds the whole history. /api/analytics
+aggregates the rollup, so its cost grows with the number of days and groups
+asked for, not with the number of incidents.
+"""
+
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import and_, case, cast, delete, event, func, insert, or_, select
+from extensions import db
+from models import Incident, IncidentAnalyticsDay, IncidentAnalyticsStaleDay, IncidentResolveBucket, RollupWatermark
+
+ANALYTICS_ROLLUP = 'incident_analytics'
+
+# Time-to-resolve histogram upper bounds in minutes; the last bucket is everything above
+RESOLVE_BUCKETS = (15, 30, 60, 120, 240, 480, 1440, 2880, 4320, 10080, 20160, 43200)
+
+PERCENTILES = (0.5, 0.9, 0.95)
+
+DIMENSIONS = ('category', 'equipment', 'location', 'month')
+
+# Changes committed shortly before a refresh may carry an earlier updated_at;
+# rebuilding a day twice is harmless, so the next refresh looks back this far
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+# More separate day ranges than this are refreshed as one range from first to last
+MAX_REFRESH_RANGES = 50
+
+DayRange = namedtuple('DayRange', ['start', 'end'])  # end is exclusive
+
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+
+def day_of(column, dialect):
+    """SQL expression for the calendar day of a datetime column."""
+    if dialect == 'sqlite':
+        return func.date(column)
+    return cast(column, db.Date)
+
+
+def _month(column, dialect):
+    if dialect == 'sqlite':
+        return func.strftime('%Y-%m', column)
+    return func.to_char(column, 'YYYY-MM')
+
+
+def _minutes_between(start, end, dialect):
+    if dialect == 'sqlite':
+        return (func.julianday(end) - func.julianday(start)) * 1440.0
+    return func.extract('epoch', end - start) / 60.0
+
+
+def _resolve_bucket(minutes):
+    """SQL CASE mapping minutes to an index into RESOLVE_BUCKETS."""
+    return case(*((minutes <= bound, index) for index, bound in enumerate(RESOLVE_BUCKETS)),
+                else_=len(RESOLVE_BUCKETS))
+
+
+def as_date(value):
+    """Convert a day_of() result to a date (SQLite's date() returns text)."""
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def changed_days_query(since):
+    """Distinct report days of the incidents updated at or after since."""
+    day = day_of(Incident.date_reported, _dialect())
+    return select(day).distinct().where(Incident.updated_at >= since)
+
+
+def _changed_days(since):
+    rows = db.session.execute(changed_days_query(since)).scalars()
+    return sorted(as_date(value) for value in rows if value is not None)
+
+
+def mark_stale_day(connection, day):
+    """Record that the rollup rows of a report day need rebuilding at the next refresh."""
+    table = IncidentAnalyticsStaleDay.__table__
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        connection.execute(upsert(table).values(day=day).on_conflict_do_nothing(index_elements=[table.c.day]))
+        return
+
+    if connection.execute(select(table.c.day).where(table.c.day == day)).first() is None:
+        connection.execute(table.insert().values(day=day))
+
+
+@event.listens_for(Incident.date_reported, 'set', active_history=True)
+def _track_previous_day(target, value, oldvalue, initiator):
+    # Load the old value so after_update can mark the day the incident left
+    pass
+
+
+@event.listens_for(Incident, 'after_update')
+def _incident_updated(mapper, connection, target):
+    history = db.inspect(target).attrs.date_reported.history
+    old = history.deleted[0] if history.deleted else None
+    if old is not None and (target.date_reported is None or target.date_reported.date() != old.date()):
+        mark_stale_day(connection, old.date())
+
+
+@event.listens_for(Incident, 'after_delete')
+def _incident_deleted(mapper, connection, target):
+    if target.date_reported is not None:
+        mark_stale_day(connection, target.date_reported.date())
+
+
+def _stale_days():
+    return db.session.execute(select(IncidentAnalyticsStaleDay.day)).scalars().all()
+
+
+def _day_ranges(days):
+    """Merge sorted days into as few [start, end) ranges as possible."""
+    ranges = []
+    for day in days:
+        if ranges and ranges[-1].end >= day:
+            ranges[-1] = DayRange(ranges[-1].start, max(ranges[-1].end, day + timedelta(days=1)))
+        else:
+            ranges.append(DayRange(day, day + timedelta(days=1)))
+    if len(ranges) > MAX_REFRESH_RANGES:
+        ranges = [DayRange(ranges[0].start, ranges[-1].end)]
+    return ranges
+
+
+def _rebuild(ranges):
+    """Delete and recompute the rollup rows of the given day ranges (None: all of them)."""
+    dialect = _dialect()
+    incidents = Incident.__table__
+    day = day_of(incidents.c.date_reported, dialect)
+    month = _month(incidents.c.date_reported, dialect)
+    minutes = _minutes_between(incidents.c.date_reported, incidents.c.resolved_at, dialect)
+    keys = [incidents.c.category, incidents.c.equipment, incidents.c.location]
+
+    reported = []
+    if ranges is not None:
+        reported.append(or_(*(and_(incidents.c.date_reported >= datetime.combine(r.start, time()),
+                                   incidents.c.date_reported < datetime.combine(r.end, time()))
+                              for r in ranges)))
+
+    for model in (IncidentAnalyticsDay, IncidentResolveBucket):
+        stmt = delete(model)
+        if ranges is not None:
+            stmt = stmt.where(or_(*(and_(model.day >= r.start, model.day < r.end) for r in ranges)))
+        db.session.execute(stmt)
+
+    totals = select(
+        day, *keys, month,
+        func.count(incidents.c.id),
+        func.count(incidents.c.resolved_at),
+        func.coalesce(func.sum(minutes), 0),
+        func.coalesce(func.sum(incidents.c.downtime_minutes), 0),
+        func.coalesce(func.sum(incidents.c.cost_estimate), 0),
+    ).where(*reported).group_by(day, *keys, month)
+    written = db.session.execute(insert(IncidentAnalyticsDay).from_select(
+        ['day', 'category', 'equipment', 'location', 'month',
+         'incidents', 'resolved', 'resolve_minutes', 'downtime_minutes', 'cost'], totals)).rowcount
+
+    bucket = _resolve_bucket(minutes)
+    histogram = select(day, *keys, bucket, month, func.count(incidents.c.id)).where(
+        *reported, incidents.c.resolved_at.isnot(None)).group_by(day, *keys, bucket, month)
+    db.session.execute(insert(IncidentResolveBucket).from_select(
+        ['day', 'category', 'equipment', 'location', 'bucket', 'month', 'count'], histogram))
+
+    return written
+
+
+def refresh_analytics(full=False, now=None):
+    """
+    Bring the analytics rollup up to date with the incidents table.
+    Rebuilds only the report days of incidents changed since the last refresh
+    and the days marked stale by deletes and moved report dates, or everything
+    when full is set or the rollup was never built. Returns the number of daily
+    rows written. The caller commits.
+    """
+    now = now or datetime.utcnow()
+    watermark = db.session.get(RollupWatermark, ANALYTICS_ROLLUP)
+
+    if full or watermark is None:
+        written = _rebuild(None)
+        db.session.execute(delete(IncidentAnalyticsStaleDay))
+    else:
+        stale = _stale_days()
+        ranges = _day_ranges(sorted(set(_changed_days(watermark.changes_since)) | set(stale)))
+        written = _rebuild(ranges) if ranges else 0
+        if stale:
+            db.session.execute(delete(IncidentAnalyticsStaleDay).where(IncidentAnalyticsStaleDay.day.in_(stale)))
+
+    if watermark is None:
+        watermark = RollupWatermark(name=ANALYTICS_ROLLUP)
+        db.session.add(watermark)
+    watermark.changes_since = now - REFRESH_OVERLAP
+    watermark.refreshed_at = now
+    db.session.flush()
+
+    return written
+
+
+def last_refreshed():
+    """When the analytics rollup was last refreshed, or None if it never was."""
+    watermark = db.session.get(RollupWatermark, ANALYTICS_ROLLUP)
+    return watermark.refreshed_at if watermark else None
+
+
+def percentile(histogram, fraction):
+    """
+    Estimate a percentile in minutes from RESOLVE_BUCKETS counts, interpolating
+    linearly inside the bucket it falls in. Values in the open-ended last bucket
+    are reported as the largest bound.
+    """
+    total = sum(histogram)
+    if not total:
+        return None
+
+    rank = fraction * total
+    seen = 0
+    for index, count in enumerate(histogram):
+        if count and seen + count >= rank:
+            if index == len(RESOLVE_BUCKETS):
+                return float(RESOLVE_BUCKETS[-1])
+            lower = RESOLVE_BUCKETS[index - 1] if index else 0
+            return round(lower + (RESOLVE_BUCKETS[index] - lower) * (rank - seen) / count, 1)
+        seen += count
+    return float(RESOLVE_BUCKETS[-1])
+
+
+def _empty_group():
+    return {'incidents': 0, 'resolved': 0, 'resolve_minutes': 0.0, 'downtime_minutes': 0, 'cost': 0.0,
+            'histogram': [0] * (len(RESOLVE_BUCKETS) + 1)}
+
+
+def _add(group, other):
+    for field in ('incidents', 'resolved', 'resolve_minutes', 'downtime_minutes', 'cost'):
+        group[field] += other[field]
+    group['histogram'] = [a + b for a, b in zip(group['histogram'], other['histogram'])]
+
+
+def _summarize(group):
+    mttr = {'mean': round(group['resolve_minutes'] / group['resolved'], 1) if group['resolved'] else None}
+    for fraction in PERCENTILES:
+        mttr[f'p{int(fraction * 100)}'] = percentile(group['histogram'], fraction)
+    return {
+        'incidents': group['incidents'],
+        'resolved': group['resolved'],
+        'mttr_minutes': mttr,
+        'downtime_minutes': group['downtime_minutes'],
+        'cost': round(group['cost'], 2),
+    }
+
+
+def analytics_report(by=None, start=None, end=None):
+    """
+    MTTR (mean and PERCENTILES), downtime and cost from the rollup, for incidents
+    reported between the start and end dates (inclusive, either may be None).
+    Returns (totals, groups): groups is a list with one entry per value of the
+    `by` dimension (one of DIMENSIONS), empty when by is None. Two queries.
+    """
+    if by is not None and by not in DIMENSIONS:
+        raise ValueError(f"Unknown analytics dimension '{by}'")
+
+    def day_range(model):
+        conditions = []
+        if start:
+            conditions.append(model.day >= start)
+        if end:
+            conditions.append(model.day <= end)
+        return conditions
+
+    day_key = [getattr(IncidentAnalyticsDay, by)] if by else []
+    bucket_key = [getattr(IncidentResolveBucket, by)] if by else []
+
+    groups = {}
+    rows = db.session.execute(
+        select(*day_key,
+               func.sum(IncidentAnalyticsDay.incidents), func.sum(IncidentAnalyticsDay.resolved),
+               func.sum(IncidentAnalyticsDay.resolve_minutes), func.sum(IncidentAnalyticsDay.downtime_minutes),
+               func.sum(IncidentAnalyticsDay.cost))
+        .where(*day_range(IncidentAnalyticsDay)).group_by(*day_key)
+    )
+    for row in rows:
+        key = row[0] if by else None
+        incidents, resolved, resolve_minutes, downtime, cost = row[-5:]
+        if not incidents:
+            continue
+        group = groups.setdefault(key, _empty_group())
+        group.update(incidents=int(incidents), resolved=int(resolved or 0),
+                     resolve_minutes=float(resolve_minutes or 0), downtime_minutes=int(downtime or 0),
+                     cost=float(cost or 0))
+
+    rows = db.session.execute(
+        select(*bucket_key, IncidentResolveBucket.bucket, func.sum(IncidentResolveBucket.count))
+        .where(*day_range(IncidentResolveBucket)).group_by(*bucket_key, IncidentResolveBucket.bucket)
+    )
+    for row in rows:
+        key = row[0] if by else None
+        bucket, count = row[-2:]
+        if key in groups:
+            groups[key]['histogram'][bucket] += int(count)
+
+    totals = _empty_group()
+    for group in groups.values():
+        _add(totals, group)
+
+    if by is None:
+        return _summarize(totals), []
+
+    if by == 'month':
+        ordered = sorted(groups.items())
+    else:
+        ordered = sorted(groups.items(), key=lambda item: (-item[1]['downtime_minutes'], item[0]))
+    return _summarize(totals), [{by: key, **_summarize(group)} for key, group in ordered]
@@ -2,12 +2,15 @@
 Flask CLI commands for the Incident Management System.
 These commands provide database initialization, user management, and utility functions.
 
-TEMPORARILY DISABLED: All commands except init-db are commented out for debugging.
+TEMPORARILY DISABLED: Legacy commands other than init-db are commented out for debugging.
 """
 
+import functools
 import click
 from flask import current_app
 from flask.cli import with_appcontext
+from flask_migrate import stamp, upgrade
+from db_pool import disable_statement_timeout
 from extensions import db
 from models import User, Incident, Engineer
 from datetime import datetime
@@ -15,6 +18,17 @@ import os
 import random
 
 
+def batch_job(command):
+    """Run a long-running command without the web requests' DB_STATEMENT_TIMEOUT."""
+
+    @functools.wraps(command)
+    def wrapper(*args, **kwargs):
+        disable_statement_timeout(db.engines.values())
+        return command(*args, **kwargs)
+
+    return wrapper
+
+
 @click.command()
 @with_appcontext
 def init_db():
@@ -31,10 +45,21 @@ def init_db():
                 os.makedirs(db_dir)
                 print(f'📁 Created database directory: {db_dir}')
         
-        # Create all tables
-        print("🔧 Creating database tables...")
-        db.create_all()
-        print('✅ Database tables created successfully!')
+        if db.inspect(db.engine).get_table_names():
+            # create_all() never alters existing tables, so bring them forward with the
+            # migrations (which also backfill new columns and rollups) instead
+            print("🔄 Existing database found, applying migrations...")
+            upgrade()
+            print('✅ Database upgraded to the latest migration!')
+        else:
+            # Create all tables
+            print("🔧 Creating database tables...")
+            db.create_all()
+            print('✅ Database tables created successfully!')
+            
+            # create_all built the current schema, so later 'flask db upgrade' runs start from here
+            stamp()
+            print('🏷️  Stamped database at the latest migration')
         
         # Show created tables
         inspector = db.inspect(db.engine)
@@ -52,6 +77,344 @@ def init_db():
         print(f'❌ Error initializing database: {e}')
 
 
+@click.command()
+@click.option('--verify-only', is_flag=True, help='Only compare the rollup with live counts, do not rewrite it')
+@with_appcontext
+@batch_job
+def rebuild_stats(verify_only):
+    """Rebuild or verify the incident_stats rollup table."""
+    from incident_stats import rebuild_incident_stats, verify_incident_stats
+    
+    try:
+        print("🔍 Verifying incident_stats against the incidents table...")
+        mismatches = verify_incident_stats()
+        
+        if mismatches:
+            print(f"⚠️  Found {len(mismatches)} mismatched counter(s):")
+            for status, severity, stored, actual in mismatches:
+                print(f"   {status}/{severity}: stored={stored} actual={actual}")
+        else:
+            print("✅ incident_stats matches the incidents table")
+        
+        if verify_only:
+            return
+        
+        print("🔧 Rebuilding incident_stats from the incidents table...")
+        rows = rebuild_incident_stats()
+        db.session.commit()
+        print(f'✅ Rebuilt incident_stats with {rows} counter row(s)')
+        
+    except Exception as e:
+        print(f'❌ Error rebuilding incident statistics: {e}')
+        db.session.rollback()
+
+
+@click.command()
+@with_appcontext
+@batch_job
+def rebuild_search_index():
+    """Create and repopulate the incident full-text search index."""
+    from incident_search import rebuild_search_index as rebuild_index
+    
+    try:
+        print("🔧 Rebuilding incident full-text search index...")
+        if not rebuild_index():
+            print(f"⚠️  {db.engine.dialect.name} has no native full-text index; search falls back to LIKE")
+            return
+        db.session.commit()
+        print(f"✅ Search index rebuilt for {Incident.query.count()} incident(s)")
+        
+    except Exception as e:
+        print(f'❌ Error rebuilding search index: {e}')
+        db.session.rollback()
+
+
+@click.command()
+@click.option('--verbose', is_flag=True, help='Print every plan, not only the failing ones')
+@with_appcontext
+def check_indexes(verbose):
+    """EXPLAIN the hot incident queries and check each one uses an index."""
+    from query_plans import check_query_plans
+    
+    try:
+        print(f"🔍 Checking query plans on {db.engine.dialect.name}...")
+        checks = check_query_plans()
+    except Exception as e:
+        print(f'❌ Error checking query plans: {e}')
+        raise SystemExit(1)
+    
+    failures = [check for check in checks if not check.uses_index]
+    for check in checks:
+        print(f"   {'✅' if check.uses_index else '❌'} {check.name}")
+        if verbose or not check.uses_index:
+            for line in check.plan:
+                print(f"        {line}")
+    
+    if failures:
+        print(f"⚠️  {len(failures)} of {len(checks)} queries do not use an index; run 'flask db upgrade'")
+        raise SystemExit(1)
+    print(f"✅ All {len(checks)} queries use an index")
+
+
+@click.command()
+@click.option('--start', help='First day to rebuild (YYYY-MM-DD, default: the first incident)')
+@click.option('--end', help='Last day to rebuild (YYYY-MM-DD, default: the last incident)')
+@with_appcontext
+@batch_job
+def backfill_trends(start, end):
+    """Rebuild the incident_daily_counts trend rollup from the incidents table."""
+    from incident_export import parse_date
+    from incident_trends import backfill_daily_counts
+    
+    try:
+        start, end = parse_date(start), parse_date(end)
+    except ValueError:
+        raise click.BadParameter('Dates must look like YYYY-MM-DD.')
+    
+    try:
+        print("🔧 Rebuilding incident_daily_counts from the incidents table...")
+        rows = backfill_daily_counts(start, end)
+        db.session.commit()
+        print(f"✅ Wrote {rows:,} daily count row(s)")
+        
+    except Exception as e:
+        print(f'❌ Error backfilling trends: {e}')
+        db.session.rollback()
+
+
+@click.command()
+@click.option('--full', is_flag=True, help='Rebuild the whole history instead of the days changed since the last run')
+@with_appcontext
+@batch_job
+def refresh_analytics(full):
+    """Bring the MTTR / downtime / cost analytics rollup up to date."""
+    from analytics import refresh_analytics as refresh
+    
+    try:
+        print(f"🔧 {'Rebuilding' if full else 'Refreshing'} the analytics rollup...")
+        rows = refresh(full=full)
+        db.session.commit()
+        print(f"✅ Wrote {rows:,} daily row(s)")
+        
+    except Exception as e:
+        print(f'❌ Error refreshing analytics: {e}')
+        db.session.rollback()
+
+
+@click.command()
+@click.option('--format', 'export_format', type=click.Choice(['csv', 'ndjson']), default='csv', help='Output format')
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='Output file (default: stdout)')
+@click.option('--status', help='Only export incidents with this status')
+@click.option('--severity', help='Only export incidents with this severity')
+@click.option('--category', help='Only export incidents in this category')
+@click.option('--start', help='Only export incidents reported on or after this date (YYYY-MM-DD)')
+@click.option('--end', help='Only export incidents reported on or before this date (YYYY-MM-DD)')
+@click.option('--batch-size', default=1000, help='Rows fetched from the database per round trip')
+@with_appcontext
+@batch_job
+def export_incidents(export_format, output, status, severity, category, start, end, batch_size):
+    """Stream incidents to a CSV or NDJSON file."""
+    from incident_export import iter_export, parse_date
+    
+    try:
+        start, end = parse_date(start), parse_date(end)
+    except ValueError:
+        raise click.BadParameter('Dates must use the YYYY-MM-DD format.')
+    
+    try:
+        for chunk in iter_export(export_format, batch_size=batch_size, status=status,
+                                 severity=severity, category=category, start=start, end=end):
+            output.write(chunk)
+        output.flush()
+        
+    except Exception as e:
+        click.echo(f'❌ Error exporting incidents: {e}', err=True)
+
+
+@click.command()
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'import_format', type=click.Choice(['csv', 'jsonl']),
+              help='Input format (default: from the file extension)')
+@click.option('--batch-size', default=1000, help='Rows inserted per executemany')
+@click.option('--commit-every', default=10, help='Batches per transaction')
+@click.option('--default-reporter', help='Username or email used for rows without a reporter')
+@click.option('--dry-run', is_flag=True, help='Validate the input without writing anything')
+@with_appcontext
+@batch_job
+def import_incidents(source, import_format, batch_size, commit_every, default_reporter, dry_run):
+    """Bulk import incidents from a CSV or JSON Lines file."""
+    from incident_import import import_incidents as run_import
+    
+    if import_format is None:
+        name = (source.name or '').lower()
+        if name.endswith('.csv'):
+            import_format = 'csv'
+        elif name.endswith(('.jsonl', '.ndjson')):
+            import_format = 'jsonl'
+        else:
+            raise click.BadParameter('Cannot tell the format from the file name; use --format.')
+    
+    def report_progress(stats):
+        print(f"📥 {stats.imported} row(s) {'validated' if dry_run else 'imported'}, "
+              f"{stats.error_count} skipped ({stats.rows_per_second:,.0f} rows/s)")
+    
+    try:
+        print(f"🚀 Importing incidents from {source.name} ({import_format}){' [dry run]' if dry_run else ''}...")
+        stats = run_import(source, import_format, batch_size=batch_size, commit_every=commit_every,
+                           default_reporter=default_reporter, dry_run=dry_run, progress=report_progress)
+        
+        print(f"✅ {'Validated' if dry_run else 'Imported'} {stats.imported} of {stats.read} row(s) "
+              f"in {stats.elapsed:.1f}s ({stats.rows_per_second:,.0f} rows/s)")
+        
+        if stats.error_count:
+            print(f"⚠️  Skipped {stats.error_count} invalid row(s):")
+            for line_number, message in stats.errors:
+                print(f"   line {line_number}: {message}")
+            if stats.error_count > len(stats.errors):
+                print(f"   ... and {stats.error_count - len(stats.errors)} more")
+        
+    except Exception as e:
+        print(f'❌ Error importing incidents: {e}')
+
+
+@click.command()
+@click.option('--target-size', default='10k', help='Number of incidents, e.g. 50000, 250k or 2m')
+@click.option('--incidents', type=int, help='Override the number of incidents')
+@click.option('--parts', type=int, help='Override the number of parts (default: scaled to the target size)')
+@click.option('--engineers', type=int, help='Override the number of engineers (default: scaled)')
+@click.option('--users', type=int, help='Override the number of reporting users (default: scaled)')
+@click.option('--seed', default=42, help='Random seed; the same seed produces the same data')
+@click.option('--days', default=365, type=click.IntRange(min=1), help='Spread incidents over this many days')
+@click.option('--end-date', help='Last day of the window (YYYY-MM-DD, default: now)')
+@click.option('--batch-size', default=5000, help='Rows inserted per executemany')
+@with_appcontext
+@batch_job
+def seed_data(target_size, incidents, parts, engineers, users, seed, days, end_date, batch_size):
+    """Generate synthetic incidents, parts and engineers for capacity testing."""
+    from data_seeder import DataSeeder, SeedPlan, parse_size, plan_for_target
+    from incident_export import parse_date
+    
+    try:
+        plan = plan_for_target(parse_size(target_size) if incidents is None else incidents)
+        end = parse_date(end_date)
+    except ValueError:
+        raise click.BadParameter('Sizes must look like 50000, 250k or 2m and dates like YYYY-MM-DD.')
+    
+    plan = SeedPlan(
+        incidents=plan.incidents,
+        parts=plan.parts if parts is None else parts,
+        engineers=plan.engineers if engineers is None else engineers,
+        users=max(1, plan.users if users is None else users),
+    )
+    now = datetime.combine(end, datetime.max.time().replace(microsecond=0)) if end else None
+    
+    def report_progress(label, done, total, rate):
+        print(f"🌱 {label}: {done:,}/{total:,} ({rate:,.0f} rows/s)")
+    
+    try:
+        print(f"🚀 Seeding {plan.incidents:,} incidents, {plan.parts:,} parts, {plan.engineers:,} engineers "
+              f"and {plan.users:,} users (seed {seed})...")
+        seeder = DataSeeder(plan, seed=seed, days=days, batch_size=batch_size, now=now, progress=report_progress)
+        elapsed = seeder.run()
+        print(f"✅ Seeded database in {elapsed:.1f}s ({plan.incidents / elapsed if elapsed else 0:,.0f} incidents/s)")
+        
+        # Seeded incidents carry historical updated_at values an incremental refresh would skip
+        from analytics import refresh_analytics
+        rows = refresh_analytics(full=True)
+        db.session.commit()
+        print(f"📊 Rebuilt the analytics rollup ({rows:,} daily row(s))")
+        
+    except Exception as e:
+        print(f'❌ Error seeding database: {e}')
+
+
+@click.command()
+@click.option('--users', default=10, help='Concurrent virtual users')
+@click.option('--duration', type=float, help='Seconds each user keeps sending requests')
+@click.option('--requests', 'requests_per_user', type=int, help='Actions per user (default: 50 if no --duration)')
+@click.option('--mix', help='Action weights, e.g. dashboard=25,incidents=25,search=15,incident_detail=25,report=10')
+@click.option('--username', default='demo_user', help='Account the virtual users log in as')
+@click.option('--password', default='password', help='Password of that account')
+@click.option('--url', help='Target a running instance instead of starting the app locally')
+@click.option('--seed', type=int, help='Random seed for the action sequence')
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='JSON report file (default: stdout)')
+@with_appcontext
+def load_test(users, duration, requests_per_user, mix, username, password, url, seed, output):
+    """Replay concurrent page views and submissions and report latency per route."""
+    import json
+    from contextlib import nullcontext
+    from load_test import DEFAULT_MIX, parse_mix, run_load_test, serve_app
+    
+    try:
+        mix = parse_mix(mix) if mix else DEFAULT_MIX
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    if duration is None and requests_per_user is None:
+        requests_per_user = 50
+    
+    try:
+        server = nullcontext(url) if url else serve_app(current_app._get_current_object())
+        with server as base_url:
+            click.echo(f"🚀 Load testing {base_url} with {users} user(s)...", err=True)
+            report = run_load_test(base_url, users=users, duration=duration, requests_per_user=requests_per_user,
+                                   mix=mix, username=username, password=password, seed=seed)
+        
+        json.dump(report, output, indent=2)
+        output.write('\n')
+        click.echo(f"✅ {report['total_requests']} request(s), {report['total_errors']} error(s), "
+                   f"{report['throughput_rps']} req/s", err=True)
+        if report['config']['login_failures']:
+            click.echo(f"⚠️  {report['config']['login_failures']} user(s) could not log in as {username}", err=True)
+        
+    except Exception as e:
+        click.echo(f'❌ Error running load test: {e}', err=True)
+
+
+@click.command()
+@click.option('--profiles', default='default,wal', help='Comma-separated SQLite profiles to compare')
+@click.option('--workers', default=4, help='Concurrent worker processes')
+@click.option('--duration', default=5.0, help='Seconds each profile is measured')
+@click.option('--write-ratio', default=0.2, help='Share of operations that insert an incident')
+@click.option('--seed-rows', default=2000, help='Incidents in the database before measuring')
+@click.option('--output', type=click.File('w', encoding='utf-8'), help='Also write the results as JSON')
+@with_appcontext
+def benchmark_sqlite(profiles, workers, duration, write_ratio, seed_rows, output):
+    """Compare read/write throughput of SQLite profiles under concurrent workers."""
+    import json
+    from sqlite_tuning import benchmark_profile, resolve_pragmas
+    
+    names = [name.strip() for name in profiles.split(',') if name.strip()]
+    try:
+        for name in names:
+            resolve_pragmas(name)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    
+    try:
+        results = []
+        for name in names:
+            print(f"🚀 Benchmarking '{name}' with {workers} worker(s) for {duration:g}s...")
+            result = benchmark_profile(name, workers=workers, duration=duration,
+                                       write_ratio=write_ratio, seed_rows=seed_rows)
+            results.append(result)
+            print(f"   📖 {result['reads_per_second']} reads/s  ✍️  {result['writes_per_second']} writes/s  "
+                  f"❌ {result['errors']} locked")
+        
+        baseline = results[0]
+        for result in results[1:]:
+            if baseline['reads'] and baseline['writes']:
+                print(f"📊 '{result['profile']}' vs '{baseline['profile']}': "
+                      f"reads x{result['reads'] / baseline['reads']:.2f}, "
+                      f"writes x{result['writes'] / baseline['writes']:.2f}")
+        
+        if output:
+            json.dump(results, output, indent=2)
+            output.write('\n')
+        
+    except Exception as e:
+        print(f'❌ Error running SQLite benchmark: {e}')
+
+
 # =============================================================================
 # TEMPORARILY DISABLED COMMANDS FOR DEBUGGING
 # Uncomment the sections below to re-enable specific commands
@@ -130,15 +493,6 @@ def init_db():
 #         db.session.rollback()
 
 
-# @click.command()
-# @click.option('--count', default=10, help='Number of sample incidents to create')
-# @with_appcontext
-# def seed_data(count):
-#     """Seed the database with sample data."""
-#     # [Large function commented out - uncomment when needed]
-#     pass
-
-
 # @click.command()
 # @with_appcontext
 # def db_stats():
@@ -197,10 +551,22 @@ def init_db():
 
 def register_commands(app):
     """Register CLI commands with the Flask app."""
-    print("🔧 Registering CLI commands (DEBUG MODE: only init-db enabled)")
+    print("🔧 Registering CLI commands (DEBUG MODE: most commands disabled)")
     
     # Database commands
     app.cli.add_command(init_db)
+    app.cli.add_command(rebuild_stats)
+    app.cli.add_command(rebuild_search_index)
+    app.cli.add_command(check_indexes)
+    app.cli.add_command(refresh_analytics)
+    app.cli.add_command(backfill_trends)
+    app.cli.add_command(export_incidents)
+    app.cli.add_command(import_incidents)
+    
+    # Data commands
+    app.cli.add_command(seed_data)
+    app.cli.add_command(load_test)
+    app.cli.add_command(benchmark_sqlite)
     
     # TEMPORARILY DISABLED FOR DEBUGGING
     # Uncomment the lines below to re-enable specific commands:
@@ -215,8 +581,6 @@ def register_commands(app):
     # app.cli.add_command(create_admin)
     # app.cli.add_command(list_users)
     
-    # Data commands
-    # app.cli.add_command(seed_data)
     # app.cli.add_command(db_stats)
     
     # Help command
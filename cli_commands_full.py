@@ -7,10 +7,10 @@ import click
 from flask import current_app
 from flask.cli import with_appcontext
 from extensions import db
+from db_routing import replica_reads
 from models import User, Incident
-from datetime import datetime
+from cli_commands import seed_data as seed_synthetic_data
 import os
-import random
 
 
 @click.command()
@@ -125,113 +125,34 @@ def init_db():
 #         db.session.rollback()
 
 
-@click.command()
-@click.option('--count', default=10, help='Number of sample incidents to create')
-@with_appcontext
-def seed_data(count):
-    """Seed the database with sample data."""
+@click.command(params=[
+    *seed_synthetic_data.params,
+    click.Option(['--count'], type=int, help='Legacy alias for --incidents'),
+])
+@click.pass_context
+def seed_data(ctx, count, **options):
+    """Seed the database with synthetic data (see cli_commands.seed_data) and show statistics."""
+    if count is not None and options['incidents'] is None:
+        options['incidents'] = count
+    ctx.invoke(seed_synthetic_data, **options)
+    
     try:
-        print(f"🌱 Starting database seeding with {count} incidents...")
-        
-        # Check if we have users
-        users = User.query.all()
-        if not users:
-            print("❌ No users found! Create users first.")
-            return
-        
-        print(f"👥 Found {len(users)} users for seeding")
-        
-        # Sample incident data
-        sample_incidents = [
-            {
-                'title': 'Database Connection Timeout',
-                'description': 'Application experiencing intermittent database connection timeouts during peak hours.',
-                'severity': 'high',
-                'category': 'database',
-                'status': 'open'
-            },
-            {
-                'title': 'API Rate Limiting Issues',
-                'description': 'Third-party API calls failing due to rate limiting. Need to implement backoff strategy.',
-                'severity': 'medium',
-                'category': 'api',
-                'status': 'in_progress'
-            },
-            {
-                'title': 'Memory Leak in User Service',
-                'description': 'User service showing gradual memory increase over time, causing performance degradation.',
-                'severity': 'critical',
-                'category': 'performance',
-                'status': 'open'
-            },
-            {
-                'title': 'SSL Certificate Expiration',
-                'description': 'Production SSL certificate expires in 7 days. Need to renew and deploy.',
-                'severity': 'high',
-                'category': 'security',
-                'status': 'resolved'
-            },
-            {
-                'title': 'Login Page Rendering Issue',
-                'description': 'Users reporting login page not rendering correctly on mobile devices.',
-                'severity': 'medium',
-                'category': 'frontend',
-                'status': 'in_progress'
-            }
-        ]
-        
-        incidents_created = 0
-        print("🔧 Creating sample incidents...")
-        
-        for i in range(count):
-            # Cycle through sample incidents
-            sample = sample_incidents[i % len(sample_incidents)]
-            
-            # Select random user as reporter
-            reporter = random.choice(users)
-            
-            incident = Incident(
-                title=f"{sample['title']} #{i+1}",
-                description=sample['description'],
-                severity=sample['severity'],
-                category=sample['category'],
-                status=sample['status'],
-                location=f"Server-{random.randint(1, 10)}",
-                reporter_id=reporter.id,
-                created_at=datetime.utcnow()
-            )
-            
-            db.session.add(incident)
-            incidents_created += 1
-            
-            # Print progress for every 5 incidents
-            if incidents_created % 5 == 0:
-                print(f"📝 Created {incidents_created}/{count} incidents...")
-        
-        print("💾 Saving incidents to database...")
-        db.session.commit()
-        
-        print(f'✅ Successfully created {incidents_created} sample incidents!')
-        
-        # Show statistics
-        total_incidents = Incident.query.count()
-        open_incidents = Incident.query.filter_by(status='open').count()
-        in_progress = Incident.query.filter_by(status='in_progress').count()
-        resolved = Incident.query.filter_by(status='resolved').count()
+        from incident_stats import get_incident_stats
+        stats = get_incident_stats()
         
         print("📊 Database statistics:")
-        print(f"   Total incidents: {total_incidents}")
-        print(f"   Open: {open_incidents}")
-        print(f"   In Progress: {in_progress}")
-        print(f"   Resolved: {resolved}")
+        print(f"   Total incidents: {stats['total']}")
+        print(f"   Open: {stats['open']}")
+        print(f"   In Progress: {stats['in_progress']}")
+        print(f"   Resolved: {stats['resolved']}")
         
     except Exception as e:
-        print(f'❌ Error seeding database: {e}')
-        db.session.rollback()
+        print(f'❌ Error reading database statistics: {e}')
 
 
 @click.command()
 @with_appcontext
+@replica_reads()
 def db_stats():
     """Show database statistics."""
     try:
@@ -297,6 +218,7 @@ def db_stats():
 
 @click.command()
 @with_appcontext
+@replica_reads()
 def list_users():
     """List all users in the database."""
     try:
@@ -0,0 +1,130 @@
+"""
+Conditional GET support (ETag / Last-Modified) for the Incident Management System.
+
+Routes compute cheap validators from updated_at timestamps before doing any
+real work. If the client already has the current version, they answer with
+304 Not Modified without rendering a template or fetching full rows.
+"""
+
+import hashlib
+from datetime import timezone
+from flask import make_response, request, session
+from flask_login import current_user
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+from extensions import db
+from models import User, Incident, Part, incident_parts
+from incident_stats import get_incident_stats
+
+
+def make_etag(*parts):
+    """Build a strong ETag value from the given parts."""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def _user_parts():
+    """ETag parts for pages whose HTML depends on who is logged in."""
+    if current_user.is_authenticated:
+        return (current_user.get_id(), current_user.role)
+    return (None, None)
+
+
+def _aware(dt):
+    if dt is None:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def _cacheable():
+    # A pending flash message is rendered into the page once; never let a
+    # browser cache or revalidate that response. Decided on first use, since
+    # rendering the page pops the messages from the session.
+    key = 'ims.conditional_cacheable'
+    if key not in request.environ:
+        request.environ[key] = '_flashes' not in session
+    return request.environ[key]
+
+
+def is_not_modified(etag, last_modified=None):
+    """Check the request's If-None-Match / If-Modified-Since against the validators."""
+    if not _cacheable():
+        return False
+
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+
+    if last_modified is not None and request.if_modified_since is not None:
+        # HTTP dates have one second resolution
+        return _aware(last_modified).replace(microsecond=0) <= request.if_modified_since
+
+    return False
+
+
+def not_modified_response(etag, last_modified=None):
+    """Build an empty 304 response carrying the validators."""
+    response = make_response('', 304)
+    return with_validators(response, etag, last_modified)
+
+
+def with_validators(response, etag, last_modified=None):
+    """Attach ETag, Last-Modified and revalidation headers to a response."""
+    if not _cacheable():
+        return response
+
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _aware(last_modified)
+    # Pages are per user; browsers may keep them but must revalidate every time
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def incident_validators(incident_id):
+    """
+    Validators for the incident detail page, from the incident's updated_at, its
+    parts associations and the parts themselves, plus the names shown for the
+    reporter and assignee. Users have no updated_at, so a rename changes the
+    ETag but not Last-Modified. Returns (etag, last_modified), or None if the
+    incident does not exist.
+    """
+    associations_updated = select(func.max(incident_parts.c.updated_at)).where(
+        incident_parts.c.incident_id == incident_id
+    ).scalar_subquery()
+    parts_updated = select(func.max(Part.updated_at)).join(
+        incident_parts, incident_parts.c.part_id == Part.id
+    ).where(incident_parts.c.incident_id == incident_id).scalar_subquery()
+    parts_count = select(func.count()).select_from(incident_parts).where(
+        incident_parts.c.incident_id == incident_id
+    ).scalar_subquery()
+
+    reporter = aliased(User)
+    assignee = aliased(User)
+    row = db.session.query(
+        Incident.updated_at, associations_updated, parts_updated, parts_count,
+        reporter.username, reporter.first_name, reporter.last_name,
+        assignee.first_name, assignee.last_name,
+    ).outerjoin(reporter, Incident.reporter_id == reporter.id).outerjoin(
+        assignee, Incident.assigned_to_id == assignee.id
+    ).filter(Incident.id == incident_id).first()
+    if row is None:
+        return None
+
+    updated_at, associations_updated_at, parts_updated_at = row[:3]
+    last_modified = max(filter(None, [updated_at, associations_updated_at, parts_updated_at]), default=None)
+    etag = make_etag('incident', incident_id, *row, *_user_parts())
+    return etag, last_modified
+
+
+def incidents_validators(*extra, per_user=True, stats=None):
+    """
+    Validators for incident lists and statistics, from the newest updated_at and
+    the total count in the incident_stats rollup (which also changes on delete).
+    Pass stats if the caller already read the rollup. Reporter names on the
+    list are not covered: renaming a user shows up once an incident changes.
+    """
+    last_modified = db.session.query(func.max(Incident.updated_at)).scalar()
+    total = (stats or get_incident_stats())['total']
+    user = _user_parts() if per_user else ()
+    etag = make_etag('incidents', last_modified, total, *extra, *user)
+    return etag, last_modified
@@ -10,6 +10,24 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
     
+    # SQLite tuning: a profile from sqlite_tuning.SQLITE_PROFILES plus per-PRAGMA overrides
+    # (e.g. {'mmap_size': 0}); ignored for other databases
+    SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE') or 'wal'
+    SQLITE_PRAGMAS = {}
+    
+    # Connection pool (see db_pool.py); not used for in-memory SQLite
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 5)  # Connections kept open per worker
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 10)  # Extra connections allowed under load
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT') or 30)  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE') or 1800)  # Seconds before a connection is replaced
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ['true', 'on', '1']  # Test connections on checkout
+    DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT') or 0)  # PostgreSQL milliseconds, 0 disables
+    DB_PGBOUNCER = os.environ.get('DB_PGBOUNCER', 'false').lower() in ['true', 'on', '1']  # Behind PgBouncer transaction pooling
+    
+    # Read replicas (see db_routing.py): comma-separated URLs, registered as binds replica_1, replica_2, ...
+    REPLICA_DATABASE_URLS = [url.strip() for url in os.environ.get('REPLICA_DATABASE_URLS', '').split(',') if url.strip()]
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS') or 5)  # Reads stay on the primary after a write
+    
     # Mail configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'smtp.gmail.com'
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
@@ -19,6 +37,12 @@ class Config:
     
     # Application settings
     INCIDENTS_PER_PAGE = int(os.environ.get('INCIDENTS_PER_PAGE') or 20)
+    SEARCH_COUNT_CACHE_TTL = int(os.environ.get('SEARCH_COUNT_CACHE_TTL') or 60)  # Seconds to reuse search totals
+    PARTS_CACHE_TTL = int(os.environ.get('PARTS_CACHE_TTL') or 300)  # Max seconds a worker reuses parts choices
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE') or 1024)  # Logged-in identities kept per worker
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL') or 60)  # Max seconds a worker reuses an identity
+    SLA_DUE_SOON_HOURS = float(os.environ.get('SLA_DUE_SOON_HOURS') or 4)  # Work queue look-ahead before a deadline
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() in ['true', 'on', '1']  # Serve /metrics
     MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH') or 16 * 1024 * 1024)  # 16MB
     
     # Admin settings
@@ -32,12 +56,15 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     """Production configuration."""
     DEBUG = False
+    DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT') or 30000)
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or f'sqlite:///{os.path.join(Config.BASE_DIR, "db", "ims.db")}'
 
 class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLITE_PROFILE = 'default'
+    REPLICA_DATABASE_URLS = []
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,372 @@
+"""
+Synthetic data generator for capacity testing the Incident Management System.
+
+Generates users, engineers, a parts catalog, incidents and incident_parts rows
+at production scale with realistic distributions:
+
+- severity is skewed towards low/medium, and critical incidents are rare
+- reports cluster on weekdays and day shifts
+- resolution times are log-normal with a median that depends on severity, so
+  old incidents are mostly resolved and recent ones mostly open
+- a few popular parts account for most of the usage (Zipf-like weights)
+
+Everything is drawn from a single random.Random(seed), so the same seed, sizes
+and end date always produce the same data. Rows are generated in batches and
+written with Core executemany (incidents via bulk_insert_incidents(), which
+also keeps the incident_stats rollup in step), committing after every batch.
+"""
+
+import math
+import random
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from werkzeug.security import generate_password_hash
+from extensions import db
+from models import User, Engineer, Part
+from incident_service import bulk_insert_incidents
+from parts_cache import bump_parts_version
+
+DEFAULT_SEED = 42
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_DAYS = 365
+
+SeedPlan = namedtuple('SeedPlan', 'incidents parts engineers users')
+
+SEVERITY_WEIGHTS = {'low': 40, 'medium': 35, 'high': 18, 'critical': 7}
+
+# Median hours to resolve, by severity (log-normal around the median)
+RESOLUTION_MEDIAN_HOURS = {'critical': 4, 'high': 16, 'medium': 48, 'low': 120}
+RESOLUTION_SIGMA = 0.9
+
+CATEGORY_WEIGHTS = {
+    'mechanical': 30, 'electrical': 22, 'software': 12, 'process': 10,
+    'quality': 9, 'safety': 7, 'environmental': 4, 'other': 6
+}
+
+CATEGORY_INCIDENT_TYPES = {
+    'mechanical': 'maintenance', 'electrical': 'maintenance', 'software': 'operational',
+    'process': 'operational', 'quality': 'quality', 'safety': 'safety',
+    'environmental': 'environmental', 'other': 'operational'
+}
+
+PRIORITY_BY_SEVERITY = {'low': 'low', 'medium': 'medium', 'high': 'high', 'critical': 'urgent'}
+
+SAFETY_IMPACT_BY_SEVERITY = {'low': 'none', 'medium': 'minor', 'high': 'major', 'critical': 'critical'}
+
+# Probability that an incident has 0, 1, 2, ... parts attached
+PARTS_PER_INCIDENT_WEIGHTS = [45, 27, 14, 8, 4, 2]
+
+EQUIPMENT_TYPES = [
+    'Conveyor Belt', 'Pump Station', 'Robot Arm', 'Hydraulic Press', 'CNC Mill', 'Compressor',
+    'Boiler', 'Packaging Line', 'Forklift', 'Cooling Tower', 'Welding Cell', 'Mixer',
+    'Injection Molder', 'Lathe', 'Generator', 'HVAC Unit', 'PLC Cabinet', 'Scanner Gate'
+]
+
+AREAS = ['Production Floor', 'Warehouse', 'Assembly Hall', 'Packaging Area', 'Utility Room',
+         'Loading Dock', 'Paint Shop', 'Quality Lab', 'Boiler House', 'Tool Room']
+
+PROBLEMS = {
+    'mechanical': ['bearing failure', 'belt misalignment', 'excessive vibration', 'seized motor', 'oil leak'],
+    'electrical': ['tripped breaker', 'blown fuse', 'sensor fault', 'power surge', 'wiring damage'],
+    'software': ['PLC program fault', 'HMI freeze', 'network timeout', 'firmware crash', 'data sync failure'],
+    'process': ['throughput drop', 'recipe deviation', 'batch contamination', 'cycle time overrun'],
+    'quality': ['out-of-tolerance parts', 'surface defects', 'calibration drift', 'label misprint'],
+    'safety': ['guard interlock bypassed', 'emergency stop failure', 'near miss', 'slip hazard'],
+    'environmental': ['coolant spill', 'emission alarm', 'dust extraction failure', 'noise complaint'],
+    'other': ['unexpected shutdown', 'unidentified noise', 'operator report', 'inspection finding'],
+}
+
+PART_CATEGORIES = {
+    'mechanical': ['Bearing', 'Drive Belt', 'Gearbox', 'Coupling', 'Seal Kit', 'Roller', 'Chain'],
+    'electrical': ['Fuse', 'Contactor', 'Relay', 'Proximity Sensor', 'Motor Starter', 'Cable Assembly'],
+    'hydraulic': ['Hydraulic Pump', 'Valve', 'Hose', 'Cylinder', 'Filter Element'],
+    'pneumatic': ['Solenoid Valve', 'Air Regulator', 'Actuator', 'Fitting Set'],
+    'electronic': ['PLC Module', 'Power Supply', 'HMI Panel', 'Encoder', 'I/O Card'],
+}
+
+SUPPLIERS = ['Acme Industrial', 'Globex Supply', 'Initech Parts', 'Northwind Components', 'Umbrella MRO']
+
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn',
+               'Maria', 'Wei', 'Aisha', 'Lars', 'Priya', 'Diego', 'Yuki', 'Omar', 'Elena', 'Kofi']
+LAST_NAMES = ['Smith', 'Garcia', 'Chen', 'Okafor', 'Nielsen', 'Patel', 'Kowalski', 'Silva', 'Kim',
+              'Novak', 'Haddad', 'Johansson', 'Mensah', 'Rossi', 'Tanaka', 'Murphy']
+DEPARTMENTS = ['Maintenance', 'Production', 'Quality', 'Facilities', 'Engineering']
+
+SPECIALIZATIONS = ['Mechanical', 'Electrical', 'Software', 'Hydraulics', 'Controls']
+CERTIFICATION_LEVELS = {'Junior': 40, 'Senior': 40, 'Lead': 15, 'Principal': 5}
+SHIFTS = {'Day': 60, 'Night': 25, 'Rotating': 15}
+
+# Relative report volume per hour of day (day shift heavy) and per weekday
+HOUR_WEIGHTS = [2, 1, 1, 1, 1, 2, 4, 8, 10, 10, 9, 8, 7, 8, 9, 9, 8, 6, 5, 4, 4, 3, 3, 2]
+WEEKDAY_WEIGHTS = [10, 10, 10, 10, 9, 4, 3]
+
+
+def plan_for_target(incidents):
+    """Scale parts, engineers and users to an incident count."""
+    def scaled(divisor, low, high):
+        return max(low, min(high, incidents // divisor))
+
+    return SeedPlan(
+        incidents=incidents,
+        parts=scaled(500, 50, 5000),
+        engineers=scaled(1000, 10, 2000),
+        users=scaled(200, 20, 20000),
+    )
+
+
+def parse_size(value):
+    """Parse a size such as 50000, 250k or 2m. Raises ValueError."""
+    value = str(value).strip().lower().replace('_', '')
+    multiplier = 1
+    if value[-1:] in ('k', 'm'):
+        multiplier = 1000 if value[-1] == 'k' else 1000000
+        value = value[:-1]
+    size = int(float(value) * multiplier)
+    if size < 0:
+        raise ValueError('Size must not be negative')
+    return size
+
+
+def _weighted(weights):
+    """Split a {value: weight} mapping into population and cumulative weights."""
+    population = list(weights)
+    cumulative, total = [], 0
+    for value in population:
+        total += weights[value]
+        cumulative.append(total)
+    return population, cumulative
+
+
+def _zipf_weights(count, exponent=1.1):
+    total, cumulative = 0.0, []
+    for rank in range(1, count + 1):
+        total += 1.0 / rank ** exponent
+        cumulative.append(total)
+    return cumulative
+
+
+class DataSeeder:
+    """
+    Generate and insert synthetic data for a SeedPlan.
+
+    Unique fields (usernames, emails, employee ids, part numbers) are numbered
+    after the rows already in the database, so seeding can be repeated.
+    """
+
+    def __init__(self, plan, seed=DEFAULT_SEED, days=DEFAULT_DAYS, batch_size=DEFAULT_BATCH_SIZE,
+                 password='password', now=None, progress=None):
+        if days < 1:
+            raise ValueError('Incidents must be spread over at least one day')
+        self.plan = plan
+        self.random = random.Random(seed)
+        self.days = days
+        self.batch_size = batch_size
+        self.password = password
+        self.now = now or datetime.utcnow().replace(microsecond=0)
+        self.progress = progress
+
+        self.severities = _weighted(SEVERITY_WEIGHTS)
+        self.categories = _weighted(CATEGORY_WEIGHTS)
+        self.hours = _weighted(dict(enumerate(HOUR_WEIGHTS)))
+        self.weekdays = WEEKDAY_WEIGHTS
+
+        self.equipment = [f'{kind} #{n}' for kind in EQUIPMENT_TYPES for n in range(1, 9)]
+        self.equipment_weights = _zipf_weights(len(self.equipment), 0.8)
+        self.locations = [f'{area} {letter}' for area in AREAS for letter in 'ABCD']
+        self.location_weights = _zipf_weights(len(self.locations), 0.6)
+
+        self.user_ids = []
+        self.engineer_ids = []
+        self.part_ids = []
+        self.part_weights = []
+
+    def _choice(self, weighted):
+        population, cumulative = weighted
+        return self.random.choices(population, cum_weights=cumulative)[0]
+
+    def _report(self, label, done, total, started):
+        if self.progress:
+            elapsed = time.perf_counter() - started
+            self.progress(label, done, total, done / elapsed if elapsed > 0 else 0.0)
+
+    def _insert_batches(self, label, table, total, make_row):
+        """Insert total generated rows into table in batches, committing each batch."""
+        started, done = time.perf_counter(), 0
+        while done < total:
+            rows = [make_row(done + i) for i in range(min(self.batch_size, total - done))]
+            db.session.execute(table.insert(), rows)
+            db.session.commit()
+            done += len(rows)
+            self._report(label, done, total, started)
+
+    # Users and engineers
+
+    def seed_users(self):
+        """Insert reporter and engineer user accounts; engineers get the first ids."""
+        offset = db.session.query(db.func.count(User.id)).scalar()
+        password_hash = generate_password_hash(self.password)  # Hashing per row would dominate
+
+        def make_row(i):
+            n = offset + i + 1
+            first, last = self.random.choice(FIRST_NAMES), self.random.choice(LAST_NAMES)
+            return {
+                'username': f'seed.user{n}', 'email': f'seed.user{n}@example.com',
+                'password_hash': password_hash, 'first_name': first, 'last_name': last,
+                'department': self.random.choice(DEPARTMENTS),
+                'role_level': None, 'role': 'manager' if self.random.random() < 0.05 else 'user',
+                'is_active': True, 'notifications_enabled': True,
+                'created_at': self.now - timedelta(days=self.random.randint(self.days, self.days * 3)),
+            }
+
+        total = max(self.plan.users, self.plan.engineers)
+        self._insert_batches('users', User.__table__, total, make_row)
+        self.user_ids = [user_id for user_id, in db.session.query(User.id).filter(
+            User.username.like('seed.user%')).order_by(User.id.desc()).limit(total)][::-1]
+
+    def seed_engineers(self):
+        """Insert engineer profiles for the first seeded users."""
+        offset = db.session.query(db.func.count(Engineer.id)).scalar()
+        levels, shifts = _weighted(CERTIFICATION_LEVELS), _weighted(SHIFTS)
+
+        def make_row(i):
+            return {
+                'user_id': self.user_ids[i], 'employee_id': f'SEED-E{offset + i + 1:06d}',
+                'specialization': self.random.choice(SPECIALIZATIONS),
+                'certification_level': self._choice(levels),
+                'years_experience': min(40, int(self.random.expovariate(1 / 8))),
+                'shift': self._choice(shifts), 'is_on_call': self.random.random() < 0.15,
+                'created_at': self.now - timedelta(days=self.random.randint(self.days, self.days * 3)),
+            }
+
+        self._insert_batches('engineers', Engineer.__table__, self.plan.engineers, make_row)
+        self.engineer_ids = [engineer_id for engineer_id, in db.session.query(Engineer.id).order_by(
+            Engineer.id.desc()).limit(self.plan.engineers)][::-1]
+
+    # Parts
+
+    def seed_parts(self):
+        """Insert the parts catalog with log-normal costs and stock levels."""
+        offset = db.session.query(db.func.count(Part.id)).scalar()
+        categories = list(PART_CATEGORIES)
+
+        def make_row(i):
+            category = categories[i % len(categories)]
+            name = self.random.choice(PART_CATEGORIES[category])
+            minimum = self.random.choice([0, 2, 5, 10, 20])
+            return {
+                'part_number': f'SEED-P{offset + i + 1:06d}', 'name': f'{name} {self.random.randint(10, 999)}',
+                'description': f'{name} for {self.random.choice(EQUIPMENT_TYPES).lower()} applications',
+                'category': category, 'subcategory': name.lower(),
+                'supplier': self.random.choice(SUPPLIERS), 'manufacturer': self.random.choice(SUPPLIERS),
+                'unit_cost': round(self.random.lognormvariate(math.log(60), 1.1), 2), 'currency': 'USD',
+                'minimum_stock': minimum, 'current_stock': max(0, int(self.random.gauss(minimum * 2, minimum + 3))),
+                'location': f'Store {self.random.choice("ABCDE")}-{self.random.randint(1, 40)}',
+                'status': 'active' if self.random.random() < 0.95 else 'discontinued',
+                'lead_time_days': self.random.choice([1, 3, 7, 14, 30, 60]),
+                'created_at': self.now, 'updated_at': self.now,
+            }
+
+        self._insert_batches('parts', Part.__table__, self.plan.parts, make_row)
+        self.part_ids = [part_id for part_id, in db.session.query(Part.id).order_by(
+            Part.id.desc()).limit(self.plan.parts)][::-1]
+        # Shuffle which parts are popular so popularity does not follow the id order
+        self.random.shuffle(self.part_ids)
+        self.part_weights = _zipf_weights(len(self.part_ids))
+        bump_parts_version()
+
+    # Incidents
+
+    def _reported_at(self):
+        """Pick a report time in the window, weighted by weekday and hour."""
+        while True:
+            day = self.now - timedelta(days=self.random.randrange(self.days))
+            if self.random.random() * 10 < self.weekdays[day.weekday()]:
+                break
+        hour = self._choice(self.hours)
+        return day.replace(hour=hour, minute=self.random.randrange(60), second=self.random.randrange(60))
+
+    def _incident(self):
+        severity = self._choice(self.severities)
+        category = self._choice(self.categories)
+        equipment = self.random.choices(self.equipment, cum_weights=self.equipment_weights)[0]
+        location = self.random.choices(self.locations, cum_weights=self.location_weights)[0]
+        problem = self.random.choice(PROBLEMS[category])
+        reported = min(self._reported_at(), self.now)
+
+        hours_to_resolve = self.random.lognormvariate(math.log(RESOLUTION_MEDIAN_HOURS[severity]), RESOLUTION_SIGMA)
+        resolved_at = reported + timedelta(hours=hours_to_resolve)
+        if resolved_at <= self.now:
+            status = 'closed' if self.random.random() < 0.3 else 'resolved'
+            downtime = int(hours_to_resolve * 60 * self.random.uniform(0.1, 0.8))
+        else:
+            status = 'in_progress' if self.random.random() < 0.5 else 'open'
+            resolved_at = None
+            downtime = 0
+
+        engineer_id = None
+        if self.engineer_ids and (status != 'open' or self.random.random() < 0.2):
+            engineer_id = self.random.choice(self.engineer_ids)
+
+        return {
+            'title': f'{equipment} {problem}',
+            'description': f'{problem.capitalize()} reported on {equipment} in {location}. '
+                           f'Operator observed the issue during the {"night" if reported.hour < 6 or reported.hour >= 22 else "day"} shift.',
+            'equipment': equipment, 'location': location, 'date_reported': reported,
+            'severity': severity, 'status': status, 'category': category,
+            'priority': PRIORITY_BY_SEVERITY[severity], 'incident_type': CATEGORY_INCIDENT_TYPES[category],
+            'created_at': reported, 'updated_at': resolved_at or reported, 'resolved_at': resolved_at,
+            'reporter_id': self.random.choice(self.user_ids), 'engineer_id': engineer_id,
+            'assigned_to_id': None,
+            'root_cause': f'{problem.capitalize()} due to wear' if resolved_at else None,
+            'corrective_action': 'Replaced affected components and tested' if resolved_at else None,
+            'preventive_action': None,
+            'downtime_minutes': downtime,
+            'cost_estimate': round(downtime * self.random.uniform(5, 40), 2) if downtime else None,
+            'safety_impact': SAFETY_IMPACT_BY_SEVERITY[severity] if category == 'safety' else 'none',
+        }
+
+    def _parts_for(self, incident):
+        if not self.part_ids:
+            return []
+        count = self.random.choices(range(len(PARTS_PER_INCIDENT_WEIGHTS)), weights=PARTS_PER_INCIDENT_WEIGHTS)[0]
+        chosen = set(self.random.choices(self.part_ids, cum_weights=self.part_weights, k=count))
+
+        if incident['resolved_at']:
+            statuses, when = ['installed'], incident['resolved_at']
+        else:
+            statuses, when = ['required', 'ordered', 'received'], incident['date_reported']
+        return [{
+            'part_id': part_id,
+            'quantity_used': 1 if self.random.random() < 0.7 else self.random.randint(2, 6),
+            'status': self.random.choice(statuses), 'notes': None,
+            'created_at': incident['date_reported'], 'updated_at': when,
+        } for part_id in sorted(chosen)]
+
+    def seed_incidents(self):
+        """Insert incidents with their parts, a batch per executemany."""
+        started, done, total = time.perf_counter(), 0, self.plan.incidents
+        while done < total:
+            rows, parts = [], []
+            for _ in range(min(self.batch_size, total - done)):
+                # Draw each incident's parts right after it so the batch size
+                # does not change the sequence of random draws
+                rows.append(self._incident())
+                parts.append(self._parts_for(rows[-1]))
+            bulk_insert_incidents(rows, parts)
+            db.session.commit()
+            done += len(rows)
+            self._report('incidents', done, total, started)
+
+    def run(self):
+        """Seed everything in the plan. Returns the elapsed seconds."""
+        started = time.perf_counter()
+        try:
+            self.seed_users()
+            self.seed_engineers()
+            self.seed_parts()
+            self.seed_incidents()
+        except Exception:
+            db.session.rollback()
+            raise
+        return time.perf_counter() - started
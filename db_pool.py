@@ -0,0 +1,169 @@
+"""
+Database connection pool configuration for the Incident Management System.
+
+apply_pool_config() turns the DB_POOL_* settings in config.py into engine
+options for the main database and every bind before Flask-SQLAlchemy creates
+the engines; init_pool() adds what has to be registered on the engines once
+they exist.
+
+Two modes:
+- Direct connections (default): a TimedQueuePool of DB_POOL_SIZE connections
+  plus DB_MAX_OVERFLOW extra under load, pre-pinged and recycled, with
+  PostgreSQL's statement_timeout set as a connection startup option.
+- PgBouncer in transaction mode (DB_PGBOUNCER): PgBouncer already pools server
+  connections and hands a different one to each transaction, so the app keeps
+  no pool of its own (NullPool), sends no startup options PgBouncer would
+  reject, and sets statement_timeout with SET LOCAL inside each transaction
+  instead of per session. psycopg2 does not use server-side prepared
+  statements, so nothing else depends on session state.
+
+The statement timeout only applies to web requests: migrations and the
+long-running CLI commands lift it with SET LOCAL statement_timeout = 0.
+
+In-memory SQLite databases keep Flask-SQLAlchemy's single shared connection.
+"""
+
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that reports how long each checkout waited for a connection.
+    checkout_observer(seconds, timed_out) is called after every checkout and
+    is carried over when the pool is recreated (e.g. by engine.dispose()).
+    """
+
+    checkout_observer = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self._observe(time.perf_counter() - started, True)
+            raise
+        self._observe(time.perf_counter() - started, False)
+        return connection
+
+    def _observe(self, seconds, timed_out):
+        if self.checkout_observer is not None:
+            self.checkout_observer(seconds, timed_out)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.checkout_observer = self.checkout_observer
+        return pool
+
+
+def _in_memory_sqlite(url):
+    return url.get_backend_name() == 'sqlite' and (
+        url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory'
+    )
+
+
+def pool_options(config, url):
+    """Engine options for one database URL from the DB_POOL_* settings in config."""
+    url = make_url(url)
+    if _in_memory_sqlite(url):
+        return {}
+
+    if config.get('DB_PGBOUNCER'):
+        return {'poolclass': NullPool}
+
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': config.get('DB_POOL_SIZE', 5),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', -1),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+    }
+    statement_timeout = config.get('DB_STATEMENT_TIMEOUT') or 0
+    if statement_timeout and url.get_backend_name() == 'postgresql':
+        options['connect_args'] = {'options': f'-c statement_timeout={int(statement_timeout)}'}
+    return options
+
+
+def _merge(defaults, explicit):
+    """Explicitly configured engine options win over the pool defaults."""
+    merged = {**defaults, **explicit}
+    if 'connect_args' in defaults and 'connect_args' in explicit:
+        merged['connect_args'] = {**defaults['connect_args'], **explicit['connect_args']}
+    return merged
+
+
+def apply_pool_config(app):
+    """Add pool options to SQLALCHEMY_ENGINE_OPTIONS and each SQLALCHEMY_BINDS entry. Call before db.init_app."""
+    config = app.config
+    uri = config.get('SQLALCHEMY_DATABASE_URI')
+    if uri:
+        config['SQLALCHEMY_ENGINE_OPTIONS'] = _merge(
+            pool_options(config, uri), config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+
+    # Binds do not inherit SQLALCHEMY_ENGINE_OPTIONS, so each gets its own copy
+    binds = {}
+    for key, bind in (config.get('SQLALCHEMY_BINDS') or {}).items():
+        bind = {'url': bind} if isinstance(bind, str) else dict(bind)
+        binds[key] = _merge(pool_options(config, bind['url']), bind)
+    if binds:
+        config['SQLALCHEMY_BINDS'] = binds
+
+
+def init_pool(app):
+    """Register per-transaction settings for PgBouncer mode. Call after db.init_app."""
+    from extensions import db
+
+    statement_timeout = app.config.get('DB_STATEMENT_TIMEOUT') or 0
+    if not (app.config.get('DB_PGBOUNCER') and statement_timeout):
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'postgresql':
+                set_local_statement_timeout(engine, statement_timeout)
+
+
+def set_local_statement_timeout(engine, milliseconds):
+    """Start every transaction on the engine with SET LOCAL statement_timeout."""
+
+    @event.listens_for(engine, 'begin')
+    def _set_statement_timeout(connection):
+        connection.exec_driver_sql(f'SET LOCAL statement_timeout = {int(milliseconds)}')
+
+    return _set_statement_timeout
+
+
+def _no_statement_timeout(connection):
+    connection.exec_driver_sql('SET LOCAL statement_timeout = 0')
+
+
+def disable_statement_timeout(engines):
+    """
+    Lift DB_STATEMENT_TIMEOUT for every later transaction on the PostgreSQL
+    engines. The timeout protects web requests; CLI batch jobs legitimately
+    run longer. SET LOCAL also overrides the startup option and keeps the
+    setting from leaking to other PgBouncer clients.
+    """
+    for engine in engines:
+        if engine.dialect.name == 'postgresql' and not event.contains(engine, 'begin', _no_statement_timeout):
+            event.listen(engine, 'begin', _no_statement_timeout)
+
+
+def pool_status(engine):
+    """
+    Current size, checked-out and overflow connections of the engine's pool,
+    or None for pools that do not keep connections (NullPool, StaticPool).
+    """
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return None
+    return {
+        'size': pool.size(),
+        'checked_out': pool.checkedout(),
+        'checked_in': pool.checkedin(),
+        # QueuePool.overflow() counts from -pool_size; only connections beyond the pool matter here
+        'overflow': max(pool.overflow(), 0),
+    }
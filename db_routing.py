@@ -0,0 +1,133 @@
+"""
+Read-replica routing for the Incident Management System.
+
+Replicas are listed in REPLICA_DATABASE_URLS and registered as the binds
+replica_1, replica_2, ... by add_replica_binds(). RoutingSession, the session
+class behind db.session, sends a plain SELECT to one of them only while reads
+are routed to replicas: inside a view decorated with @replica_reads_view or a
+`with replica_reads():` block. Everything else stays on the primary:
+
+- writes, flushes and SELECT ... FOR UPDATE,
+- any read in a session that has already written (it would not see its own
+  changes on a replica that has not caught up),
+- text() statements and raw connections, whose intent cannot be inspected,
+- a client's requests for REPLICA_STICKY_SECONDS after it wrote something, so
+  the redirect to incident_detail after creating an incident shows it.
+
+Without replicas configured every read goes to the primary as before.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from flask import current_app, session as client_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql import Select
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+# Client session key holding the time until which the client reads from the primary
+PRIMARY_UNTIL_KEY = '_db_primary_until'
+
+_route_to_replica = ContextVar('ims_route_to_replica', default=False)
+
+
+def add_replica_binds(app):
+    """Register REPLICA_DATABASE_URLS as replica_N binds. Call before db.init_app."""
+    urls = app.config.get('REPLICA_DATABASE_URLS') or []
+    if not urls:
+        return []
+
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    keys = []
+    for number, url in enumerate(urls, 1):
+        key = f'{REPLICA_BIND_PREFIX}{number}'
+        binds[key] = url
+        keys.append(key)
+    app.config['SQLALCHEMY_BINDS'] = binds
+    return keys
+
+
+def replica_keys(app):
+    """Bind keys of the configured replicas."""
+    return [key for key in (app.config.get('SQLALCHEMY_BINDS') or {})
+            if key and key.startswith(REPLICA_BIND_PREFIX)]
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that can send read-only SELECTs to a replica bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._reads_from_replica(clause):
+            replicas = self.info.get('replica_keys')
+            if replicas is None:
+                replicas = self.info['replica_keys'] = [
+                    key for key in self._db.engines if key and key.startswith(REPLICA_BIND_PREFIX)]
+            if replicas:
+                # One replica per session, so a request reads one consistent snapshot
+                key = self.info.setdefault('replica', random.choice(replicas))
+                return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_from_replica(self, clause):
+        if not _route_to_replica.get() or self.info.get('wrote'):
+            return False
+        if not isinstance(clause, Select) or clause._for_update_arg is not None:
+            return False
+        return not (self._flushing or self.new or self.dirty or self.deleted)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_flushed(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_bulk_write(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info['wrote'] = True
+
+
+@contextmanager
+def replica_reads():
+    """Route plain SELECTs in this block to a replica (if any and if nothing was written)."""
+    token = _route_to_replica.set(True)
+    try:
+        yield
+    finally:
+        _route_to_replica.reset(token)
+
+
+def reads_pinned_to_primary():
+    """True if the current client wrote within REPLICA_STICKY_SECONDS."""
+    return client_session.get(PRIMARY_UNTIL_KEY, 0) > time.time()
+
+
+def replica_reads_view(view):
+    """Decorate a read-only view so its queries go to a replica unless the client just wrote."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not replica_keys(current_app) or reads_pinned_to_primary():
+            return view(*args, **kwargs)
+        with replica_reads():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+def init_replica_routing(app):
+    """Pin a client's reads to the primary for a while after a request that wrote. Call after db.init_app."""
+    from extensions import db
+
+    if not replica_keys(app):
+        return None
+
+    @app.after_request
+    def _pin_writers_to_primary(response):
+        if db.session.registry.has() and db.session.info.get('wrote'):
+            client_session[PRIMARY_UNTIL_KEY] = time.time() + app.config.get('REPLICA_STICKY_SECONDS', 5)
+        return response
+
+    return replica_keys(app)
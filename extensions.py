@@ -1,12 +1,16 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
+from flask_migrate import Migrate
+from markupsafe import Markup, escape
 import os
 from config import config
+from db_routing import RoutingSession
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
+migrate = Migrate()
 
 def create_app(config_name=None):
     """Application factory pattern."""
@@ -18,23 +22,51 @@ def create_app(config_name=None):
     app.config.from_object(config[config_name])
     
     # Initialize extensions with app
+    # Replica binds and pool options have to be in place before db.init_app creates the engines
+    from db_pool import apply_pool_config, init_pool
+    from db_routing import add_replica_binds, init_replica_routing
+    add_replica_binds(app)
+    apply_pool_config(app)
     db.init_app(app)
+    init_pool(app)
+    init_replica_routing(app)
+    from sqlite_tuning import init_sqlite_profile
+    init_sqlite_profile(app)
+    migrate.init_app(app, db, directory=os.path.join(app.config['BASE_DIR'], 'migrations'))
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
     login_manager.login_message = 'Please log in to access this page.'
     login_manager.login_message_category = 'info'
     
-    # User loader function for Flask-Login
+    # User loader function for Flask-Login (cached lightweight identity)
     @login_manager.user_loader
     def load_user(user_id):
-        from models import User
-        return User.query.get(int(user_id))
+        from user_cache import load_cached_user
+        return load_cached_user(user_id)
+    
+    # Template filters
+    @app.template_filter('nl2br')
+    def nl2br(value):
+        """Escape text and convert newlines to <br> tags."""
+        return Markup('<br>\n').join(escape(value or '').split('\n'))
+    
+    # Register model event listeners (rollups, search index, caches)
+    import incident_stats  # noqa: F401
+    import incident_trends  # noqa: F401
+    import analytics  # noqa: F401
+    import incident_search  # noqa: F401
+    import parts_cache  # noqa: F401
+    import user_cache  # noqa: F401
     
     # Import and register blueprints
     from routes import main_bp, auth_bp
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp, url_prefix='/auth')
     
+    # Request, SQL and template timing at /metrics (only when METRICS_ENABLED)
+    from metrics import init_metrics
+    init_metrics(app)
+    
     # Register CLI commands
     from cli_commands import register_commands
     register_commands(app)
@@ -23,11 +23,11 @@ class MultiCheckboxField(SelectMultipleField):
 def get_parts_choices():
     """
     Get available parts as choices for form fields.
-    Returns a list of (part_id, part_name) tuples.
+    Returns a list of (part_id, part_name) tuples from the parts cache.
     """
     try:
-        from models import Part
-        return [(p.id, p.name) for p in Part.query.all()]
+        from parts_cache import cached_parts_choices
+        return cached_parts_choices()
     except:
         # Return empty list if database not available (e.g., during testing)
         return []
@@ -36,12 +36,12 @@ def get_parts_choices():
 def populate_parts_choices(form):
     """
     Populate parts choices for any form with parts fields.
-    Uses the direct syntax: form.parts.choices = [(p.id, p.name) for p in Part.query.all()]
+    Choices come from the per-process parts cache (see parts_cache.py).
     """
     try:
-        from models import Part
+        from parts_cache import cached_parts_choices
         
-        parts_choices = [(p.id, p.name) for p in Part.query.all()]
+        parts_choices = cached_parts_choices()
         
         # Set choices for any parts field that exists
         if hasattr(form, 'parts'):
@@ -73,20 +73,8 @@ def get_parts_by_category():
     Returns a list of (category, [(part_id, display_name), ...]) tuples.
     """
     try:
-        from models import Part
-        from sqlalchemy import func
-        
-        parts = Part.query.filter_by(status='active').order_by(Part.category, Part.name).all()
-        
-        # Group parts by category
-        categories = {}
-        for part in parts:
-            category = part.category or 'Other'
-            if category not in categories:
-                categories[category] = []
-            categories[category].append((str(part.id), f"{part.part_number} - {part.name}"))
-        
-        return [(category, choices) for category, choices in sorted(categories.items())]
+        from parts_cache import cached_parts_by_category
+        return cached_parts_by_category()
     except:
         return []
 
@@ -143,6 +131,7 @@ class IncidentForm(FlaskForm):
     parts = MultiCheckboxField(
         'Parts Required/Used (Checkboxes)',
         choices=[],  # Will be populated dynamically
+        coerce=int,  # Choices use integer part ids
         validators=[Optional()],
         description='Select parts that are required or used for this incident',
         render_kw={'class': 'form-check-input'}
@@ -152,6 +141,7 @@ class IncidentForm(FlaskForm):
     parts_dropdown = SelectMultipleField(
         'Parts Required/Used (Dropdown)',
         choices=[],  # Will be populated dynamically
+        coerce=int,  # Choices use integer part ids
         validators=[Optional()],
         description='Select multiple parts from the dropdown list',
         render_kw={
@@ -173,10 +163,10 @@ class IncidentForm(FlaskForm):
         self.populate_parts_choices()
     
     def populate_parts_choices(self):
-        """Populate parts choices from database using direct syntax."""
+        """Populate parts choices from the parts cache."""
         try:
-            from models import Part
-            parts_choices = [(p.id, p.name) for p in Part.query.all()]
+            from parts_cache import cached_parts_choices
+            parts_choices = cached_parts_choices()
             self.parts.choices = parts_choices
             self.parts_dropdown.choices = parts_choices
         except:
@@ -300,6 +290,7 @@ class EnhancedIncidentForm(FlaskForm):
     parts_checkbox = MultiCheckboxField(
         'Parts Required/Used (Checkboxes)',
         choices=[],  # Will be populated dynamically
+        coerce=int,  # Choices use integer part ids
         validators=[Optional()],
         description='Select multiple parts using checkboxes',
         render_kw={'class': 'form-check-input'}
@@ -308,6 +299,7 @@ class EnhancedIncidentForm(FlaskForm):
     parts_select = SelectMultipleField(
         'Parts Required/Used (Multi-Select)',
         choices=[],  # Will be populated dynamically
+        coerce=int,  # Choices use integer part ids
         validators=[Optional()],
         description='Select multiple parts using multi-select dropdown',
         render_kw={'class': 'form-select', 'multiple': True, 'size': 6}
@@ -324,11 +316,12 @@ class EnhancedIncidentForm(FlaskForm):
         self.populate_parts_choices()
     
     def populate_parts_choices(self):
-        """Populate parts choices from database using direct syntax."""
+        """Populate parts choices from the parts cache."""
         try:
-            from models import Part
-            self.parts_checkbox.choices = [(p.id, p.name) for p in Part.query.all()]
-            self.parts_select.choices = [(p.id, p.name) for p in Part.query.all()]
+            from parts_cache import cached_parts_choices
+            parts_choices = cached_parts_choices()
+            self.parts_checkbox.choices = parts_choices
+            self.parts_select.choices = parts_choices
         except:
             self.parts_checkbox.choices = []
             self.parts_select.choices = []
@@ -388,11 +381,10 @@ class IncidentPartsForm(FlaskForm):
         self.populate_parts_choices()
     
     def populate_parts_choices(self):
-        """Populate parts choices from database using direct syntax."""
+        """Populate parts choices from the parts cache."""
         try:
-            from models import Part
-            # Use the direct syntax for both fields
-            parts_choices = [(p.id, p.name) for p in Part.query.all()]
+            from parts_cache import cached_parts_choices
+            parts_choices = cached_parts_choices()
             self.required_parts.choices = parts_choices
             self.used_parts.choices = parts_choices
             
@@ -0,0 +1,132 @@
+"""
+Streaming incident export for the Incident Management System.
+
+Incidents are read with a streaming Core query (server-side cursor where the
+driver supports it, fetched yield_per rows at a time) and encoded row by row
+as CSV or NDJSON, so an export of millions of rows runs in constant memory
+and starts producing output immediately.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from sqlalchemy import select
+from extensions import db
+from models import Incident, User
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+EXPORT_COLUMNS = (
+    'id', 'title', 'description', 'equipment', 'location', 'date_reported',
+    'severity', 'status', 'category', 'priority', 'incident_type',
+    'created_at', 'updated_at', 'resolved_at', 'reporter_id', 'engineer_id',
+    'assigned_to_id', 'root_cause', 'corrective_action', 'preventive_action',
+    'downtime_minutes', 'cost_estimate', 'safety_impact'
+)
+
+# Rows fetched from the cursor per round trip
+DEFAULT_BATCH_SIZE = 1000
+
+# Encoded rows buffered before yielding a chunk of output
+CHUNK_ROWS = 200
+
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD string, returning None for empty values. Raises ValueError."""
+    if not value:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def build_export_query(status=None, severity=None, category=None, start=None, end=None):
+    """
+    Build the export SELECT with optional filters.
+    start/end are inclusive dates compared against date_reported.
+    """
+    columns = [getattr(Incident, name) for name in EXPORT_COLUMNS]
+    stmt = select(*columns, User.username.label('reporter_username')).outerjoin(
+        User, User.id == Incident.reporter_id
+    )
+
+    if status:
+        stmt = stmt.where(Incident.status == status)
+    if severity:
+        stmt = stmt.where(Incident.severity == severity)
+    if category:
+        stmt = stmt.where(Incident.category == category)
+    if start:
+        stmt = stmt.where(Incident.date_reported >= datetime.combine(start, datetime.min.time()))
+    if end:
+        stmt = stmt.where(Incident.date_reported < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+
+    return stmt.order_by(Incident.id)
+
+
+def iter_export_rows(batch_size=DEFAULT_BATCH_SIZE, **filters):
+    """Yield export rows as mappings, streaming them from the database."""
+    stmt = build_export_query(**filters).execution_options(stream_results=True, yield_per=batch_size)
+    result = db.session.execute(stmt)
+    try:
+        for row in result.mappings():
+            yield row
+    finally:
+        result.close()
+
+
+def export_fields():
+    """Column names written to every export, in order."""
+    return list(EXPORT_COLUMNS) + ['reporter_username']
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def iter_csv(rows):
+    """Encode rows as CSV text chunks, header first."""
+    fields = export_fields()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+
+    for i, row in enumerate(rows, 1):
+        writer.writerow([
+            value.isoformat() if isinstance(value, (datetime, date)) else value
+            for value in (row[field] for field in fields)
+        ])
+        if i % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def iter_ndjson(rows):
+    """Encode rows as newline-delimited JSON text chunks."""
+    fields = export_fields()
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({field: row[field] for field in fields}, default=_json_default))
+        if len(lines) >= CHUNK_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def iter_export(export_format, batch_size=DEFAULT_BATCH_SIZE, **filters):
+    """Stream an export in the given format ('csv' or 'ndjson') as text chunks."""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f'Unsupported export format: {export_format}')
+
+    rows = iter_export_rows(batch_size=batch_size, **filters)
+    if export_format == 'csv':
+        return iter_csv(rows)
+    return iter_ndjson(rows)
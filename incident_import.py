@@ -0,0 +1,350 @@
+"""
+Bulk incident import for the Incident Management System.
+
+Rows are streamed from CSV or JSON Lines input, validated with the same field
+rules as IncidentForm/EnhancedIncidentForm, resolved against in-memory lookup
+maps of users, engineers and parts (loaded once per import), and written with
+chunked Core executemany via bulk_insert_incidents(), committing every few
+batches. Memory use is bounded by the batch size, not the input size.
+"""
+
+import csv
+import json
+import time
+from datetime import datetime
+from wtforms import SelectField, StringField, TextAreaField
+from wtforms.fields.core import UnboundField
+from wtforms.validators import DataRequired, Length, Optional
+from extensions import db
+from models import User, Engineer, Part
+from forms import IncidentForm, EnhancedIncidentForm
+from incident_service import bulk_insert_incidents
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_COMMIT_EVERY = 10
+
+# Only the first errors are kept for the report; all of them are counted
+MAX_REPORTED_ERRORS = 50
+
+STATUSES = ('open', 'in_progress', 'resolved', 'closed')
+
+# Rows without a title have the shape of the simple IncidentForm; they get the
+# same generated title and classification as the report routes give them.
+SIMPLE_FORM_DEFAULTS = {'severity': 'medium', 'category': 'other'}
+
+TEXT_COLUMNS = ('root_cause', 'corrective_action', 'preventive_action', 'safety_impact')
+DATETIME_COLUMNS = ('date_reported', 'created_at', 'resolved_at')
+
+# Column order of every inserted row (executemany needs identical keys)
+INSERT_COLUMNS = (
+    'title', 'description', 'equipment', 'location', 'date_reported', 'severity',
+    'status', 'category', 'priority', 'incident_type', 'created_at', 'updated_at',
+    'resolved_at', 'reporter_id', 'engineer_id', 'assigned_to_id', 'root_cause',
+    'corrective_action', 'preventive_action', 'downtime_minutes', 'cost_estimate',
+    'safety_impact'
+)
+
+
+class RowError(ValueError):
+    """A row failed validation."""
+
+
+class FieldRule:
+    """The validation rules of one form field, applied to a plain string."""
+
+    def __init__(self, name, validators, choices=None, default=None):
+        self.name = name
+        self.validators = validators
+        self.choices = {value for value, _ in choices} if choices is not None else None
+        self.default = default
+
+    def check(self, value):
+        """Return the validated value, or raise RowError with the form's message."""
+        if not value and self.default is not None:
+            value = self.default
+
+        for validator in self.validators:
+            if isinstance(validator, Optional) and not value.strip():
+                return None
+            if isinstance(validator, DataRequired) and not value.strip():
+                raise RowError(validator.message or 'This field is required.')
+            if isinstance(validator, Length):
+                too_long = validator.max != -1 and len(value) > validator.max
+                if len(value) < validator.min or too_long:
+                    raise RowError(validator.message or
+                                   f'Field must be between {validator.min} and {validator.max} characters long.')
+
+        if self.choices is not None and value not in self.choices:
+            raise RowError(f'{self.name}: Not a valid choice.')
+        return value
+
+
+def form_rules(*form_classes):
+    """
+    Collect FieldRules for the text and select fields of the given form classes.
+    Later forms override earlier ones for fields they share.
+    """
+    rules = {}
+    for form_class in form_classes:
+        for name in dir(form_class):
+            field = getattr(form_class, name)
+            if not isinstance(field, UnboundField):
+                continue
+            if field.field_class not in (StringField, TextAreaField, SelectField):
+                continue
+            rules[name] = FieldRule(
+                name,
+                field.kwargs.get('validators', []),
+                choices=field.kwargs.get('choices') if field.field_class is SelectField else None,
+                default=field.kwargs.get('default')
+            )
+    return rules
+
+
+def read_rows(stream, import_format):
+    """Yield (line_number, row) pairs from CSV or JSON Lines text input."""
+    if import_format not in IMPORT_FORMATS:
+        raise ValueError(f'Unsupported import format: {import_format}')
+
+    if import_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, RowError(f'Invalid JSON: {e}')
+            continue
+        yield line_number, row if isinstance(row, dict) else RowError('Expected a JSON object')
+
+
+def _text(value):
+    if value is None:
+        return ''
+    return value if isinstance(value, str) else str(value)
+
+
+def _optional_text(value):
+    value = _text(value).strip()
+    return value or None
+
+
+def _parse_datetime(name, value):
+    value = _text(value).strip()
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise RowError(f'{name}: Not a valid ISO date or datetime.')
+
+
+def _parse_number(name, value, kind):
+    value = _text(value).strip()
+    if not value:
+        return None
+    try:
+        return kind(value)
+    except ValueError:
+        raise RowError(f'{name}: Not a valid number.')
+
+
+def _split_parts(value):
+    if value is None or value == '':
+        return []
+    if isinstance(value, list):
+        return [_text(item).strip() for item in value]
+    return [item.strip() for item in _text(value).split(';') if item.strip()]
+
+
+class ImportStats:
+    """Counters and timing for one import run."""
+
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.committed = 0
+        self.error_count = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add_error(self, line_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_number, message))
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed or (time.perf_counter() - self.started)
+        return self.imported / elapsed if elapsed > 0 else 0.0
+
+
+class IncidentImporter:
+    """
+    Validate and insert incident rows in batches.
+
+    Reporters are resolved from reporter_username, reporter (username or
+    email) or reporter_id, so an export can be imported into another database; parts from a list of part numbers or ids (a
+    semicolon-separated string in CSV). Lookup maps are loaded once up front.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, commit_every=DEFAULT_COMMIT_EVERY,
+                 default_reporter=None, dry_run=False, progress=None):
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.dry_run = dry_run
+        self.progress = progress
+        self.rules = form_rules(IncidentForm, EnhancedIncidentForm)
+
+        self.users = {}
+        for user_id, username, email in db.session.query(User.id, User.username, User.email):
+            self.users[username] = user_id
+            self.users[email] = user_id
+        self.user_ids = set(self.users.values())
+        self.engineer_ids = {engineer_id for engineer_id, in db.session.query(Engineer.id)}
+        self.parts = {}
+        for part_id, part_number in db.session.query(Part.id, Part.part_number):
+            self.parts[part_number] = part_id
+            self.parts[str(part_id)] = part_id
+
+        self.default_reporter_id = None
+        if default_reporter is not None:
+            self.default_reporter_id = self.users.get(default_reporter)
+            if self.default_reporter_id is None:
+                raise ValueError(f'Unknown default reporter: {default_reporter}')
+
+        self.stats = ImportStats()
+
+    def _resolve_user_id(self, name, value):
+        value = _text(value).strip()
+        if not value:
+            return None
+        if value.isdigit() and int(value) in self.user_ids:
+            return int(value)
+        if value in self.users:
+            return self.users[value]
+        raise RowError(f'{name}: Unknown user "{value}".')
+
+    def _resolve_reporter(self, row):
+        for name in ('reporter_username', 'reporter', 'reporter_id'):
+            reporter_id = self._resolve_user_id(name, row.get(name))
+            if reporter_id is not None:
+                return reporter_id
+        if self.default_reporter_id is None:
+            raise RowError('No reporter given and no default reporter set.')
+        return self.default_reporter_id
+
+    def _resolve_parts(self, value):
+        ids = []
+        for key in _split_parts(value):
+            if key not in self.parts:
+                raise RowError(f'parts: Unknown part "{key}".')
+            if self.parts[key] not in ids:
+                ids.append(self.parts[key])
+        return ids
+
+    def prepare(self, row):
+        """
+        Validate one input row and convert it into (insert_row, part_ids).
+        Raises RowError with the first problem found.
+        """
+        row = {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+        values = {}
+
+        title = _text(row.get('title'))
+        if not title.strip():
+            for name, default in SIMPLE_FORM_DEFAULTS.items():
+                if not _text(row.get(name)).strip():
+                    row[name] = default
+            title = f"Incident at {_text(row.get('location'))}"
+        row['title'] = title
+
+        for name, rule in self.rules.items():
+            values[name] = rule.check(_text(row.get(name)))
+
+        status = _text(row.get('status')).strip() or 'open'
+        if status not in STATUSES:
+            raise RowError('status: Not a valid choice.')
+        values['status'] = status
+
+        for name in DATETIME_COLUMNS:
+            values[name] = _parse_datetime(name, row.get(name))
+        now = datetime.utcnow()
+        values['date_reported'] = values['date_reported'] or values['created_at'] or now
+        values['created_at'] = values['created_at'] or values['date_reported']
+        values['updated_at'] = now
+
+        for name in TEXT_COLUMNS:
+            values[name] = _optional_text(row.get(name))
+        values['downtime_minutes'] = _parse_number('downtime_minutes', row.get('downtime_minutes'), int) or 0
+        values['cost_estimate'] = _parse_number('cost_estimate', row.get('cost_estimate'), float)
+
+        values['reporter_id'] = self._resolve_reporter(row)
+        values['assigned_to_id'] = self._resolve_user_id('assigned_to_id', row.get('assigned_to_id'))
+        engineer_id = _parse_number('engineer_id', row.get('engineer_id'), int)
+        if engineer_id is not None and engineer_id not in self.engineer_ids:
+            raise RowError(f'engineer_id: Unknown engineer "{engineer_id}".')
+        values['engineer_id'] = engineer_id
+
+        part_ids = self._resolve_parts(row.get('parts'))
+        return {name: values[name] for name in INSERT_COLUMNS}, part_ids
+
+    def run(self, rows):
+        """Import (line_number, row) pairs. Returns the ImportStats."""
+        batch, batch_parts, batches = [], [], 0
+
+        for line_number, row in rows:
+            self.stats.read += 1
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                values, part_ids = self.prepare(row)
+            except RowError as e:
+                self.stats.add_error(line_number, str(e))
+                continue
+
+            batch.append(values)
+            batch_parts.append(part_ids)
+            if len(batch) >= self.batch_size:
+                batches += 1
+                self._flush(batch, batch_parts, commit=batches % self.commit_every == 0)
+                batch, batch_parts = [], []
+
+        self._flush(batch, batch_parts, commit=True)
+        self.stats.finish()
+        return self.stats
+
+    def _flush(self, batch, batch_parts, commit):
+        if batch and not self.dry_run:
+            bulk_insert_incidents(batch, batch_parts)
+        self.stats.imported += len(batch)
+
+        if commit and not self.dry_run:
+            db.session.commit()
+            self.stats.committed = self.stats.imported
+        if batch and self.progress:
+            self.progress(self.stats)
+
+
+def import_incidents(stream, import_format, **options):
+    """
+    Import incidents from a CSV or JSON Lines text stream. Returns the ImportStats.
+    Batches committed before an unexpected error stay in the database.
+    """
+    importer = IncidentImporter(**options)
+    try:
+        return importer.run(read_rows(stream, import_format))
+    except Exception:
+        db.session.rollback()
+        raise
@@ -0,0 +1,109 @@
+"""
+Read-side query layer for incident pages.
+
+Every route that renders a list of incidents starts from these queries so the
+people shown next to each row (reporter, assignee, engineer) are loaded in the
+same round trip instead of one lazy load per row. The detail page gets a view
+model loaded in a fixed number of queries.
+"""
+
+from collections import namedtuple
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from extensions import db
+from models import Incident, Part, incident_parts
+
+# Many-to-one relationships the list templates read for each row
+LIST_EAGER_LOADS = (
+    joinedload(Incident.reporter),
+    joinedload(Incident.assigned_to),
+    joinedload(Incident.engineer),
+)
+
+
+def with_list_relationships(query):
+    """Add the list-view eager loads to an existing incident query."""
+    return query.options(*LIST_EAGER_LOADS)
+
+
+# Keyset order of the paginated incident lists, newest first. A NULL created_at
+# never compares past a cursor, so it falls back to the NOT NULL date_reported;
+# ix_incidents_listed_at_id indexes exactly this expression.
+LIST_ORDER = (func.coalesce(Incident.created_at, Incident.date_reported), Incident.id)
+
+
+def list_order_key(incident):
+    """LIST_ORDER values of an incident, for keyset cursors."""
+    return [incident.created_at or incident.date_reported, incident.id]
+
+
+def list_incidents_query():
+    """Base query for incident list pages with people eager-loaded."""
+    return with_list_relationships(Incident.query)
+
+
+def recent_incidents(limit=10, reporter_id=None):
+    """Most recently created incidents, optionally for a single reporter."""
+    query = list_incidents_query()
+    if reporter_id is not None:
+        query = query.filter(Incident.reporter_id == reporter_id)
+    return query.order_by(Incident.created_at.desc(), Incident.id.desc()).limit(limit).all()
+
+
+# Statuses whose incidents still count against their SLA
+ACTIVE_STATUSES = ('open', 'in_progress')
+
+# Longest work queue look-ahead accepted from a request, in hours
+MAX_DUE_WITHIN_HOURS = 24 * 365
+
+
+def sla_queue(due_before, limit=50):
+    """
+    Active incidents whose SLA deadline is before due_before, soonest first.
+    One range scan of ix_incidents_status_sla_due_at per active status.
+    """
+    return Incident.query.filter(
+        Incident.status.in_(ACTIVE_STATUSES),
+        Incident.sla_due_at < due_before
+    ).order_by(Incident.sla_due_at, Incident.id).limit(limit).all()
+
+
+# One part attached to an incident, with its incident_parts usage columns
+PartUsage = namedtuple('PartUsage', ['part', 'quantity_used', 'status', 'notes'])
+
+
+class IncidentDetail:
+    """
+    View model for the incident detail page.
+    Holds the incident (people already loaded) and its parts with usage details,
+    so the template never touches the lazy 'dynamic' parts relationship.
+    """
+
+    def __init__(self, incident, parts):
+        self.incident = incident
+        self.parts = parts
+
+    @property
+    def parts_count(self):
+        return len(self.parts)
+
+
+def load_incident_detail(incident_id):
+    """
+    Load everything the detail page shows in two queries: the incident with its
+    people, then its parts joined to the incident_parts usage columns.
+    Aborts with 404 if the incident does not exist.
+    """
+    incident = with_list_relationships(Incident.query).filter(Incident.id == incident_id).first_or_404()
+
+    rows = db.session.query(
+        Part,
+        incident_parts.c.quantity_used,
+        incident_parts.c.status,
+        incident_parts.c.notes
+    ).join(incident_parts, incident_parts.c.part_id == Part.id).filter(
+        incident_parts.c.incident_id == incident.id
+    ).order_by(Part.name, Part.id).all()
+
+    parts = [PartUsage(part, quantity_used, status, notes) for part, quantity_used, status, notes in rows]
+    return IncidentDetail(incident, parts)
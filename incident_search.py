@@ -0,0 +1,245 @@
+"""
+Full-text search over incidents for the Incident Management System.
+
+SQLite deployments use an FTS5 external-content table (incidents_fts) kept in
+sync by triggers on the incidents table. PostgreSQL deployments use a generated
+tsvector column (incidents.search_vector) with a GIN index. Both rank results
+and produce highlighted snippets in the database; other dialects fall back to
+a LIKE scan with highlighting done in Python.
+"""
+
+import re
+from collections import namedtuple
+from markupsafe import Markup, escape
+from sqlalchemy import event, false, func, literal, literal_column, or_, table, column
+from extensions import db
+from models import Incident
+from incident_queries import LIST_ORDER, list_order_key
+
+# Indexed columns, in FTS5 column order
+SEARCH_COLUMNS = ('title', 'description', 'equipment', 'location', 'root_cause', 'corrective_action')
+
+# bm25 weights per column: matches in the title and equipment count the most
+SEARCH_WEIGHTS = (10.0, 1.0, 5.0, 3.0, 2.0, 2.0)
+
+# Control characters used as highlight markers; replaced by <mark> after escaping
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_STOP = '\x03'
+
+SNIPPET_TOKENS = 24
+
+_columns_sql = ', '.join(SEARCH_COLUMNS)
+_new_sql = ', '.join(f'new.{c}' for c in SEARCH_COLUMNS)
+_old_sql = ', '.join(f'old.{c}' for c in SEARCH_COLUMNS)
+
+SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS incidents_fts USING fts5("
+    f"{_columns_sql}, content='incidents', content_rowid='id')",
+
+    f"CREATE TRIGGER IF NOT EXISTS incidents_fts_ai AFTER INSERT ON incidents BEGIN "
+    f"INSERT INTO incidents_fts(rowid, {_columns_sql}) VALUES (new.id, {_new_sql}); END",
+
+    f"CREATE TRIGGER IF NOT EXISTS incidents_fts_ad AFTER DELETE ON incidents BEGIN "
+    f"INSERT INTO incidents_fts(incidents_fts, rowid, {_columns_sql}) VALUES ('delete', old.id, {_old_sql}); END",
+
+    # Only re-index when a searchable column changes, not on every status update
+    f"CREATE TRIGGER IF NOT EXISTS incidents_fts_au AFTER UPDATE OF {_columns_sql} ON incidents BEGIN "
+    f"INSERT INTO incidents_fts(incidents_fts, rowid, {_columns_sql}) VALUES ('delete', old.id, {_old_sql}); "
+    f"INSERT INTO incidents_fts(rowid, {_columns_sql}) VALUES (new.id, {_new_sql}); END",
+]
+
+POSTGRESQL_DDL = [
+    "ALTER TABLE incidents ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(equipment, '') || ' ' || coalesce(location, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(root_cause, '') || ' ' || coalesce(corrective_action, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'D')"
+    ") STORED",
+
+    "CREATE INDEX IF NOT EXISTS ix_incidents_search_vector ON incidents USING GIN (search_vector)",
+]
+
+SQLITE_DROP_DDL = [
+    "DROP TRIGGER IF EXISTS incidents_fts_ai",
+    "DROP TRIGGER IF EXISTS incidents_fts_ad",
+    "DROP TRIGGER IF EXISTS incidents_fts_au",
+    "DROP TABLE IF EXISTS incidents_fts",
+]
+
+POSTGRESQL_DROP_DDL = [
+    "DROP INDEX IF EXISTS ix_incidents_search_vector",
+    "ALTER TABLE incidents DROP COLUMN IF EXISTS search_vector",
+]
+
+# Rows yielded by a search query: the incident plus its rank and highlighted text;
+# ranked is False when results come newest first instead of by relevance
+SearchQuery = namedtuple('SearchQuery', ['query', 'columns', 'key', 'ranked'])
+SearchHit = namedtuple('SearchHit', ['incident', 'title_html', 'snippet_html'])
+
+
+def search_supported(dialect_name):
+    """Check whether the database dialect has a native full-text index."""
+    return dialect_name in ('sqlite', 'postgresql')
+
+
+def create_search_index(connection):
+    """Create the full-text index objects if they do not exist yet."""
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        statements = SQLITE_DDL
+    elif dialect == 'postgresql':
+        statements = POSTGRESQL_DDL
+    else:
+        return False
+
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+    return True
+
+
+def rebuild_search_index(connection=None):
+    """
+    Create the full-text index if needed and repopulate it from the incidents table.
+    Returns False when the database has no native full-text support.
+    """
+    connection = connection if connection is not None else db.session.connection()
+    if not create_search_index(connection):
+        return False
+
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql("INSERT INTO incidents_fts(incidents_fts) VALUES ('rebuild')")
+    # PostgreSQL keeps the generated search_vector column populated by itself
+
+    return True
+
+
+def drop_search_index(connection):
+    """Drop the full-text index along with its triggers or generated column."""
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        statements = SQLITE_DROP_DDL
+    elif dialect == 'postgresql':
+        statements = POSTGRESQL_DROP_DDL
+    else:
+        return False
+
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+    return True
+
+
+@event.listens_for(Incident.__table__, 'after_create')
+def _incidents_created(target, connection, **kw):
+    create_search_index(connection)
+
+
+@event.listens_for(Incident.__table__, 'before_drop')
+def _incidents_dropping(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql('DROP TABLE IF EXISTS incidents_fts')
+
+
+def _search_terms(text):
+    """Split free text into plain word tokens, dropping query syntax characters."""
+    return re.findall(r'\w+', text)
+
+
+def highlight_markup(text):
+    """Escape text and turn the highlight markers into <mark> tags."""
+    if text is None:
+        return None
+    escaped = str(escape(text))
+    escaped = escaped.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>')
+    return Markup(escaped)
+
+
+def _sqlite_search(terms):
+    fts = table('incidents_fts', column('rowid'))
+    fts_ref = literal_column('incidents_fts')
+    match = ' '.join(f'"{term}"*' for term in terms)
+
+    score = -func.bm25(fts_ref, *SEARCH_WEIGHTS)
+    query = db.session.query(
+        Incident,
+        score.label('score'),
+        func.highlight(fts_ref, 0, HIGHLIGHT_START, HIGHLIGHT_STOP).label('title_html'),
+        func.snippet(fts_ref, 1, HIGHLIGHT_START, HIGHLIGHT_STOP, '…', SNIPPET_TOKENS).label('snippet_html')
+    ).join(fts, fts.c.rowid == Incident.id).filter(fts_ref.op('MATCH')(match))
+
+    return SearchQuery(query, [score, Incident.id], lambda row: [row.score, row.Incident.id], True)
+
+
+def _postgresql_search(terms):
+    tsquery = func.to_tsquery('english', ' & '.join(f'{term}:*' for term in terms))
+    search_vector = literal_column('incidents.search_vector')
+    options = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}'
+
+    score = func.ts_rank_cd(search_vector, tsquery)
+    query = db.session.query(
+        Incident,
+        score.label('score'),
+        func.ts_headline('english', Incident.title, tsquery, options + ', HighlightAll=true').label('title_html'),
+        func.ts_headline('english', Incident.description, tsquery,
+                         options + f', MaxWords={SNIPPET_TOKENS}, MinWords=8').label('snippet_html')
+    ).filter(search_vector.op('@@')(tsquery))
+
+    return SearchQuery(query, [score, Incident.id], lambda row: [row.score, row.Incident.id], True)
+
+
+def _fallback_search(terms):
+    conditions = []
+    for term in terms:
+        conditions.append(or_(*[getattr(Incident, name).contains(term) for name in SEARCH_COLUMNS]))
+
+    query = db.session.query(
+        Incident,
+        literal(0.0).label('score'),
+        Incident.title.label('title_html'),
+        Incident.description.label('snippet_html')
+    ).filter(*conditions)
+
+    return SearchQuery(query, LIST_ORDER, lambda row: list_order_key(row.Incident), False)
+
+
+def build_search_query(text):
+    """
+    Build a ranked full-text search for free text.
+    Returns a SearchQuery whose query yields (Incident, score, title_html, snippet_html)
+    rows and whose columns/key describe its descending keyset order.
+    """
+    terms = _search_terms(text)
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        search = _sqlite_search(terms)
+    elif dialect == 'postgresql':
+        search = _postgresql_search(terms)
+    else:
+        search = _fallback_search(terms)
+
+    if not terms:
+        search = search._replace(query=search.query.filter(false()))
+
+    return search
+
+
+def _highlight_terms(text, terms):
+    """Wrap case-insensitive occurrences of terms in highlight markers (fallback path)."""
+    if not text or not terms:
+        return text
+    pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    return pattern.sub(lambda m: f'{HIGHLIGHT_START}{m.group(0)}{HIGHLIGHT_STOP}', text)
+
+
+def to_search_hits(rows, text):
+    """Convert search query rows into SearchHit objects with safe highlighted markup."""
+    terms = _search_terms(text)
+    dialect = db.session.get_bind().dialect.name
+    hits = []
+    for row in rows:
+        title, snippet = row.title_html, row.snippet_html
+        if not search_supported(dialect):
+            title = _highlight_terms(title, terms)
+            snippet = _highlight_terms((snippet or '')[:200], terms)
+        hits.append(SearchHit(row.Incident, highlight_markup(title), highlight_markup(snippet)))
+    return hits
@@ -0,0 +1,133 @@
+"""
+Incident creation service for the Incident Management System.
+
+All incident-reporting routes go through create_incident() so selected parts
+are resolved with a single IN query and attached with a single executemany,
+instead of one Part lookup per selected part. Bulk loaders (imports, seeding)
+use bulk_insert_incidents(), the Core equivalent for many rows at once.
+"""
+
+from collections import Counter
+from datetime import datetime
+from extensions import db
+from models import Incident, Part, incident_parts, compute_sla_due_at
+from incident_stats import apply_stats_delta
+from incident_trends import apply_bulk_daily_deltas
+
+
+def selected_part_ids(*fields):
+    """
+    Get the part ids chosen in the first form field that has a selection.
+    Fields are passed in priority order, e.g. (form.parts_dropdown, form.parts).
+    """
+    for field in fields:
+        if field.data:
+            return field.data
+    return []
+
+
+def _normalize_part_ids(part_ids):
+    """Convert part ids to unique integers, keeping selection order."""
+    ids = []
+    for part_id in part_ids or []:
+        try:
+            part_id = int(part_id)
+        except (TypeError, ValueError):
+            continue
+        if part_id not in ids:
+            ids.append(part_id)
+    return ids
+
+
+def create_incident(part_ids=None, **fields):
+    """
+    Create an incident and attach the selected parts.
+
+    Unknown part ids are ignored. Returns (incident, parts) where parts is a list
+    of (part_id, part_name) tuples in selection order. The caller commits.
+    """
+    incident = Incident(**fields)
+    db.session.add(incident)
+    db.session.flush()  # Flush to get the incident.id for the association rows
+
+    ids = _normalize_part_ids(part_ids)
+    if not ids:
+        return incident, []
+
+    names = dict(db.session.query(Part.id, Part.name).filter(Part.id.in_(ids)).all())
+    parts = [(part_id, names[part_id]) for part_id in ids if part_id in names]
+
+    if parts:
+        db.session.execute(
+            incident_parts.insert(),
+            [{'incident_id': incident.id, 'part_id': part_id} for part_id, _ in parts]
+        )
+
+    return incident, parts
+
+
+def bulk_insert_incidents(rows, parts=None):
+    """
+    Insert many incidents with a single Core executemany.
+
+    rows are dicts of incident column values, all with the same keys. parts, if
+    given, is a parallel list with the parts of each incident: either part ids,
+    or dicts of incident_parts values (part_id, quantity_used, status, ...) with
+    the same keys throughout. Core inserts bypass the mapper events, so the
+    SLA deadline is filled in and the incident_stats and incident_daily_counts
+    rollups are updated here from aggregated deltas. Returns the number of
+    incidents inserted. The caller commits.
+    """
+    if not rows:
+        return 0
+
+    table = Incident.__table__
+    now = datetime.utcnow()
+    rows = [_with_sla_due_at(row, now) for row in rows]
+
+    if not (parts and any(parts)):
+        db.session.execute(table.insert(), rows)
+    else:
+        links = []
+        for incident_id, used in zip(_insert_returning_ids(rows), parts):
+            for part in used or []:
+                link = dict(part) if isinstance(part, dict) else {'part_id': part}
+                link['incident_id'] = incident_id
+                links.append(link)
+        db.session.execute(incident_parts.insert(), links)
+
+    connection = db.session.connection()
+    deltas = Counter((row.get('status'), row['severity']) for row in rows)
+    for (status, severity), count in deltas.items():
+        apply_stats_delta(connection, status, severity, count)
+    apply_bulk_daily_deltas(connection, rows)
+
+    return len(rows)
+
+
+def _with_sla_due_at(row, now):
+    """Copy of an incident row with date_reported and sla_due_at filled in, as the mapper events would."""
+    row = dict(row)
+    row['date_reported'] = row.get('date_reported') or now
+    if row.get('sla_due_at') is None:
+        row['sla_due_at'] = compute_sla_due_at(row['date_reported'], row.get('severity'))
+    return row
+
+
+def _insert_returning_ids(rows):
+    """Insert incident rows and return their new ids in input order."""
+    table = Incident.__table__
+    dialect = db.session.get_bind().dialect
+
+    if dialect.name == 'sqlite':
+        # SQLAlchemy can only guarantee RETURNING order on SQLite by inserting
+        # row by row. SQLite hands out rowids in ascending order within one
+        # statement under the write lock, so sorting the ids restores input order.
+        return sorted(db.session.execute(table.insert().returning(table.c.id), rows).scalars())
+
+    if getattr(dialect, 'insert_executemany_returning_sort_by_parameter_order', False):
+        stmt = table.insert().returning(table.c.id, sort_by_parameter_order=True)
+        return list(db.session.execute(stmt, rows).scalars())
+
+    # Drivers without ordered multi-row RETURNING: one statement per row
+    return [db.session.execute(table.insert(), row).inserted_primary_key[0] for row in rows]
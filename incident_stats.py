@@ -0,0 +1,167 @@
+"""
+Incrementally maintained incident statistics for the Incident Management System.
+
+The incident_stats table holds one row per (status, severity) pair with the
+number of incidents in that state. Mapper events on Incident adjust the
+matching rows inside the same flush that writes the incident, so the dashboard
+and /api/stats read a tiny table instead of issuing COUNT(*) queries.
+"""
+
+from sqlalchemy import event, func, update
+from extensions import db
+from models import Incident, IncidentStat
+
+# Status used when an incident is written without one (mirrors the column default)
+DEFAULT_STATUS = 'open'
+RESOLVED_STATUSES = ('resolved', 'closed')
+
+
+def _stat_key(status, severity):
+    """Normalize a (status, severity) pair into an incident_stats key."""
+    return (status or DEFAULT_STATUS, severity)
+
+
+def increment_counter(connection, table, key, delta):
+    """
+    Atomically add delta to the count column of the row of table with the given
+    key (a dict of primary key values), creating the row if it does not exist.
+    Uses INSERT ... ON CONFLICT DO UPDATE where the dialect supports it so
+    concurrent writers never race on creating a missing row.
+    """
+    if not delta:
+        return
+
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(**key, count=delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[name] for name in key],
+            set_={'count': table.c.count + delta}
+        )
+        connection.execute(stmt)
+        return
+
+    # Portable fallback: update in place, insert if the row does not exist yet
+    result = connection.execute(
+        update(table)
+        .where(*(table.c[name] == value for name, value in key.items()))
+        .values(count=table.c.count + delta)
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(**key, count=delta))
+
+
+def apply_stats_delta(connection, status, severity, delta):
+    """Atomically add delta to the counter row for (status, severity)."""
+    status, severity = _stat_key(status, severity)
+    increment_counter(connection, IncidentStat.__table__, {'status': status, 'severity': severity}, delta)
+
+
+@event.listens_for(Incident.status, 'set', active_history=True)
+@event.listens_for(Incident.severity, 'set', active_history=True)
+def _track_previous_value(target, value, oldvalue, initiator):
+    # active_history loads the old value even when the attribute was expired
+    # (e.g. after a commit), so after_update can decrement the right counter.
+    pass
+
+
+@event.listens_for(Incident, 'after_insert')
+def _incident_inserted(mapper, connection, target):
+    apply_stats_delta(connection, target.status, target.severity, 1)
+
+
+@event.listens_for(Incident, 'after_update')
+def _incident_updated(mapper, connection, target):
+    state = db.inspect(target)
+    status_history = state.attrs.status.history
+    severity_history = state.attrs.severity.history
+
+    if not (status_history.has_changes() or severity_history.has_changes()):
+        return
+
+    old_status = status_history.deleted[0] if status_history.deleted else target.status
+    old_severity = severity_history.deleted[0] if severity_history.deleted else target.severity
+
+    if _stat_key(old_status, old_severity) == _stat_key(target.status, target.severity):
+        return
+
+    apply_stats_delta(connection, old_status, old_severity, -1)
+    apply_stats_delta(connection, target.status, target.severity, 1)
+
+
+@event.listens_for(Incident, 'after_delete')
+def _incident_deleted(mapper, connection, target):
+    apply_stats_delta(connection, target.status, target.severity, -1)
+
+
+def get_incident_stats():
+    """
+    Get dashboard statistics from the incident_stats rollup.
+    Returns a dict with totals by status group and by severity.
+    """
+    stats = {
+        'total': 0,
+        'open': 0,
+        'in_progress': 0,
+        'resolved': 0,
+        'by_status': {},
+        'by_severity': {}
+    }
+
+    for row in IncidentStat.query.all():
+        stats['total'] += row.count
+        stats['by_status'][row.status] = stats['by_status'].get(row.status, 0) + row.count
+        stats['by_severity'][row.severity] = stats['by_severity'].get(row.severity, 0) + row.count
+
+    stats['open'] = stats['by_status'].get('open', 0)
+    stats['in_progress'] = stats['by_status'].get('in_progress', 0)
+    stats['resolved'] = sum(stats['by_status'].get(s, 0) for s in RESOLVED_STATUSES)
+
+    return stats
+
+
+def _count_incidents_by_key():
+    """Count incidents grouped by (status, severity) straight from the incidents table."""
+    rows = db.session.query(
+        func.coalesce(Incident.status, DEFAULT_STATUS),
+        Incident.severity,
+        func.count(Incident.id)
+    ).group_by(func.coalesce(Incident.status, DEFAULT_STATUS), Incident.severity).all()
+    return {(status, severity): count for status, severity, count in rows}
+
+
+def rebuild_incident_stats():
+    """
+    Recompute the incident_stats rollup from the incidents table.
+    Returns the number of counter rows written. The caller commits.
+    """
+    counts = _count_incidents_by_key()
+
+    IncidentStat.query.delete()
+    db.session.add_all(
+        IncidentStat(status=status, severity=severity, count=count)
+        for (status, severity), count in counts.items()
+    )
+    db.session.flush()
+
+    return len(counts)
+
+
+def verify_incident_stats():
+    """
+    Compare the incident_stats rollup with live counts from the incidents table.
+    Returns a list of (status, severity, stored, actual) tuples that disagree.
+    """
+    actual = _count_incidents_by_key()
+    stored = {(row.status, row.severity): row.count for row in IncidentStat.query.all()}
+
+    mismatches = []
+    for key in sorted(set(actual) | set(stored), key=lambda k: (k[0] or '', k[1] or '')):
+        if actual.get(key, 0) != stored.get(key, 0):
+            mismatches.append((key[0], key[1], stored.get(key, 0), actual.get(key, 0)))
+
+    return mismatches
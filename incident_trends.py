@@ -0,0 +1,159 @@
+"""
+Incident trend rollup for the Incident Management System.
+
+The incident_daily_counts table holds the number of incidents reported on each
+day per (status, severity, category, location). Like incident_stats, mapper
+events on Incident adjust the matching rows inside the flush that writes the
+incident, and bulk_insert_incidents applies aggregated deltas for Core
+inserts. Trend charts read one rollup row per day and series through
+daily_trend(), so a date range costs the same however many incidents it holds.
+`flask backfill-trends` rebuilds the table (or a date range of it) from the
+incidents table.
+"""
+
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import delete, event, func, insert, select
+from extensions import db
+from models import Incident, IncidentDailyCount
+from incident_stats import DEFAULT_STATUS, increment_counter
+from analytics import as_date, day_of
+
+TREND_DIMENSIONS = ('status', 'severity', 'category', 'location')
+
+# Days served when no range is given, and the longest range served at once
+DEFAULT_TREND_DAYS = 30
+MAX_TREND_DAYS = 366
+
+_KEY_ATTRS = ('date_reported',) + TREND_DIMENSIONS
+
+
+def daily_key(date_reported, status, severity, category, location):
+    """incident_daily_counts primary key of an incident with these values."""
+    return {'day': date_reported.date(), 'status': status or DEFAULT_STATUS, 'severity': severity,
+            'category': category, 'location': location}
+
+
+def apply_daily_delta(connection, key, delta):
+    """Atomically add delta to the incident_daily_counts row for key."""
+    increment_counter(connection, IncidentDailyCount.__table__, key, delta)
+
+
+def apply_bulk_daily_deltas(connection, rows):
+    """Count Core-inserted incident rows (dicts of column values) into the rollup."""
+    deltas = Counter(
+        tuple(daily_key(row['date_reported'], row.get('status'), row['severity'], row['category'],
+                        row['location']).items())
+        for row in rows
+    )
+    for key, count in deltas.items():
+        apply_daily_delta(connection, dict(key), count)
+
+
+def _incident_key(target):
+    return daily_key(*(getattr(target, attr) for attr in _KEY_ATTRS))
+
+
+@event.listens_for(Incident.date_reported, 'set', active_history=True)
+@event.listens_for(Incident.category, 'set', active_history=True)
+@event.listens_for(Incident.location, 'set', active_history=True)
+def _track_previous_value(target, value, oldvalue, initiator):
+    # As in incident_stats: load the old value so after_update can decrement its row
+    pass
+
+
+@event.listens_for(Incident, 'after_insert')
+def _incident_inserted(mapper, connection, target):
+    apply_daily_delta(connection, _incident_key(target), 1)
+
+
+@event.listens_for(Incident, 'after_update')
+def _incident_updated(mapper, connection, target):
+    state = db.inspect(target)
+    histories = {attr: state.attrs[attr].history for attr in _KEY_ATTRS}
+    if not any(history.has_changes() for history in histories.values()):
+        return
+
+    old_key = daily_key(*(
+        histories[attr].deleted[0] if histories[attr].deleted else getattr(target, attr)
+        for attr in _KEY_ATTRS
+    ))
+    new_key = _incident_key(target)
+    if old_key == new_key:
+        return
+
+    apply_daily_delta(connection, old_key, -1)
+    apply_daily_delta(connection, new_key, 1)
+
+
+@event.listens_for(Incident, 'after_delete')
+def _incident_deleted(mapper, connection, target):
+    apply_daily_delta(connection, _incident_key(target), -1)
+
+
+def backfill_daily_counts(start=None, end=None):
+    """
+    Recompute incident_daily_counts from the incidents table, for the days from
+    start to end (inclusive dates, either may be None for an open end).
+    Returns the number of rollup rows written. The caller commits.
+    """
+    incidents = Incident.__table__
+    day = day_of(incidents.c.date_reported, db.session.get_bind().dialect.name)
+    status = func.coalesce(incidents.c.status, DEFAULT_STATUS)
+    keys = [day, status, incidents.c.severity, incidents.c.category, incidents.c.location]
+
+    rollup = delete(IncidentDailyCount)
+    counts = select(*keys, func.count(incidents.c.id)).group_by(*keys)
+    if start:
+        rollup = rollup.where(IncidentDailyCount.day >= start)
+        counts = counts.where(incidents.c.date_reported >= datetime.combine(start, time()))
+    if end:
+        rollup = rollup.where(IncidentDailyCount.day <= end)
+        counts = counts.where(incidents.c.date_reported < datetime.combine(end + timedelta(days=1), time()))
+
+    db.session.execute(rollup)
+    return db.session.execute(insert(IncidentDailyCount).from_select(
+        ['day', 'status', 'severity', 'category', 'location', 'count'], counts)).rowcount
+
+
+def trend_range(start=None, end=None, today=None):
+    """
+    Resolve an optional (start, end) into the dates actually served: the last
+    DEFAULT_TREND_DAYS by default, at most MAX_TREND_DAYS ending at end.
+    """
+    end = end or (start + timedelta(days=DEFAULT_TREND_DAYS - 1) if start else today or date.today())
+    start = start or end - timedelta(days=DEFAULT_TREND_DAYS - 1)
+    if start > end:
+        start, end = end, start
+    return max(start, end - timedelta(days=MAX_TREND_DAYS - 1)), end
+
+
+def daily_trend(start, end, by=None, **filters):
+    """
+    Incidents per day from start to end (inclusive), as (days, series): days is
+    the list of dates and series maps each value of the `by` dimension (one of
+    TREND_DIMENSIONS; 'total' when by is None) to a count per day, zero-filled.
+    filters restrict any dimension to one value, e.g. severity='critical'. One query.
+    """
+    if by is not None and by not in TREND_DIMENSIONS:
+        raise ValueError(f"Unknown trend dimension '{by}'")
+
+    group = [getattr(IncidentDailyCount, by)] if by else []
+    query = (
+        select(IncidentDailyCount.day, *group, func.sum(IncidentDailyCount.count))
+        .where(IncidentDailyCount.day >= start, IncidentDailyCount.day <= end)
+        .where(*(getattr(IncidentDailyCount, name) == value for name, value in filters.items()
+                 if name in TREND_DIMENSIONS and value))
+        .group_by(IncidentDailyCount.day, *group)
+        .having(func.sum(IncidentDailyCount.count) != 0)
+    )
+
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    index = {day: position for position, day in enumerate(days)}
+    series = {}
+    for row in db.session.execute(query):
+        name = row[1] if by else 'total'
+        counts = series.setdefault(name, [0] * len(days))
+        counts[index[as_date(row[0])]] += int(row[-1])
+
+    return days, dict(sorted(series.items()))
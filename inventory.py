@@ -0,0 +1,129 @@
+"""
+Parts inventory for the Incident Management System.
+
+Stock changes go through move_stock(), which changes Part.current_stock with
+a single UPDATE ... SET current_stock = current_stock + :quantity and records
+the movement in the stock_movements ledger. Stock taken out carries the
+condition current_stock >= :needed in the same UPDATE, so concurrent workers
+cannot oversell a part or lose each other's updates: the database serializes
+the row update and re-checks the condition.
+
+install_part() moves an incident_parts row to 'installed' with a conditional
+UPDATE as well, so a part is taken from stock exactly once per incident even
+when the same install is submitted twice. Functions take an optional session
+(default db.session) and leave committing, or rolling back after an error, to
+the caller.
+"""
+
+from datetime import datetime
+from sqlalchemy import func, or_, select, update
+from extensions import db
+from models import Part, StockMovement, incident_parts
+
+INSTALLED = 'installed'
+
+
+class InsufficientStock(ValueError):
+    """A part does not have enough stock for a movement."""
+
+    def __init__(self, part_id, needed):
+        super().__init__(f'Part {part_id} has less than {needed} in stock')
+        self.part_id = part_id
+        self.needed = needed
+
+
+def _update_returning(session, stmt, column, key):
+    """
+    Run a conditional UPDATE and return column of the updated row, or None if
+    no row matched. key is the list of conditions that identify the row.
+    """
+    if session.get_bind().dialect.update_returning:
+        return session.execute(stmt.returning(column)).scalar_one_or_none()
+
+    # Without UPDATE ... RETURNING, read the row back inside the same transaction
+    if session.execute(stmt).rowcount == 0:
+        return None
+    return session.execute(select(column).where(*key)).scalar_one()
+
+
+def move_stock(part_id, quantity, reason, incident_id=None, note=None, session=None):
+    """
+    Add quantity (negative to take stock out) to a part's current_stock and
+    record the movement. Taking out more than is in stock raises
+    InsufficientStock and changes nothing. Returns the StockMovement.
+    """
+    session = session or db.session
+    parts = Part.__table__
+    key = [parts.c.id == part_id]
+    stmt = update(parts).where(*key).values(
+        current_stock=func.coalesce(parts.c.current_stock, 0) + quantity, updated_at=datetime.utcnow())
+    if quantity < 0:
+        stmt = stmt.where(parts.c.current_stock >= -quantity)
+
+    stock_after = _update_returning(session, stmt, parts.c.current_stock, key)
+    if stock_after is None:
+        raise InsufficientStock(part_id, -quantity)
+
+    # The UPDATE bypassed the ORM; reload current_stock if the part is in the session
+    part = session.identity_map.get(session.identity_key(Part, part_id))
+    if part is not None:
+        session.expire(part, ['current_stock', 'updated_at'])
+
+    movement = StockMovement(part_id=part_id, incident_id=incident_id, quantity=quantity,
+                             stock_after=stock_after, reason=reason, note=note)
+    session.add(movement)
+    session.flush()
+    return movement
+
+
+def restock_part(part_id, quantity, note=None, session=None):
+    """Add received stock to a part. Returns the StockMovement."""
+    if quantity <= 0:
+        raise ValueError('Restock quantity must be positive')
+    return move_stock(part_id, quantity, 'restock', note=note, session=session)
+
+
+def install_part(incident_id, part_id, session=None):
+    """
+    Mark a part of an incident as installed and take its quantity_used (1 when
+    unset) out of stock. Returns the StockMovement, or None if the part was
+    already installed. Raises LookupError if the part is not on the incident and
+    InsufficientStock if there is not enough stock; the caller then rolls back.
+    """
+    session = session or db.session
+    links = incident_parts.c
+    key = [links.incident_id == incident_id, links.part_id == part_id]
+    transition = update(incident_parts).where(
+        *key, or_(links.status.is_(None), links.status != INSTALLED)
+    ).values(status=INSTALLED, updated_at=datetime.utcnow())
+
+    quantity = _update_returning(session, transition, func.coalesce(links.quantity_used, 1), key)
+    if quantity is None:
+        if session.execute(select(links.status).where(*key)).first() is None:
+            raise LookupError(f'Part {part_id} is not used by incident {incident_id}')
+        return None
+
+    return move_stock(part_id, -quantity, 'install', incident_id=incident_id, session=session)
+
+
+def low_stock_query(limit=None):
+    """SELECT of (Part, margin) at or below minimum stock, lowest margin first, via ix_parts_stock_margin."""
+    margin = Part.current_stock - Part.minimum_stock
+    query = select(Part, margin.label('margin')).where(margin <= 0).order_by(margin, Part.id)
+    return query.limit(limit) if limit else query
+
+
+def low_stock_parts(limit=None, session=None):
+    """Parts at or below their minimum stock as (part, margin) rows, lowest margin first."""
+    return (session or db.session).execute(low_stock_query(limit)).all()
+
+
+def stock_history_query(part_id, limit=50):
+    """SELECT of a part's latest stock movements, newest first."""
+    return select(StockMovement).where(StockMovement.part_id == part_id).order_by(
+        StockMovement.created_at.desc(), StockMovement.id.desc()).limit(limit)
+
+
+def stock_history(part_id, limit=50, session=None):
+    """A part's latest stock movements, newest first."""
+    return (session or db.session).scalars(stock_history_query(part_id, limit)).all()
@@ -0,0 +1,278 @@
+"""
+Concurrent load-test harness for the Incident Management System.
+
+Starts the app on a local port (or targets a running instance), logs each
+virtual user in through /auth/login and replays a weighted mix of page reads
+and incident submissions from worker threads. Every request's latency is
+recorded per route, and the run is summarized as throughput plus
+p50/p95/p99 latency in a JSON-serializable report.
+
+Only the standard library is used on the client side, so the harness has no
+dependencies beyond the app itself.
+"""
+
+import http.cookiejar
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime
+
+# Relative weights of the actions each virtual user picks from
+DEFAULT_MIX = {'dashboard': 25, 'incidents': 25, 'search': 15, 'incident_detail': 25, 'report': 10}
+
+DEFAULT_SEARCH_TERMS = ('pump', 'conveyor', 'leak', 'motor', 'sensor', 'belt', 'fuse')
+
+PERCENTILES = (50, 95, 99)
+
+REQUEST_TIMEOUT = 30
+
+_INCIDENT_LINK = re.compile(r'/incident/(\d+)')
+_CSRF_TOKEN = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+
+def parse_mix(value):
+    """Parse a mix such as 'dashboard=30,report=10' into a {action: weight} dict. Raises ValueError."""
+    mix = {}
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        action, _, weight = item.partition('=')
+        action = action.strip()
+        if action not in DEFAULT_MIX:
+            raise ValueError(f'Unknown action: {action}')
+        mix[action] = int(weight) if weight else 1
+    if not any(mix.values()):
+        raise ValueError('The mix needs at least one action with a positive weight')
+    return mix
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-pct * len(sorted_values) // 100))  # ceil(pct * n / 100)
+    return sorted_values[int(rank) - 1]
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Time each request on its own; a redirect is a response, not a new request
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class LoadRecorder:
+    """Thread-safe collection of (route, latency, ok) samples and discovered incident ids."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+        self.incident_ids = []
+        self._known_ids = set()
+
+    def record(self, route, seconds, ok):
+        with self._lock:
+            self.samples.setdefault(route, []).append(seconds)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def discard(self, route):
+        with self._lock:
+            self.samples.pop(route, None)
+            self.errors.pop(route, None)
+
+    def add_incident_ids(self, ids):
+        with self._lock:
+            for incident_id in ids:
+                if incident_id not in self._known_ids:
+                    self._known_ids.add(incident_id)
+                    self.incident_ids.append(incident_id)
+
+    def random_incident_id(self, rng):
+        with self._lock:
+            return rng.choice(self.incident_ids) if self.incident_ids else None
+
+
+class VirtualUser:
+    """One logged-in client with its own cookie jar, driven by one thread."""
+
+    def __init__(self, base_url, recorder, mix, rng, search_terms=DEFAULT_SEARCH_TERMS):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.actions, self.weights = list(mix), list(mix.values())
+        self.rng = rng
+        self.search_terms = search_terms
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect()
+        )
+
+    def request(self, route, path, data=None):
+        """Issue one request and record its latency. Returns (status, body, location)."""
+        body = urllib.parse.urlencode(data).encode('utf-8') if data is not None else None
+        started = time.perf_counter()
+        try:
+            with self.opener.open(self.base_url + path, data=body, timeout=REQUEST_TIMEOUT) as response:
+                status, content, location = response.status, response.read(), None
+        except urllib.error.HTTPError as e:
+            status, content, location = e.code, e.read(), e.headers.get('Location')
+        except (urllib.error.URLError, OSError):
+            status, content, location = None, b'', None
+        elapsed = time.perf_counter() - started
+
+        ok = status is not None and status < 400
+        self.recorder.record(route, elapsed, ok)
+        return status, content.decode('utf-8', 'replace'), location
+
+    def login(self, username, password):
+        """Log in through the login form. Returns True on success."""
+        status, _, location = self.request('POST /auth/login', '/auth/login',
+                                           {'username': username, 'password': password})
+        return status == 302 and '/auth/login' not in (location or '')
+
+    def _discover(self, html):
+        self.recorder.add_incident_ids(int(match) for match in _INCIDENT_LINK.findall(html))
+
+    def dashboard(self):
+        self._discover(self.request('GET /dashboard', '/dashboard')[1])
+
+    def incidents(self):
+        self._discover(self.request('GET /incidents', '/incidents')[1])
+
+    def search(self):
+        term = self.rng.choice(self.search_terms)
+        self._discover(self.request('GET /search', f'/search?q={urllib.parse.quote(term)}')[1])
+
+    def incident_detail(self):
+        incident_id = self.recorder.random_incident_id(self.rng)
+        if incident_id is None:
+            return self.incidents()
+        self.request('GET /incident/<id>', f'/incident/{incident_id}')
+
+    def report(self):
+        _, html, _ = self.request('GET /report', '/report')
+        match = _CSRF_TOKEN.search(html)
+        equipment = f'Load Test Rig #{self.rng.randint(1, 50)}'
+        _, _, location = self.request('POST /report', '/report', {
+            'csrf_token': match.group(1) if match else '',
+            'equipment': equipment,
+            'location': f'Test Bay {self.rng.choice("ABCD")}',
+            'description': f'Synthetic load-test incident on {equipment}.',
+        })
+        if location:
+            self._discover(location)
+
+    def step(self):
+        """Perform one action picked from the mix."""
+        action = self.rng.choices(self.actions, weights=self.weights)[0]
+        getattr(self, action)()
+
+
+def run_load_test(base_url, users=10, duration=None, requests_per_user=None, mix=None,
+                  username='demo_user', password='password', seed=None,
+                  search_terms=DEFAULT_SEARCH_TERMS):
+    """
+    Replay the action mix from `users` concurrent threads against base_url.
+
+    Each user stops after `duration` seconds or `requests_per_user` actions,
+    whichever comes first (one of them is required). Returns the report dict.
+    """
+    if duration is None and requests_per_user is None:
+        raise ValueError('Either duration or requests_per_user is required')
+
+    mix = mix or DEFAULT_MIX
+    recorder = LoadRecorder()
+    login_failures = []
+    seeder = random.Random(seed)
+    virtual_users = [
+        VirtualUser(base_url, recorder, mix, random.Random(seeder.random()), search_terms)
+        for _ in range(users)
+    ]
+
+    start_barrier = threading.Barrier(users + 1)
+
+    def run_user(user):
+        logged_in = False
+        try:
+            logged_in = user.login(username, password)
+        finally:
+            start_barrier.wait()
+        if not logged_in:
+            login_failures.append(user)
+            return
+        deadline = time.perf_counter() + duration if duration is not None else None
+        done = 0
+        while (requests_per_user is None or done < requests_per_user) and \
+                (deadline is None or time.perf_counter() < deadline):
+            user.step()
+            done += 1
+
+    threads = [threading.Thread(target=run_user, args=(user,), daemon=True) for user in virtual_users]
+    for thread in threads:
+        thread.start()
+
+    # Measure the replay only, not the logins
+    start_barrier.wait()
+    recorder.discard('POST /auth/login')
+    started_at, started = datetime.utcnow(), time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return build_report(recorder, elapsed, started_at, {
+        'base_url': base_url, 'users': users, 'duration': duration,
+        'requests_per_user': requests_per_user, 'mix': mix, 'seed': seed,
+        'login_failures': len(login_failures),
+    })
+
+
+def build_report(recorder, elapsed, started_at, config):
+    """Summarize recorded samples into throughput and latency percentiles per route."""
+    routes = {}
+    total = errors = 0
+    for route in sorted(recorder.samples):
+        latencies = sorted(recorder.samples[route])
+        route_errors = recorder.errors.get(route, 0)
+        total += len(latencies)
+        errors += route_errors
+        routes[route] = {
+            'requests': len(latencies),
+            'errors': route_errors,
+            'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+            'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+            'max_ms': round(latencies[-1] * 1000, 2),
+            **{f'p{pct}_ms': round(percentile(latencies, pct) * 1000, 2) for pct in PERCENTILES},
+        }
+
+    return {
+        'started_at': started_at.isoformat(),
+        'elapsed_seconds': round(elapsed, 3),
+        'config': config,
+        'total_requests': total,
+        'total_errors': errors,
+        'throughput_rps': round(total / elapsed, 2) if elapsed else None,
+        'routes': routes,
+    }
+
+
+@contextmanager
+def serve_app(app, host='127.0.0.1', port=0):
+    """Serve the app from a background thread with a threaded server; yields the base URL."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server(host, port, app, threaded=True, request_handler=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://{host}:{server.server_port}'
+    finally:
+        server.shutdown()
+        thread.join()
@@ -0,0 +1,265 @@
+"""
+Request instrumentation for the Incident Management System.
+
+When METRICS_ENABLED is set, init_metrics() hooks request timing into the app,
+SQL timing into the SQLAlchemy engines (cursor execute events), template
+timing into Flask's render signals and checkout timing into the connection
+pools, and serves the collected metrics in Prometheus text format at
+/metrics. When it is not set, nothing is registered at all, so a disabled app
+pays no per-request or per-statement cost.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from db_pool import TimedQueuePool, pool_status
+from extensions import db
+
+# Seconds; the Prometheus client defaults
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Statements per request
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+# Seconds waited for a pooled connection; usually ~0, up to DB_POOL_TIMEOUT when saturated
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+METRICS_ENDPOINT = 'metrics'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """A labelled Prometheus histogram with cumulative buckets."""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+
+        for label_values in sorted(series):
+            values = series[label_values]
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                labels = _labels(self.label_names, label_values, [('le', _number(bound))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _labels(self.label_names, label_values, [('le', '+Inf')])
+            lines.append(f'{self.name}_bucket{labels} {values[-1]}')
+            labels = _labels(self.label_names, label_values)
+            lines.append(f'{self.name}_sum{labels} {_number(values[-2])}')
+            lines.append(f'{self.name}_count{labels} {values[-1]}')
+        return lines
+
+
+class Counter:
+    """A labelled Prometheus counter."""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = dict(self._values)
+        for label_values in sorted(values):
+            lines.append(f'{self.name}{_labels(self.label_names, label_values)} {_number(values[label_values])}')
+        return lines
+
+
+class Gauge:
+    """A labelled Prometheus gauge read from collect() at render time."""
+
+    def __init__(self, name, help_text, label_names, collect):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.collect = collect  # -> {label values: value}
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} gauge']
+        values = self.collect()
+        for label_values in sorted(values):
+            lines.append(f'{self.name}{_labels(self.label_names, label_values)} {_number(values[label_values])}')
+        return lines
+
+
+class MetricsRegistry:
+    """The metrics collected for one app."""
+
+    def __init__(self, engines=None):
+        self.engines = engines or {}  # bind name -> engine, for the pool gauges
+        self.requests = Counter(
+            'ims_http_requests_total', 'HTTP requests by endpoint, method and status.',
+            ('endpoint', 'method', 'status'))
+        self.request_duration = Histogram(
+            'ims_http_request_duration_seconds', 'Request latency by endpoint.',
+            ('endpoint', 'method'), LATENCY_BUCKETS)
+        self.sql_statements = Histogram(
+            'ims_sql_statements_per_request', 'SQL statements executed per request.',
+            ('endpoint',), SQL_COUNT_BUCKETS)
+        self.sql_duration = Histogram(
+            'ims_sql_duration_seconds_per_request', 'Time spent in SQL statements per request.',
+            ('endpoint',), LATENCY_BUCKETS)
+        self.template_duration = Histogram(
+            'ims_template_render_duration_seconds', 'Template render time by template.',
+            ('template',), LATENCY_BUCKETS)
+        self.pool_size = Gauge(
+            'ims_db_pool_size', 'Connections the pool keeps open.',
+            ('bind',), lambda: self._pool_values('size'))
+        self.pool_checked_out = Gauge(
+            'ims_db_pool_checked_out', 'Connections currently in use.',
+            ('bind',), lambda: self._pool_values('checked_out'))
+        self.pool_overflow = Gauge(
+            'ims_db_pool_overflow', 'Connections open beyond the pool size.',
+            ('bind',), lambda: self._pool_values('overflow'))
+        self.pool_wait = Histogram(
+            'ims_db_pool_wait_seconds', 'Time spent waiting to check out a connection.',
+            ('bind',), POOL_WAIT_BUCKETS)
+        self.pool_timeouts = Counter(
+            'ims_db_pool_timeouts_total', 'Checkouts that gave up after DB_POOL_TIMEOUT.',
+            ('bind',))
+
+    def _pool_values(self, key):
+        values = {}
+        for bind, engine in self.engines.items():
+            status = pool_status(engine)
+            if status is not None:
+                values[(bind,)] = status[key]
+        return values
+
+    def observe_checkout(self, bind):
+        """Get a TimedQueuePool checkout_observer recording into the pool metrics for bind."""
+        def observe(seconds, timed_out):
+            self.pool_wait.observe(seconds, bind)
+            if timed_out:
+                self.pool_timeouts.inc(bind)
+        return observe
+
+    def render(self):
+        lines = []
+        for metric in (self.requests, self.request_duration, self.sql_statements,
+                       self.sql_duration, self.template_duration, self.pool_size,
+                       self.pool_checked_out, self.pool_overflow, self.pool_wait, self.pool_timeouts):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def get_registry(app):
+    """The app's MetricsRegistry, or None when metrics are disabled."""
+    return app.extensions.get('ims_metrics')
+
+
+def init_metrics(app):
+    """Instrument the app if METRICS_ENABLED is set."""
+    if not app.config.get('METRICS_ENABLED'):
+        return None
+
+    with app.app_context():
+        engines = {bind or 'default': engine for bind, engine in db.engines.items()}
+    registry = app.extensions['ims_metrics'] = MetricsRegistry(engines)
+    for bind, engine in engines.items():
+        if isinstance(engine.pool, TimedQueuePool):
+            engine.pool.checkout_observer = registry.observe_checkout(bind)
+
+    @app.before_request
+    def _start_request_timer():
+        g._metrics = {'started': time.perf_counter(), 'sql_count': 0, 'sql_time': 0.0, 'templates': []}
+
+    @app.after_request
+    def _record_request(response):
+        _finish_request(registry, response.status_code)
+        return response
+
+    @app.teardown_request
+    def _record_failed_request(exc):
+        if exc is not None:
+            _finish_request(registry, 500)
+
+    def _before_render(sender, template, context, **extra):
+        if has_request_context() and '_metrics' in g:
+            g._metrics['templates'].append(time.perf_counter())
+
+    def _after_render(sender, template, context, **extra):
+        if has_request_context() and '_metrics' in g and g._metrics['templates']:
+            started = g._metrics['templates'].pop()
+            registry.template_duration.observe(time.perf_counter() - started, template.name or '<string>')
+
+    before_render_template.connect(_before_render, app, weak=False)
+    template_rendered.connect(_after_render, app, weak=False)
+
+    for engine in engines.values():
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    app.add_url_rule('/metrics', METRICS_ENDPOINT,
+                     lambda: Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8'))
+    return registry
+
+
+def _finish_request(registry, status):
+    metrics = g.pop('_metrics', None)
+    if metrics is None or request.endpoint == METRICS_ENDPOINT:
+        return
+
+    endpoint = request.endpoint or '<unmatched>'
+    registry.requests.inc(endpoint, request.method, str(status))
+    registry.request_duration.observe(time.perf_counter() - metrics['started'], endpoint, request.method)
+    registry.sql_statements.observe(metrics['sql_count'], endpoint)
+    registry.sql_duration.observe(metrics['sql_time'], endpoint)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is None or not has_request_context():
+        return
+    metrics = g.get('_metrics')
+    if metrics is not None:
+        metrics['sql_count'] += 1
+        metrics['sql_time'] += time.perf_counter() - context._metrics_started
@@ -0,0 +1,51 @@
+"""Add indexes for the hot incident, part usage and user queries
+
+Baseline revision: the tables themselves come from `flask init-db`
+(db.create_all), which already builds these indexes and stamps a new database
+at head; on an existing database init-db runs the migrations instead. This
+revision brings databases created before the indexes existed up to date,
+skipping any index that is already there.
+
+Revision ID: a1c4e7b20d3f
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c4e7b20d3f'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns), matching the db.Index declarations in models.py
+INDEXES = [
+    ('ix_incidents_created_at_id', 'incidents', ['created_at', 'id']),
+    ('ix_incidents_reporter_created_at', 'incidents', ['reporter_id', 'created_at', 'id']),
+    ('ix_incidents_status_severity', 'incidents', ['status', 'severity']),
+    ('ix_incidents_updated_at', 'incidents', ['updated_at']),
+    ('ix_incidents_date_reported', 'incidents', ['date_reported']),
+    ('ix_incident_parts_part_id', 'incident_parts', ['part_id', 'incident_id']),
+    ('ix_users_role', 'users', ['role']),
+]
+
+
+def _existing_indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,35 @@
+"""Add incident_analytics_stale_days for deleted and moved incidents
+
+Incident mapper events record the report day an incident left (deleted, or
+date_reported moved) here, so the next incremental `flask refresh-analytics`
+rebuilds that day too. Days that went stale before this revision are fixed
+by one `flask refresh-analytics --full`.
+
+Revision ID: a8c3f6e1d572
+Revises: f4b8d2a6c913
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8c3f6e1d572'
+down_revision = 'f4b8d2a6c913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'incident_analytics_stale_days' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'incident_analytics_stale_days',
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.PrimaryKeyConstraint('day'),
+        )
+
+
+def downgrade():
+    if 'incident_analytics_stale_days' in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_table('incident_analytics_stale_days')
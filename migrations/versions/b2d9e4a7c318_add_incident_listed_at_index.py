@@ -0,0 +1,29 @@
+"""Index the keyset order of the incident lists
+
+The /incidents and /search pages page on coalesce(created_at, date_reported),
+id so incidents without a created_at keep appearing after the first page. This
+adds the matching expression index. Alembic's inspector skips expression
+indexes, so it is created and dropped with IF [NOT] EXISTS.
+
+Revision ID: b2d9e4a7c318
+Revises: a8c3f6e1d572
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d9e4a7c318'
+down_revision = 'a8c3f6e1d572'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE INDEX IF NOT EXISTS ix_incidents_listed_at_id '
+               'ON incidents (coalesce(created_at, date_reported), id)')
+
+
+def downgrade():
+    op.execute('DROP INDEX IF EXISTS ix_incidents_listed_at_id')
@@ -0,0 +1,80 @@
+"""Store each incident's SLA deadline and index it with status
+
+Adds incidents.sla_due_at (date_reported + the severity's SLA hours from
+models.SLA_HOURS), fills it in for existing incidents and indexes
+(status, sla_due_at) for the overdue / due-soon work queue.
+
+Revision ID: b7d2f5a91c64
+Revises: a1c4e7b20d3f
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from datetime import timedelta
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2f5a91c64'
+down_revision = 'a1c4e7b20d3f'
+branch_labels = None
+depends_on = None
+
+
+# Copied from models.py as of this revision, so later SLA changes do not rewrite history
+SLA_HOURS = {'critical': 2, 'high': 8, 'medium': 24, 'low': 72}
+DEFAULT_SLA_HOURS = 24
+
+BACKFILL_BATCH_SIZE = 5000
+
+incidents = sa.table(
+    'incidents',
+    sa.column('id', sa.Integer),
+    sa.column('date_reported', sa.DateTime),
+    sa.column('severity', sa.String),
+    sa.column('sla_due_at', sa.DateTime),
+)
+
+
+def _columns(table):
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _indexes(table):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    if 'sla_due_at' not in _columns('incidents'):
+        op.add_column('incidents', sa.Column('sla_due_at', sa.DateTime(), nullable=True))
+
+    # Backfill in keyset batches so large tables are not loaded at once
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(incidents.c.id, incidents.c.date_reported, incidents.c.severity)
+            .where(incidents.c.id > last_id, incidents.c.sla_due_at.is_(None),
+                   incidents.c.date_reported.isnot(None))
+            .order_by(incidents.c.id).limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            incidents.update().where(incidents.c.id == sa.bindparam('row_id')).values(
+                sla_due_at=sa.bindparam('due_at')),
+            [{'row_id': row.id,
+              'due_at': row.date_reported + timedelta(hours=SLA_HOURS.get(row.severity, DEFAULT_SLA_HOURS))}
+             for row in rows]
+        )
+        last_id = rows[-1].id
+
+    if 'ix_incidents_status_sla_due_at' not in _indexes('incidents'):
+        op.create_index('ix_incidents_status_sla_due_at', 'incidents', ['status', 'sla_due_at'])
+
+
+def downgrade():
+    if 'ix_incidents_status_sla_due_at' in _indexes('incidents'):
+        op.drop_index('ix_incidents_status_sla_due_at', table_name='incidents')
+    if 'sla_due_at' in _columns('incidents'):
+        op.drop_column('incidents', 'sla_due_at')
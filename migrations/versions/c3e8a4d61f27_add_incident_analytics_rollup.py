@@ -0,0 +1,79 @@
+"""Add the daily MTTR / downtime / cost analytics rollup
+
+Creates incident_analytics_daily, incident_analytics_resolve_buckets and
+rollup_watermarks. The rollup starts empty; the first
+`flask refresh-analytics` builds it from the whole history.
+
+Revision ID: c3e8a4d61f27
+Revises: b7d2f5a91c64
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e8a4d61f27'
+down_revision = 'b7d2f5a91c64'
+branch_labels = None
+depends_on = None
+
+
+def _tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _rollup_key():
+    return [
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('equipment', sa.String(length=200), nullable=False),
+        sa.Column('location', sa.String(length=100), nullable=False),
+    ]
+
+
+def upgrade():
+    tables = _tables()
+
+    if 'incident_analytics_daily' not in tables:
+        op.create_table(
+            'incident_analytics_daily',
+            *_rollup_key(),
+            sa.Column('month', sa.String(length=7), nullable=False),
+            sa.Column('incidents', sa.Integer(), nullable=False),
+            sa.Column('resolved', sa.Integer(), nullable=False),
+            sa.Column('resolve_minutes', sa.Float(), nullable=False),
+            sa.Column('downtime_minutes', sa.Integer(), nullable=False),
+            sa.Column('cost', sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint('day', 'category', 'equipment', 'location'),
+        )
+        op.create_index('ix_incident_analytics_daily_month', 'incident_analytics_daily', ['month'])
+
+    if 'incident_analytics_resolve_buckets' not in tables:
+        op.create_table(
+            'incident_analytics_resolve_buckets',
+            *_rollup_key(),
+            sa.Column('bucket', sa.Integer(), nullable=False),
+            sa.Column('month', sa.String(length=7), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('day', 'category', 'equipment', 'location', 'bucket'),
+        )
+        op.create_index('ix_incident_analytics_resolve_buckets_month', 'incident_analytics_resolve_buckets',
+                        ['month'])
+
+    if 'rollup_watermarks' not in tables:
+        op.create_table(
+            'rollup_watermarks',
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.Column('changes_since', sa.DateTime(), nullable=False),
+            sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('name'),
+        )
+
+
+def downgrade():
+    tables = _tables()
+    for table in ('rollup_watermarks', 'incident_analytics_resolve_buckets', 'incident_analytics_daily'):
+        if table in tables:
+            op.drop_table(table)
@@ -0,0 +1,31 @@
+"""Create and fill the incident full-text search index
+
+The search index is created by an after_create hook on the incidents table, so
+databases created before it existed never got one and /search failed on them.
+This creates the FTS5 table and its triggers on SQLite (or the generated
+search_vector column and GIN index on PostgreSQL) and indexes the incidents
+already stored. Both steps are idempotent.
+
+Revision ID: c6a1f8d3e925
+Revises: b2d9e4a7c318
+Create Date: 2026-10-18 23:30:00.000000
+
+"""
+from alembic import op
+
+from incident_search import drop_search_index, rebuild_search_index
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6a1f8d3e925'
+down_revision = 'b2d9e4a7c318'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    rebuild_search_index(op.get_bind())
+
+
+def downgrade():
+    drop_search_index(op.get_bind())
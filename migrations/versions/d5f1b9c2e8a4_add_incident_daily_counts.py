@@ -0,0 +1,62 @@
+"""Add the incident_daily_counts trend rollup
+
+Creates incident_daily_counts and fills it from the incidents table with one
+INSERT ... SELECT ... GROUP BY; from then on the Incident mapper events keep
+it up to date. `flask backfill-trends` rebuilds it later if needed.
+
+Revision ID: d5f1b9c2e8a4
+Revises: c3e8a4d61f27
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5f1b9c2e8a4'
+down_revision = 'c3e8a4d61f27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    connection = op.get_bind()
+    if 'incident_daily_counts' in sa.inspect(connection).get_table_names():
+        return
+
+    daily_counts = op.create_table(
+        'incident_daily_counts',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('severity', sa.String(length=20), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('location', sa.String(length=100), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'status', 'severity', 'category', 'location'),
+    )
+
+    incidents = sa.table(
+        'incidents',
+        sa.column('id', sa.Integer),
+        sa.column('date_reported', sa.DateTime),
+        sa.column('status', sa.String),
+        sa.column('severity', sa.String),
+        sa.column('category', sa.String),
+        sa.column('location', sa.String),
+    )
+    if connection.dialect.name == 'sqlite':
+        day = sa.func.date(incidents.c.date_reported)
+    else:
+        day = sa.cast(incidents.c.date_reported, sa.Date)
+    keys = [day, sa.func.coalesce(incidents.c.status, 'open'), incidents.c.severity,
+            incidents.c.category, incidents.c.location]
+    op.execute(daily_counts.insert().from_select(
+        ['day', 'status', 'severity', 'category', 'location', 'count'],
+        sa.select(*keys, sa.func.count(incidents.c.id)).group_by(*keys)
+    ))
+
+
+def downgrade():
+    if 'incident_daily_counts' in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_table('incident_daily_counts')
@@ -0,0 +1,49 @@
+"""Add the stock_movements ledger and the low-stock margin index
+
+Creates stock_movements, where inventory.move_stock() records every change to
+parts.current_stock, and an expression index on current_stock - minimum_stock
+so the low-stock view is an index range scan. Alembic's inspector skips
+expression indexes, so that index is created and dropped with IF [NOT] EXISTS.
+
+Revision ID: e2a7c4f9b613
+Revises: d5f1b9c2e8a4
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a7c4f9b613'
+down_revision = 'd5f1b9c2e8a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'stock_movements' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'stock_movements',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('part_id', sa.Integer(), nullable=False),
+            sa.Column('incident_id', sa.Integer(), nullable=True),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.Column('stock_after', sa.Integer(), nullable=False),
+            sa.Column('reason', sa.String(length=20), nullable=False),
+            sa.Column('note', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['incident_id'], ['incidents.id']),
+            sa.ForeignKeyConstraint(['part_id'], ['parts.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_stock_movements_part_id_created_at', 'stock_movements', ['part_id', 'created_at'])
+        op.create_index('ix_stock_movements_incident_id', 'stock_movements', ['incident_id'])
+
+    op.execute('CREATE INDEX IF NOT EXISTS ix_parts_stock_margin ON parts ((current_stock - minimum_stock))')
+
+
+def downgrade():
+    op.execute('DROP INDEX IF EXISTS ix_parts_stock_margin')
+    if 'stock_movements' in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_table('stock_movements')
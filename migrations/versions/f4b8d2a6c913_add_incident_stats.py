@@ -0,0 +1,51 @@
+"""Add the incident_stats rollup
+
+Creates incident_stats and fills it from the incidents table with one
+INSERT ... SELECT ... GROUP BY, the same counts `flask rebuild-stats` writes;
+from then on the Incident mapper events keep it up to date. Databases that
+already have the table keep their rows.
+
+Revision ID: f4b8d2a6c913
+Revises: e2a7c4f9b613
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4b8d2a6c913'
+down_revision = 'e2a7c4f9b613'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'incident_stats' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    incident_stats = op.create_table(
+        'incident_stats',
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('severity', sa.String(length=20), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('status', 'severity'),
+    )
+
+    incidents = sa.table(
+        'incidents',
+        sa.column('id', sa.Integer),
+        sa.column('status', sa.String),
+        sa.column('severity', sa.String),
+    )
+    keys = [sa.func.coalesce(incidents.c.status, 'open'), incidents.c.severity]
+    op.execute(incident_stats.insert().from_select(
+        ['status', 'severity', 'count'],
+        sa.select(*keys, sa.func.count(incidents.c.id)).group_by(*keys)
+    ))
+
+
+def downgrade():
+    if 'incident_stats' in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_table('incident_stats')
@@ -1,9 +1,25 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, inspect
 from werkzeug.security import generate_password_hash, check_password_hash
 from extensions import db
 
+# SLA: hours from report to deadline by severity
+SLA_HOURS = {
+    'critical': 2,
+    'high': 8,
+    'medium': 24,
+    'low': 72
+}
+DEFAULT_SLA_HOURS = 24
+
+
+def compute_sla_due_at(date_reported, severity):
+    """SLA deadline for an incident reported at date_reported with the given severity."""
+    return date_reported + timedelta(hours=SLA_HOURS.get(severity, DEFAULT_SLA_HOURS))
+
+
 # Many-to-many association table for Incident-Parts relationship
 incident_parts = db.Table('incident_parts',
     db.Column('incident_id', db.Integer, db.ForeignKey('incidents.id'), primary_key=True),
@@ -12,7 +28,9 @@ incident_parts = db.Table('incident_parts',
     db.Column('status', db.String(20), default='required'),  # 'required', 'ordered', 'received', 'installed'
     db.Column('notes', db.Text),  # Additional notes about the part usage
     db.Column('created_at', db.DateTime, default=datetime.utcnow),
-    db.Column('updated_at', db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    db.Column('updated_at', db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow),
+    # The primary key covers lookups by incident; usage counts look up by part
+    db.Index('ix_incident_parts_part_id', 'part_id', 'incident_id')
 )
 
 class User(UserMixin, db.Model):
@@ -26,7 +44,7 @@ class User(UserMixin, db.Model):
     last_name = db.Column(db.String(50), nullable=False)
     department = db.Column(db.String(50), nullable=True)  # Engineering department
     role_level = db.Column(db.String(30), nullable=True)  # Engineer role level
-    role = db.Column(db.String(20), default='user')  # 'admin', 'manager', 'user'
+    role = db.Column(db.String(20), default='user', index=True)  # 'admin', 'manager', 'user'
     is_active = db.Column(db.Boolean, default=True)
     notifications_enabled = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -51,6 +69,20 @@ class Incident(db.Model):
     Includes engineer_id, date_reported, equipment, location, description, and status fields.
     """
     __tablename__ = 'incidents'
+    __table_args__ = (
+        # Newest-first lists and their keyset pagination
+        db.Index('ix_incidents_created_at_id', 'created_at', 'id'),
+        # A reporter's own incidents on the dashboard
+        db.Index('ix_incidents_reporter_created_at', 'reporter_id', 'created_at', 'id'),
+        # Status/severity counts, stats rebuilds and export filters
+        db.Index('ix_incidents_status_severity', 'status', 'severity'),
+        # Newest change for list ETags
+        db.Index('ix_incidents_updated_at', 'updated_at'),
+        # Export date ranges
+        db.Index('ix_incidents_date_reported', 'date_reported'),
+        # Overdue / due-soon work queue
+        db.Index('ix_incidents_status_sla_due_at', 'status', 'sla_due_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -71,6 +103,7 @@ class Incident(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     resolved_at = db.Column(db.DateTime)
+    sla_due_at = db.Column(db.DateTime)  # SLA deadline, kept in step with severity by the events below
     
     # Foreign keys and relationships to Engineer and User
     reporter_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -112,21 +145,33 @@ class Incident(db.Model):
             return int(duration.total_seconds() / 60)
     
     def is_overdue(self):
-        """Check if incident is overdue based on severity."""
+        """Check if incident is past its SLA deadline."""
         if self.status in ['resolved', 'closed']:
             return False
         
-        hours_since_reported = (datetime.utcnow() - self.date_reported).total_seconds() / 3600
-        
-        # Define SLA based on severity
-        sla_hours = {
-            'critical': 2,
-            'high': 8,
-            'medium': 24,
-            'low': 72
-        }
-        
-        return hours_since_reported > sla_hours.get(self.severity, 24)
+        due_at = self.sla_due_at or compute_sla_due_at(self.date_reported, self.severity)
+        return datetime.utcnow() > due_at
+
+
+# Keyset order of the paginated incident lists: created_at is nullable, so it falls back to date_reported
+db.Index('ix_incidents_listed_at_id', func.coalesce(Incident.created_at, Incident.date_reported), Incident.id)
+
+
+@event.listens_for(Incident, 'before_insert')
+def _set_sla_due_at(mapper, connection, target):
+    """Store the SLA deadline on create."""
+    if target.date_reported is None:
+        target.date_reported = datetime.utcnow()
+    target.sla_due_at = compute_sla_due_at(target.date_reported, target.severity)
+
+
+@event.listens_for(Incident, 'before_update')
+def _update_sla_due_at(mapper, connection, target):
+    """Move the SLA deadline when the severity (or report time) changes."""
+    attrs = inspect(target).attrs
+    if attrs.severity.history.has_changes() or attrs.date_reported.history.has_changes():
+        target.sla_due_at = compute_sla_due_at(target.date_reported, target.severity)
+
 
 class Engineer(db.Model):
     """
@@ -208,11 +253,11 @@ class Part(db.Model):
         return self.current_stock <= self.minimum_stock
     
     def total_usage_count(self):
-        """Get total number of times this part has been used in incidents."""
+        """Get total number of times this part has been used in incidents (see part_usage for many parts)."""
         return db.session.query(incident_parts).filter_by(part_id=self.id).count()
     
     def get_usage_in_incident(self, incident_id):
-        """Get part usage details for a specific incident."""
+        """Get part usage details for a specific incident (see part_usage.incident_part_usage for all parts)."""
         return db.session.query(incident_parts).filter_by(
             incident_id=incident_id, 
             part_id=self.id
@@ -220,8 +265,9 @@ class Part(db.Model):
     
     @classmethod
     def get_low_stock_parts(cls):
-        """Get all parts that are below minimum stock level."""
-        return cls.query.filter(cls.current_stock <= cls.minimum_stock).all()
+        """Get all parts that are below minimum stock level, lowest margin first."""
+        margin = cls.current_stock - cls.minimum_stock  # Matches ix_parts_stock_margin
+        return cls.query.filter(margin <= 0).order_by(margin, cls.id).all()
     
     @classmethod
     def search_by_equipment(cls, equipment_name):
@@ -230,3 +276,131 @@ class Part(db.Model):
             cls.compatibility.contains(equipment_name) |
             cls.description.contains(equipment_name)
         ).all()
+
+
+# Low-stock lookups search the stock margin instead of comparing two columns row by row
+db.Index('ix_parts_stock_margin', Part.current_stock - Part.minimum_stock)
+
+
+class StockMovement(db.Model):
+    """
+    Ledger of part stock changes. Every change to Part.current_stock made through
+    inventory.py is recorded here with the stock level it left behind.
+    """
+    __tablename__ = 'stock_movements'
+    __table_args__ = (
+        db.Index('ix_stock_movements_part_id_created_at', 'part_id', 'created_at'),
+        db.Index('ix_stock_movements_incident_id', 'incident_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    part_id = db.Column(db.Integer, db.ForeignKey('parts.id'), nullable=False)
+    incident_id = db.Column(db.Integer, db.ForeignKey('incidents.id'))  # Set for installs
+    quantity = db.Column(db.Integer, nullable=False)  # Signed: negative for stock taken out
+    stock_after = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(20), nullable=False)  # 'install', 'restock', 'adjustment'
+    note = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StockMovement part {self.part_id}: {self.quantity:+d} ({self.reason})>'
+
+
+class IncidentStat(db.Model):
+    """
+    Rollup of incident counts keyed by status and severity.
+    Kept up to date by the Incident mapper events in incident_stats.py so the
+    dashboard can read a handful of rows instead of counting the incidents table.
+    """
+    __tablename__ = 'incident_stats'
+    
+    status = db.Column(db.String(20), primary_key=True)
+    severity = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<IncidentStat {self.status}/{self.severity}: {self.count}>'
+
+
+class IncidentAnalyticsDay(db.Model):
+    """
+    Daily rollup of incident volume, time-to-resolve, downtime and cost, keyed
+    by report day, category, equipment and location. Refreshed incrementally by
+    analytics.refresh_analytics so /api/analytics aggregates a small table.
+    """
+    __tablename__ = 'incident_analytics_daily'
+    __table_args__ = (
+        db.Index('ix_incident_analytics_daily_month', 'month'),
+    )
+    
+    day = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    equipment = db.Column(db.String(200), primary_key=True)
+    location = db.Column(db.String(100), primary_key=True)
+    month = db.Column(db.String(7), nullable=False)  # 'YYYY-MM', for monthly breakdowns
+    incidents = db.Column(db.Integer, nullable=False, default=0)
+    resolved = db.Column(db.Integer, nullable=False, default=0)
+    resolve_minutes = db.Column(db.Float, nullable=False, default=0)  # Sum over the resolved incidents
+    downtime_minutes = db.Column(db.Integer, nullable=False, default=0)
+    cost = db.Column(db.Float, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<IncidentAnalyticsDay {self.day} {self.category}/{self.equipment}/{self.location}: {self.incidents}>'
+
+
+class IncidentResolveBucket(db.Model):
+    """
+    Histogram of time-to-resolve per incident_analytics_daily key, one row per
+    non-empty bucket of analytics.RESOLVE_BUCKETS, for MTTR percentiles.
+    """
+    __tablename__ = 'incident_analytics_resolve_buckets'
+    __table_args__ = (
+        db.Index('ix_incident_analytics_resolve_buckets_month', 'month'),
+    )
+    
+    day = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    equipment = db.Column(db.String(200), primary_key=True)
+    location = db.Column(db.String(100), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True)  # Index into analytics.RESOLVE_BUCKETS
+    month = db.Column(db.String(7), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class RollupWatermark(db.Model):
+    """Point up to which an incrementally refreshed rollup has seen incident changes."""
+    __tablename__ = 'rollup_watermarks'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    changes_since = db.Column(db.DateTime, nullable=False)  # Next refresh looks at updated_at >= this
+    refreshed_at = db.Column(db.DateTime, nullable=False)
+
+
+class IncidentAnalyticsStaleDay(db.Model):
+    """
+    Report day that lost an incident (deleted, or its date_reported moved away)
+    since the last analytics refresh. updated_at cannot point the refresh at
+    these days, so analytics.py records them for the next incremental refresh.
+    """
+    __tablename__ = 'incident_analytics_stale_days'
+    
+    day = db.Column(db.Date, primary_key=True)
+
+
+class IncidentDailyCount(db.Model):
+    """
+    Incidents reported per day, keyed by status, severity, category and location.
+    Kept up to date by the Incident mapper events in incident_trends.py so trend
+    charts read one row per day and series instead of scanning incidents.
+    """
+    __tablename__ = 'incident_daily_counts'
+    
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    severity = db.Column(db.String(20), primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    location = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<IncidentDailyCount {self.day} {self.status}/{self.severity}/{self.category}/{self.location}: {self.count}>'
@@ -0,0 +1,170 @@
+"""
+Keyset (cursor) pagination helpers for the Incident Management System.
+
+Instead of OFFSET/LIMIT, pages are fetched by filtering on the sort key of the
+last row seen, so every page costs the same no matter how deep it is. Cursors
+are opaque URL-safe tokens that encode the sort key and the paging direction.
+"""
+
+import base64
+import json
+import time
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and 'dt' in value:
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+
+def encode_cursor(values, direction='next'):
+    """Encode sort key values and a direction ('next' or 'prev') into an opaque token."""
+    payload = {'v': [_encode_value(v) for v in values], 'd': direction}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decode a token produced by encode_cursor.
+    Returns a (values, direction) tuple or raises InvalidCursor.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = [_decode_value(v) for v in payload['v']]
+        direction = payload.get('d', 'next')
+    except Exception as e:
+        raise InvalidCursor(f'Invalid pagination cursor: {e}')
+
+    if direction not in ('next', 'prev'):
+        raise InvalidCursor(f'Invalid pagination direction: {direction}')
+
+    return values, direction
+
+
+def _past_key(columns, values, direction):
+    """
+    Build the WHERE clause selecting rows after (direction='next') or before
+    (direction='prev') the given key, for a listing sorted descending on columns.
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        beyond = column < values[i] if direction == 'next' else column > values[i]
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
+
+
+class KeysetPage:
+    """
+    One page of keyset-paginated results.
+    Exposes items, has_next/has_prev and opaque next_cursor/prev_cursor tokens,
+    plus an optional total that may come from a rollup or a cached count.
+    """
+
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_paginate(query, columns, cursor=None, per_page=20, total=None, key=None):
+    """
+    Paginate query in descending order of columns using a keyset cursor.
+
+    columns must end with a unique column (e.g. the primary key) so the order is
+    total. key extracts the sort values from a result row and defaults to reading
+    each column's attribute from the row. An undecodable cursor starts from the
+    first page, mirroring paginate(error_out=False).
+    """
+    if key is None:
+        key = lambda row: [getattr(row, column.key) for column in columns]
+
+    values, direction = None, 'next'
+    if cursor:
+        try:
+            values, direction = decode_cursor(cursor)
+        except InvalidCursor:
+            values, direction = None, 'next'
+        if values is not None and len(values) != len(columns):
+            values, direction = None, 'next'
+
+    if values is not None:
+        query = query.filter(_past_key(columns, values, direction))
+
+    if direction == 'prev':
+        query = query.order_by(*[column.asc() for column in columns])
+    else:
+        query = query.order_by(*[column.desc() for column in columns])
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if direction == 'prev':
+        rows.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = values is not None, has_more
+
+    next_cursor = encode_cursor(key(rows[-1]), 'next') if rows and has_next else None
+    prev_cursor = encode_cursor(key(rows[0]), 'prev') if rows and has_prev else None
+
+    return KeysetPage(rows, per_page, next_cursor, prev_cursor, total)
+
+
+# Small per-process cache for expensive COUNT(*) totals
+_count_cache = {}
+_COUNT_CACHE_MAX_ENTRIES = 256
+
+
+def cached_count(cache_key, query, ttl=60):
+    """
+    Return query.count(), reusing a cached value for up to ttl seconds.
+    Used for page totals where an approximate, slightly stale number is fine.
+    """
+    now = time.monotonic()
+    cached = _count_cache.get(cache_key)
+    if cached and now - cached[1] < ttl:
+        return cached[0]
+
+    if len(_count_cache) >= _COUNT_CACHE_MAX_ENTRIES:
+        _count_cache.clear()
+
+    count = query.order_by(None).count()
+    _count_cache[cache_key] = (count, now)
+    return count
+
+
+def clear_count_cache():
+    """Drop all cached totals."""
+    _count_cache.clear()
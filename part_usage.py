@@ -0,0 +1,110 @@
+"""
+Set-based part usage statistics for the Incident Management System.
+
+Part.total_usage_count() and Part.get_usage_in_incident() run one query per
+part. The functions here answer the same questions for many parts at once with
+a single GROUP BY over incident_parts, which the ix_incident_parts_part_id
+index (part_id, incident_id) serves in part order.
+"""
+
+from collections import namedtuple
+from sqlalchemy import func, select
+from extensions import db
+from models import Part, incident_parts
+
+PartUsage = namedtuple('PartUsage', ['part_id', 'usage_count', 'quantity_used', 'last_used_at'])
+
+LEADERBOARD_ORDERS = ('usage', 'quantity', 'cost', 'recent')
+
+# Part ids per IN list, well below every backend's bound-parameter limit
+PART_ID_CHUNK_SIZE = 500
+
+
+def usage_query(since=None):
+    """SELECT of per-part usage totals from incident_parts, one row per used part."""
+    usage = select(
+        incident_parts.c.part_id,
+        func.count().label('usage_count'),
+        func.coalesce(func.sum(func.coalesce(incident_parts.c.quantity_used, 1)), 0).label('quantity_used'),
+        func.max(incident_parts.c.created_at).label('last_used_at'),
+    ).group_by(incident_parts.c.part_id)
+    if since is not None:
+        usage = usage.where(incident_parts.c.created_at >= since)
+    return usage
+
+
+def part_usage_stats(part_ids=None, since=None):
+    """
+    Usage of many parts at once: the number of incidents each part was used in,
+    the total quantity_used (a missing quantity counts as 1) and the last time
+    it was attached to an incident, optionally only counting usage since a
+    datetime. Returns {part_id: PartUsage}; unused parts get a zero PartUsage.
+    part_ids=None covers every used part. One query per PART_ID_CHUNK_SIZE ids.
+    """
+    stats = {}
+    if part_ids is None:
+        chunks = [None]
+    else:
+        part_ids = list(dict.fromkeys(part_ids))
+        chunks = [part_ids[i:i + PART_ID_CHUNK_SIZE] for i in range(0, len(part_ids), PART_ID_CHUNK_SIZE)]
+        stats = {part_id: PartUsage(part_id, 0, 0, None) for part_id in part_ids}
+
+    for chunk in chunks:
+        query = usage_query(since)
+        if chunk is not None:
+            query = query.where(incident_parts.c.part_id.in_(chunk))
+        for row in db.session.execute(query):
+            stats[row.part_id] = PartUsage(row.part_id, row.usage_count, int(row.quantity_used), row.last_used_at)
+    return stats
+
+
+def incident_part_usage(incident_id):
+    """All incident_parts rows of one incident in one query, as {part_id: row}."""
+    rows = db.session.execute(select(incident_parts).where(incident_parts.c.incident_id == incident_id))
+    return {row.part_id: row for row in rows}
+
+
+def part_usage_leaderboard(order='usage', limit=20, category=None, since=None):
+    """
+    Most used parts with their usage totals, in one query: parts joined to the
+    usage GROUP BY, ordered by usage count, total quantity, cost (quantity x
+    unit cost) or last use. Returns a list of dicts, best first.
+    """
+    if order not in LEADERBOARD_ORDERS:
+        raise ValueError(f"Unknown leaderboard order '{order}'")
+
+    usage = usage_query(since).subquery()
+    cost = (usage.c.quantity_used * func.coalesce(Part.unit_cost, 0)).label('cost')
+    sort = {
+        'usage': usage.c.usage_count,
+        'quantity': usage.c.quantity_used,
+        'cost': cost,
+        'recent': usage.c.last_used_at,
+    }[order]
+
+    query = (
+        select(Part.id, Part.part_number, Part.name, Part.category, Part.unit_cost, Part.current_stock,
+               usage.c.usage_count, usage.c.quantity_used, usage.c.last_used_at, cost)
+        .join(usage, usage.c.part_id == Part.id)
+        .order_by(sort.desc(), Part.id)
+        .limit(limit)
+    )
+    if category:
+        query = query.where(Part.category == category)
+
+    return [
+        {
+            'rank': rank,
+            'part_id': row.id,
+            'part_number': row.part_number,
+            'name': row.name,
+            'category': row.category,
+            'usage_count': row.usage_count,
+            'quantity_used': int(row.quantity_used),
+            'last_used_at': row.last_used_at,
+            'unit_cost': row.unit_cost,
+            'cost': round(float(row.cost), 2),
+            'current_stock': row.current_stock,
+        }
+        for rank, row in enumerate(db.session.execute(query), 1)
+    ]
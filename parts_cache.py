@@ -0,0 +1,106 @@
+"""
+Per-process cache of parts choices for the Incident Management System.
+
+Every reporting form needs the parts catalog as (id, name) choices. This module
+keeps those lists in memory and tags them with a version stamp. Part inserts,
+updates and deletes bump the stamp once their transaction commits, so the next
+form built afterwards reloads the catalog. A TTL (PARTS_CACHE_TTL) bounds how
+long other worker processes can serve a stale list.
+"""
+
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from extensions import db
+from models import Part
+
+DEFAULT_TTL = 300
+
+_lock = threading.Lock()
+_version = 0
+_cache = {}  # name -> (engine, version, loaded_at, value)
+
+
+def parts_cache_version():
+    """Get the current parts catalog version stamp."""
+    return _version
+
+
+def bump_parts_version():
+    """Invalidate every cached parts list. Call after bulk writes that bypass the ORM."""
+    global _version
+    with _lock:
+        _version += 1
+
+
+def _mark_parts_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['parts_changed'] = True
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Part, _event_name, _mark_parts_changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_after_commit(session):
+    if session.info.pop('parts_changed', False):
+        bump_parts_version()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_after_rollback(session):
+    session.info.pop('parts_changed', None)
+
+
+def _get_cached(name, loader):
+    """Return the cached value for name, reloading it if the version or TTL expired."""
+    now = time.monotonic()
+    engine = db.engine
+    cached = _cache.get(name)
+    if cached and cached[0] is engine and cached[1] == _version and now - cached[2] < current_app.config.get('PARTS_CACHE_TTL', DEFAULT_TTL):
+        return cached[3]
+
+    version = _version
+    value = loader()
+    with _lock:
+        # Only store if no write committed while we were loading
+        if version == _version:
+            _cache[name] = (engine, version, now, value)
+    return value
+
+
+def _load_parts_choices():
+    return [(part_id, name) for part_id, name in db.session.query(Part.id, Part.name).order_by(Part.id)]
+
+
+def _load_parts_by_category():
+    rows = db.session.query(Part.id, Part.part_number, Part.name, Part.category).filter(
+        Part.status == 'active'
+    ).order_by(Part.category, Part.name).all()
+
+    # Group parts by category
+    categories = {}
+    for part_id, part_number, name, category in rows:
+        categories.setdefault(category or 'Other', []).append((str(part_id), f"{part_number} - {name}"))
+
+    return [(category, choices) for category, choices in sorted(categories.items())]
+
+
+def cached_parts_choices():
+    """Get all parts as (part_id, part_name) choices, from cache when possible."""
+    return list(_get_cached('choices', _load_parts_choices))
+
+
+def cached_parts_by_category():
+    """Get active parts grouped as (category, [(part_id, display_name), ...]), from cache when possible."""
+    return list(_get_cached('by_category', _load_parts_by_category))
+
+
+def clear_parts_cache():
+    """Drop all cached parts lists."""
+    with _lock:
+        _cache.clear()
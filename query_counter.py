@@ -0,0 +1,90 @@
+"""
+SQL statement counting for the Incident Management System.
+
+Counts the statements the database engine executes inside a block so tests
+can prove a page costs a fixed number of round trips regardless of how many
+rows it shows, and spots the classic N+1 pattern: the same SELECT issued
+over and over with different parameters, typically a lazy load per row.
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager
+from sqlalchemy import event
+from extensions import db
+
+# Identical SELECTs run this many times with different parameters look like N+1
+N_PLUS_ONE_THRESHOLD = 3
+
+
+class QueryCounter:
+    """
+    Context manager that records every SQL statement executed on an engine.
+
+    Usage:
+        with QueryCounter() as counter:
+            client.get('/incidents')
+        assert counter.count <= 5
+        assert not counter.suspected_n_plus_one()
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.statements = []
+        self.parameters = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        # Bulk writes legitimately repeat a statement; only single executions can be N+1
+        self.parameters.append(None if executemany else repr(parameters))
+
+    def __enter__(self):
+        if self.engine is None:
+            self.engine = db.engine
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        event.remove(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return False
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def suspected_n_plus_one(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """
+        Get SELECT statements that ran at least threshold times with different
+        parameters, as a list of (statement, times) pairs, most repeated first.
+        """
+        parameters_by_statement = defaultdict(list)
+        for statement, parameters in zip(self.statements, self.parameters):
+            if parameters is not None and statement.lstrip().upper().startswith('SELECT'):
+                parameters_by_statement[statement].append(parameters)
+
+        suspects = [
+            (statement, len(runs)) for statement, runs in parameters_by_statement.items()
+            if len(runs) >= threshold and len(set(runs)) > 1
+        ]
+        return sorted(suspects, key=lambda suspect: -suspect[1])
+
+    def report(self):
+        """The executed statements, numbered, for assertion messages."""
+        return '\n'.join(f'  {i}. {sql}' for i, sql in enumerate(self.statements, 1))
+
+
+@contextmanager
+def assert_max_queries(max_count, engine=None, allow_n_plus_one=False):
+    """
+    Fail with the executed statements if the block runs more than max_count
+    queries, or repeats a SELECT per row (unless allow_n_plus_one is set).
+    """
+    with QueryCounter(engine) as counter:
+        yield counter
+
+    if counter.count > max_count:
+        raise AssertionError(f'Expected at most {max_count} queries, got {counter.count}:\n{counter.report()}')
+
+    suspects = counter.suspected_n_plus_one()
+    if suspects and not allow_n_plus_one:
+        repeated = '\n'.join(f'  {times}x {sql}' for sql, times in suspects)
+        raise AssertionError(f'Suspected N+1 queries:\n{repeated}\nAll statements:\n{counter.report()}')
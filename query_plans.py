@@ -0,0 +1,220 @@
+"""
+Query plan checks for the Incident Management System.
+
+HOT_QUERIES rebuilds the statements the pages, rollups and CLI reports run
+most often (the same query builders where they exist) so their plans can be
+EXPLAINed against the current database. check_query_plans() reports whether
+each one is served by an index rather than a full scan or a sort of the whole
+table; tests run it against a fresh schema and `flask check-indexes` runs it
+against a real database.
+"""
+
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from extensions import db
+from models import User, Incident, Part, incident_parts
+from incident_queries import ACTIVE_STATUSES, LIST_ORDER, list_incidents_query
+from incident_export import build_export_query
+from pagination import _past_key
+from analytics import changed_days_query
+from part_usage import usage_query
+from inventory import low_stock_query, stock_history_query
+
+# Tables big enough that a full scan of them is a problem
+HOT_TABLES = ('incidents', 'incident_parts', 'users', 'parts', 'stock_movements')
+
+# Arbitrary parameter values; plans do not depend on them without ANALYZE statistics
+_SAMPLE_TIME = datetime(2024, 1, 1)
+
+
+def _incident_list_page():
+    # routes.incidents: keyset page after a cursor, newest first
+    return list_incidents_query().filter(_past_key(LIST_ORDER, [_SAMPLE_TIME, 1000], 'next')).order_by(
+        *(column.desc() for column in LIST_ORDER)).limit(21)
+
+
+def _latest_incidents():
+    # incident_queries.recent_incidents(): dashboard and db-stats
+    return list_incidents_query().order_by(Incident.created_at.desc(), Incident.id.desc()).limit(10)
+
+
+def _reporter_incidents():
+    # incident_queries.recent_incidents(reporter_id=...): the dashboard's "my incidents"
+    return list_incidents_query().filter(Incident.reporter_id == 1).order_by(
+        Incident.created_at.desc(), Incident.id.desc()).limit(5)
+
+
+def _latest_update():
+    # conditional.incidents_validators(): list and stats Last-Modified
+    return select(func.max(Incident.updated_at))
+
+
+def _status_severity_counts():
+    # incident_stats.rebuild_incident_stats()/verify_incident_stats()
+    status = func.coalesce(Incident.status, 'open')
+    return select(status, Incident.severity, func.count(Incident.id)).group_by(status, Incident.severity)
+
+
+def _status_count():
+    # cli_commands_full.db_stats: incidents by status
+    return Incident.query.filter_by(status='open').with_entities(func.count(Incident.id))
+
+
+def _sla_queue():
+    # incident_queries.sla_queue(): the overdue / due-soon work queue
+    return Incident.query.filter(Incident.status.in_(ACTIVE_STATUSES), Incident.sla_due_at < _SAMPLE_TIME).order_by(
+        Incident.sla_due_at, Incident.id).limit(50)
+
+
+def _analytics_changed_days():
+    # analytics.refresh_analytics(): days to rebuild since the last refresh
+    return changed_days_query(_SAMPLE_TIME)
+
+
+def _export_by_status():
+    # incident_export.build_export_query(status=...)
+    return build_export_query(status='open', severity='high')
+
+
+def _export_by_date():
+    # incident_export.build_export_query(start=..., end=...)
+    return build_export_query(start=_SAMPLE_TIME.date(), end=(_SAMPLE_TIME + timedelta(days=30)).date())
+
+
+def _part_usage_count():
+    # Part.total_usage_count()
+    return db.session.query(incident_parts).filter_by(part_id=1).with_entities(func.count())
+
+
+def _part_usage_stats():
+    # part_usage.part_usage_stats(part_ids): usage totals of many parts in one GROUP BY
+    return usage_query().where(incident_parts.c.part_id.in_([1, 2, 3]))
+
+
+def _incident_parts():
+    # incident_queries.load_incident_detail(): parts on the detail page
+    return db.session.query(Part, incident_parts.c.quantity_used).join(
+        incident_parts, incident_parts.c.part_id == Part.id).filter(incident_parts.c.incident_id == 1)
+
+
+def _low_stock_parts():
+    # inventory.low_stock_parts(): /api/parts/low-stock
+    return low_stock_query(100)
+
+
+def _stock_history():
+    # inventory.stock_history(): a part's latest movements
+    return stock_history_query(1)
+
+
+def _users_by_role():
+    # cli_commands_full.db_stats/create_admin: users by role
+    return User.query.filter_by(role='admin').with_entities(func.count(User.id))
+
+
+def _user_by_username():
+    # auth login and demo login
+    return User.query.filter_by(username='demo_user').limit(1)
+
+
+# name -> (query builder, whether walking a whole index in order is the intended plan).
+# Newest-first pages stop after LIMIT rows and the rollup rebuild aggregates every
+# row, so reading an index from one end is fine; everything else must SEARCH one.
+HOT_QUERIES = {
+    'incident_list_page': (_incident_list_page, True),
+    'latest_incidents': (_latest_incidents, True),
+    'reporter_incidents': (_reporter_incidents, False),
+    'latest_update': (_latest_update, False),
+    'status_severity_counts': (_status_severity_counts, True),
+    'status_count': (_status_count, False),
+    'sla_queue': (_sla_queue, False),
+    'analytics_changed_days': (_analytics_changed_days, False),
+    'export_by_status': (_export_by_status, False),
+    'export_by_date': (_export_by_date, False),
+    'part_usage_count': (_part_usage_count, False),
+    'part_usage_stats': (_part_usage_stats, False),
+    'incident_parts': (_incident_parts, False),
+    'low_stock_parts': (_low_stock_parts, False),
+    'stock_history': (_stock_history, False),
+    'users_by_role': (_users_by_role, False),
+    'user_by_username': (_user_by_username, False),
+}
+
+
+PlanCheck = namedtuple('PlanCheck', ['name', 'uses_index', 'plan'])
+
+
+def explain(statement, session=None):
+    """Get the database's plan for a statement (an ORM Query or a Core select) as a list of lines."""
+    session = session or db.session
+    if hasattr(statement, 'statement'):
+        statement = statement.statement
+
+    connection = session.connection()
+    dialect = connection.dialect
+    # Expand IN lists into one parameter per value, as execution would
+    compiled = statement.compile(dialect=dialect, compile_kwargs={'render_postcompile': True})
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+
+    if dialect.name == 'sqlite':
+        # pysqlite caches prepared statements by their text, and a cached EXPLAIN is not
+        # re-planned after indexes change; tagging it with the schema version keeps it fresh
+        schema_version = connection.exec_driver_sql('PRAGMA schema_version').scalar()
+        rows = connection.exec_driver_sql(
+            f'EXPLAIN QUERY PLAN /* schema {schema_version} */ {compiled}', params).all()
+        return [row[-1] for row in rows]
+
+    if dialect.name == 'postgresql':
+        # Small tables are always cheapest to scan; ask whether an index could serve the query
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        try:
+            rows = connection.exec_driver_sql(f'EXPLAIN {compiled}', params).all()
+        finally:
+            connection.exec_driver_sql('RESET enable_seqscan')
+        return [row[0] for row in rows]
+
+    rows = connection.exec_driver_sql(f'EXPLAIN {compiled}', params).all()
+    return [' '.join(str(value) for value in row) for row in rows]
+
+
+def uses_index(plan, index_scan_ok=False, tables=HOT_TABLES):
+    """
+    Check a plan from explain() for full scans of the hot tables and for
+    sorting a whole hot table. Reading an entire index is only accepted when
+    index_scan_ok is set.
+    """
+    scans = False
+    for line in plan:
+        words = line.split()
+        if len(words) < 2:
+            continue
+        # SQLite: "SCAN incidents" reads the table, "SCAN incidents USING [COVERING] INDEX ..." a
+        # whole index, "SEARCH incidents USING ... INDEX ..." part of one
+        # Joined eager loads alias tables as users_1, users_2, ...
+        if words[0] in ('SCAN', 'SEARCH') and re.sub(r'_\d+$', '', words[1]) in tables:
+            if 'INDEX' not in words and 'PRIMARY KEY' not in line:
+                return False
+            if words[0] == 'SCAN':
+                if not index_scan_ok:
+                    return False
+                scans = True
+        # PostgreSQL: a sequential scan is still chosen when no index applies
+        if any(f'Seq Scan on {table}' in line for table in tables):
+            return False
+
+    # Sorting the rows an index SEARCH matched is fine; sorting every row is not
+    return not (scans and any('USE TEMP B-TREE FOR ORDER BY' in line for line in plan))
+
+
+def check_query_plans(session=None):
+    """EXPLAIN every hot query. Returns a PlanCheck per query, in HOT_QUERIES order."""
+    checks = []
+    for name, (build, index_scan_ok) in HOT_QUERIES.items():
+        plan = explain(build(), session)
+        checks.append(PlanCheck(name, uses_index(plan, index_scan_ok), plan))
+    return checks
@@ -1,8 +1,22 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app, make_response
+from flask import Response, stream_with_context, abort
 from flask_login import login_user, logout_user, login_required, current_user
 from models import User, Incident
 from extensions import db
-from datetime import datetime
+from incident_stats import get_incident_stats
+from pagination import keyset_paginate, cached_count
+from incident_search import build_search_query, to_search_hits, SearchHit
+from incident_service import create_incident, selected_part_ids
+from conditional import incident_validators, incidents_validators, is_not_modified, not_modified_response, with_validators
+from incident_queries import list_incidents_query, recent_incidents, with_list_relationships, load_incident_detail
+from incident_queries import LIST_ORDER, list_order_key, sla_queue, MAX_DUE_WITHIN_HOURS
+from db_routing import replica_reads_view
+from analytics import DIMENSIONS, analytics_report, last_refreshed
+from incident_trends import TREND_DIMENSIONS, daily_trend, trend_range
+from part_usage import LEADERBOARD_ORDERS, part_usage_leaderboard
+from inventory import InsufficientStock, install_part, low_stock_parts
+from datetime import datetime, timedelta
+import math
 
 # Create blueprints
 main_bp = Blueprint('main', __name__)
@@ -16,56 +30,59 @@ def home():
 
 @main_bp.route('/index')
 @main_bp.route('/dashboard')
+@replica_reads_view
 def index():
     """Dashboard/Index page showing recent incidents for authenticated users."""
     if not current_user.is_authenticated:
         return redirect(url_for('main.home'))
     
     # Get recent incidents for dashboard
-    recent_incidents = Incident.query.order_by(Incident.created_at.desc()).limit(10).all()
+    latest_incidents = recent_incidents(limit=10)
     
     # Get user's own incidents
-    user_incidents = Incident.query.filter_by(reporter_id=current_user.id).order_by(Incident.created_at.desc()).limit(5).all()
+    user_incidents = recent_incidents(limit=5, reporter_id=current_user.id)
     
-    # Get incident statistics
-    total_incidents = Incident.query.count()
-    open_incidents = Incident.query.filter_by(status='open').count()
-    in_progress_incidents = Incident.query.filter_by(status='in_progress').count()
-    resolved_incidents = Incident.query.filter(Incident.status.in_(['resolved', 'closed'])).count()
-    
-    stats = {
-        'total': total_incidents,
-        'open': open_incidents,
-        'in_progress': in_progress_incidents,
-        'resolved': resolved_incidents
-    }
+    # Get incident statistics from the incident_stats rollup
+    stats = get_incident_stats()
     
     return render_template('dashboard.html', 
-                         incidents=recent_incidents,
+                         incidents=latest_incidents,
                          user_incidents=user_incidents,
                          stats=stats)
 
 @main_bp.route('/incidents')
 @login_required
+@replica_reads_view
 def incidents():
-    """List all incidents."""
-    page = request.args.get('page', 1, type=int)
-    incidents = Incident.query.order_by(Incident.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
+    """List all incidents, newest first, using keyset pagination."""
+    stats = get_incident_stats()
+    etag, last_modified = incidents_validators(request.args.get('cursor'), stats=stats)
+    if is_not_modified(etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    
+    incidents = keyset_paginate(
+        list_incidents_query(),
+        LIST_ORDER,
+        cursor=request.args.get('cursor'),
+        per_page=current_app.config['INCIDENTS_PER_PAGE'],
+        total=stats['total'],
+        key=list_order_key
     )
-    return render_template('incidents.html', incidents=incidents)
+    response = make_response(render_template('incidents.html', incidents=incidents))
+    return with_validators(response, etag, last_modified)
 
 @main_bp.route('/incident/new', methods=['GET', 'POST'])
 @login_required
 def new_incident():
     """Create a new incident using Flask-WTF form."""
     from forms import IncidentForm
-    from models import Part
     
     form = IncidentForm()
     
     if form.validate_on_submit():
-        incident = Incident(
+        # Handle parts selection - prioritize dropdown over checkboxes
+        incident, parts = create_incident(
+            part_ids=selected_part_ids(form.parts_dropdown, form.parts),
             title=f"Incident at {form.location.data}",  # Generate title from location
             description=form.description.data,
             equipment=form.equipment.data,
@@ -74,33 +91,16 @@ def new_incident():
             category='other',   # Default category  
             reporter_id=current_user.id
         )
-        db.session.add(incident)
-        db.session.flush()  # Flush to get the incident.id before commit
-        
-        # Handle parts selection - prioritize dropdown over checkboxes
-        selected_parts = []
-        if form.parts_dropdown.data:
-            selected_parts = form.parts_dropdown.data
-        elif form.parts.data:
-            selected_parts = form.parts.data
-        
-        # Add selected parts to the incident
-        if selected_parts:
-            for part_id in selected_parts:
-                part = Part.query.get(int(part_id))
-                if part:
-                    incident.parts.append(part)
-        
+        incident_id = incident.id  # Read before commit expires the instance
         db.session.commit()
         
         # Create success message with parts info
         parts_message = ""
-        if selected_parts:
-            part_names = [Part.query.get(int(pid)).name for pid in selected_parts if Part.query.get(int(pid))]
-            parts_message = f" Parts selected: {', '.join(part_names)}"
+        if parts:
+            parts_message = f" Parts selected: {', '.join(name for _, name in parts)}"
         
-        flash(f'Incident #{incident.id} reported successfully!{parts_message}', 'success')
-        return redirect(url_for('main.incident_detail', id=incident.id))
+        flash(f'Incident #{incident_id} reported successfully!{parts_message}', 'success')
+        return redirect(url_for('main.incident_detail', id=incident_id))
     
     return render_template('new_incident.html', form=form)
 
@@ -113,7 +113,8 @@ def new_incident_enhanced():
     form = EnhancedIncidentForm()
     
     if form.validate_on_submit():
-        incident = Incident(
+        create_incident(
+            part_ids=selected_part_ids(form.parts_select, form.parts_checkbox),
             title=form.title.data,
             description=form.description.data,
             equipment=form.equipment.data,
@@ -124,7 +125,6 @@ def new_incident_enhanced():
             incident_type=form.incident_type.data,
             reporter_id=current_user.id
         )
-        db.session.add(incident)
         db.session.commit()
         flash('Incident reported successfully!', 'success')
         return redirect(url_for('main.index'))
@@ -140,25 +140,25 @@ def report():
     form = IncidentForm()
     
     if form.validate_on_submit():
-        # Create new incident with current user as reporter
-        incident = Incident(
-            title=f"Equipment Issue: {form.equipment.data}",  # Generate descriptive title
-            description=form.description.data,
-            equipment=form.equipment.data,
-            location=form.location.data,
-            severity='medium',  # Default severity
-            category='mechanical',  # Default category for equipment incidents
-            status='open',  # Initial status
-            priority='medium',  # Default priority
-            reporter_id=current_user.id,  # Associate with current logged-in user
-            date_reported=datetime.utcnow()  # Set report timestamp
-        )
-        
         try:
-            db.session.add(incident)
+            # Create new incident with current user as reporter
+            incident, _ = create_incident(
+                part_ids=selected_part_ids(form.parts_dropdown, form.parts),
+                title=f"Equipment Issue: {form.equipment.data}",  # Generate descriptive title
+                description=form.description.data,
+                equipment=form.equipment.data,
+                location=form.location.data,
+                severity='medium',  # Default severity
+                category='mechanical',  # Default category for equipment incidents
+                status='open',  # Initial status
+                priority='medium',  # Default priority
+                reporter_id=current_user.id,  # Associate with current logged-in user
+                date_reported=datetime.utcnow()  # Set report timestamp
+            )
+            incident_id = incident.id  # Read before commit expires the instance
             db.session.commit()
-            flash(f'Incident #{incident.id} reported successfully! Thank you for your report.', 'success')
-            return redirect(url_for('main.incident_detail', id=incident.id))
+            flash(f'Incident #{incident_id} reported successfully! Thank you for your report.', 'success')
+            return redirect(url_for('main.incident_detail', id=incident_id))
         except Exception as e:
             db.session.rollback()
             flash('Error submitting incident report. Please try again.', 'error')
@@ -190,10 +190,16 @@ def incident_parts():
 
 @main_bp.route('/incident/<int:id>')
 @login_required
+@replica_reads_view
 def incident_detail(id):
     """View incident details."""
-    incident = Incident.query.get_or_404(id)
-    return render_template('incident_detail.html', incident=incident)
+    validators = incident_validators(id)
+    if validators and is_not_modified(*validators):
+        return not_modified_response(*validators)
+    
+    detail = load_incident_detail(id)
+    response = make_response(render_template('incident_detail.html', incident=detail.incident, detail=detail))
+    return with_validators(response, *validators)
 
 @main_bp.route('/incident/<int:id>/update', methods=['POST'])
 @login_required
@@ -216,6 +222,34 @@ def update_incident(id):
     flash('Incident updated successfully!', 'success')
     return redirect(url_for('main.incident_detail', id=id))
 
+@main_bp.route('/incident/<int:id>/parts/<int:part_id>/install', methods=['POST'])
+@login_required
+def install_incident_part(id, part_id):
+    """Mark a part of an incident as installed, taking it out of stock."""
+    incident = Incident.query.get_or_404(id)
+    
+    if current_user.role not in ['admin', 'manager'] and incident.reporter_id != current_user.id:
+        flash('You do not have permission to update this incident.', 'error')
+        return redirect(url_for('main.incident_detail', id=id))
+    
+    try:
+        movement = install_part(id, part_id)
+        stock_after = movement.stock_after if movement else None
+        db.session.commit()
+    except LookupError:
+        db.session.rollback()
+        abort(404)
+    except InsufficientStock:
+        db.session.rollback()
+        flash('Not enough stock to install this part.', 'error')
+        return redirect(url_for('main.incident_detail', id=id))
+    
+    if movement is None:
+        flash('Part was already installed.', 'info')
+    else:
+        flash(f'Part installed; {stock_after} left in stock.', 'success')
+    return redirect(url_for('main.incident_detail', id=id))
+
 @main_bp.route('/about')
 def about():
     """About page with system information."""
@@ -228,38 +262,233 @@ def contact():
 
 @main_bp.route('/api/stats')
 @login_required
+@replica_reads_view
 def api_stats():
     """API endpoint for dashboard statistics."""
+    rollup = get_incident_stats()
+    etag, last_modified = incidents_validators('stats', per_user=False, stats=rollup)
+    if is_not_modified(etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    
     stats = {
-        'total_incidents': Incident.query.count(),
-        'open_incidents': Incident.query.filter_by(status='open').count(),
-        'in_progress_incidents': Incident.query.filter_by(status='in_progress').count(),
-        'resolved_incidents': Incident.query.filter(Incident.status.in_(['resolved', 'closed'])).count(),
-        'critical_incidents': Incident.query.filter_by(severity='critical').count(),
-        'high_priority_incidents': Incident.query.filter_by(severity='high').count()
+        'total_incidents': rollup['total'],
+        'open_incidents': rollup['open'],
+        'in_progress_incidents': rollup['in_progress'],
+        'resolved_incidents': rollup['resolved'],
+        'critical_incidents': rollup['by_severity'].get('critical', 0),
+        'high_priority_incidents': rollup['by_severity'].get('high', 0)
     }
-    return jsonify(stats)
+    return with_validators(jsonify(stats), etag, last_modified)
+
+@main_bp.route('/api/incidents/queue')
+@login_required
+@replica_reads_view
+def incident_queue():
+    """Work queue: active incidents past or nearing their SLA deadline, soonest deadline first."""
+    due_within = request.args.get('due_within', current_app.config['SLA_DUE_SOON_HOURS'], type=float)
+    if not math.isfinite(due_within):
+        abort(400)
+    due_within = min(max(due_within, 0), MAX_DUE_WITHIN_HOURS)
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    
+    now = datetime.utcnow()
+    overdue, due_soon = [], []
+    for incident in sla_queue(now + timedelta(hours=due_within), limit):
+        item = {
+            'id': incident.id,
+            'title': incident.title,
+            'severity': incident.severity,
+            'status': incident.status,
+            'equipment': incident.equipment,
+            'location': incident.location,
+            'sla_due_at': incident.sla_due_at.isoformat(),
+            'minutes_remaining': int((incident.sla_due_at - now).total_seconds() // 60),
+            'url': url_for('main.incident_detail', id=incident.id)
+        }
+        (overdue if incident.sla_due_at <= now else due_soon).append(item)
+    
+    return jsonify({
+        'generated_at': now.isoformat(),
+        'due_within_hours': due_within,
+        'overdue': overdue,
+        'due_soon': due_soon
+    })
+
+def _date_range_args():
+    """The optional from/to dates of the report APIs; a malformed date is a 400."""
+    from incident_export import parse_date
+    
+    try:
+        return parse_date(request.args.get('from')), parse_date(request.args.get('to'))
+    except ValueError:
+        abort(400, description='Dates must use the YYYY-MM-DD format.')
+
+@main_bp.route('/api/analytics', defaults={'by': None})
+@main_bp.route('/api/analytics/<by>')
+@login_required
+@replica_reads_view
+def api_analytics(by):
+    """MTTR, downtime and cost from the analytics rollup, overall or by category, equipment, location or month."""
+    by = by or request.args.get('by') or None
+    if by is not None and by not in DIMENSIONS:
+        abort(400)
+    start, end = _date_range_args()
+    
+    refreshed_at = last_refreshed()
+    totals, groups = analytics_report(by, start, end)
+    data = {
+        'refreshed_at': refreshed_at.isoformat() if refreshed_at else None,
+        'from': start.isoformat() if start else None,
+        'to': end.isoformat() if end else None,
+        'totals': totals
+    }
+    if by:
+        data['by'] = by
+        data['groups'] = groups
+    return jsonify(data)
+
+@main_bp.route('/api/trends')
+@login_required
+@replica_reads_view
+def api_trends():
+    """Incidents per day for trend charts, optionally split by status, severity, category or location."""
+    by = request.args.get('by') or None
+    if by is not None and by not in TREND_DIMENSIONS:
+        abort(400)
+    start, end = trend_range(*_date_range_args())
+    filters = {name: request.args.get(name) for name in TREND_DIMENSIONS if request.args.get(name)}
+    
+    days, series = daily_trend(start, end, by, **filters)
+    return jsonify({
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'by': by,
+        'filters': filters,
+        'days': [day.isoformat() for day in days],
+        'series': series
+    })
+
+def _leaderboard_args():
+    """Order, limit, category and look-back days from the query string of the parts usage views."""
+    order = request.args.get('order', 'usage')
+    if order not in LEADERBOARD_ORDERS:
+        order = 'usage'
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+    days = request.args.get('days', type=int)
+    return order, limit, request.args.get('category') or None, days if days and days > 0 else None
+
+def _leaderboard(order, limit, category, days):
+    since = datetime.utcnow() - timedelta(days=days) if days else None
+    return part_usage_leaderboard(order, limit, category, since)
+
+@main_bp.route('/parts/usage')
+@login_required
+@replica_reads_view
+def parts_usage():
+    """Parts usage leaderboard page."""
+    order, limit, category, days = _leaderboard_args()
+    return render_template('parts_usage.html', leaderboard=_leaderboard(order, limit, category, days),
+                           order=order, limit=limit, category=category, days=days, orders=LEADERBOARD_ORDERS)
+
+@main_bp.route('/api/parts/usage')
+@login_required
+@replica_reads_view
+def api_parts_usage():
+    """Parts usage leaderboard as JSON."""
+    order, limit, category, days = _leaderboard_args()
+    leaderboard = _leaderboard(order, limit, category, days)
+    for entry in leaderboard:
+        entry['last_used_at'] = entry['last_used_at'].isoformat() if entry['last_used_at'] else None
+    return jsonify({'order': order, 'category': category, 'days': days, 'parts': leaderboard})
+
+@main_bp.route('/api/parts/low-stock')
+@login_required
+@replica_reads_view
+def api_low_stock():
+    """Parts at or below their minimum stock, most short first."""
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 500)
+    return jsonify({'parts': [
+        {
+            'part_id': part.id,
+            'part_number': part.part_number,
+            'name': part.name,
+            'category': part.category,
+            'current_stock': part.current_stock,
+            'minimum_stock': part.minimum_stock,
+            'shortfall': -margin,
+            'location': part.location,
+            'lead_time_days': part.lead_time_days
+        }
+        for part, margin in low_stock_parts(limit)
+    ]})
+
+@main_bp.route('/incidents/export')
+@login_required
+def export_incidents():
+    """Stream incidents as CSV or NDJSON, optionally filtered."""
+    from incident_export import iter_export, parse_date, EXPORT_FORMATS
+    
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        abort(400, description=f'Unsupported export format: {export_format}')
+    
+    try:
+        start = parse_date(request.args.get('start'))
+        end = parse_date(request.args.get('end'))
+    except ValueError:
+        abort(400, description='Dates must use the YYYY-MM-DD format.')
+    
+    chunks = iter_export(
+        export_format,
+        status=request.args.get('status'),
+        severity=request.args.get('severity'),
+        category=request.args.get('category'),
+        start=start,
+        end=end
+    )
+    
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    filename = f"incidents_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
 
 @main_bp.route('/search')
 @login_required
+@replica_reads_view
 def search():
-    """Search incidents."""
+    """Search incidents using the full-text index, best matches first."""
     query = request.args.get('q', '')
-    page = request.args.get('page', 1, type=int)
     
     if query:
-        incidents = Incident.query.filter(
-            Incident.title.contains(query) | 
-            Incident.description.contains(query)
-        ).order_by(Incident.created_at.desc()).paginate(
-            page=page, per_page=20, error_out=False
+        search = build_search_query(query)
+        total = cached_count(('search', query), search.query,
+                             ttl=current_app.config['SEARCH_COUNT_CACHE_TTL'])
+        incidents = keyset_paginate(
+            with_list_relationships(search.query),
+            search.columns,
+            cursor=request.args.get('cursor'),
+            per_page=current_app.config['INCIDENTS_PER_PAGE'],
+            total=total,
+            key=search.key
         )
+        incidents.items = to_search_hits(incidents.items, query)
+        ranked = search.ranked
     else:
-        incidents = Incident.query.order_by(Incident.created_at.desc()).paginate(
-            page=page, per_page=20, error_out=False
+        incidents = keyset_paginate(
+            list_incidents_query(),
+            LIST_ORDER,
+            cursor=request.args.get('cursor'),
+            per_page=current_app.config['INCIDENTS_PER_PAGE'],
+            total=get_incident_stats()['total'],
+            key=list_order_key
         )
+        incidents.items = [SearchHit(incident, None, None) for incident in incidents.items]
+        ranked = False
     
-    return render_template('search_results.html', incidents=incidents, query=query)
+    return render_template('search_results.html', incidents=incidents, query=query, ranked=ranked)
 
 # Authentication routes
 @auth_bp.route('/demo-login')
@@ -367,12 +596,13 @@ def logout():
 def new_incident_simple():
     """Create a new incident using simple form syntax."""
     from forms import IncidentForm
-    from models import Part
     
     form = IncidentForm()
     
     if form.validate_on_submit():
-        incident = Incident(
+        # Handle parts selection - prioritize dropdown over checkboxes
+        incident, _ = create_incident(
+            part_ids=selected_part_ids(form.parts_dropdown, form.parts),
             title=f"Incident at {form.location.data}",
             description=form.description.data,
             equipment=form.equipment.data,
@@ -381,27 +611,11 @@ def new_incident_simple():
             category='other',
             reporter_id=current_user.id
         )
-        db.session.add(incident)
-        db.session.flush()
-        
-        # Handle parts selection - prioritize dropdown over checkboxes
-        selected_parts = []
-        if form.parts_dropdown.data:
-            selected_parts = form.parts_dropdown.data
-        elif form.parts.data:
-            selected_parts = form.parts.data
-        
-        # Add selected parts to the incident
-        if selected_parts:
-            for part_id in selected_parts:
-                part = Part.query.get(int(part_id))
-                if part:
-                    incident.parts.append(part)
-        
+        incident_id = incident.id  # Read before commit expires the instance
         db.session.commit()
         
-        flash(f'Incident #{incident.id} reported successfully! (Simple form)', 'success')
-        return redirect(url_for('main.incident_detail', id=incident.id))
+        flash(f'Incident #{incident_id} reported successfully! (Simple form)', 'success')
+        return redirect(url_for('main.incident_detail', id=incident_id))
     
     return render_template('new_incident_simple.html', form=form)
 
@@ -0,0 +1,232 @@
+"""
+SQLite connection tuning for the Incident Management System.
+
+SQLite's defaults (rollback journal, synchronous=FULL, a 2MB page cache) make
+every writer lock the whole file and block readers, so several gunicorn
+workers sharing db/ims.db serialize and fail with "database is locked".
+init_sqlite_profile() applies a named set of PRAGMAs from SQLITE_PROFILES,
+chosen by the SQLITE_PROFILE config key and adjusted by SQLITE_PRAGMAS, to
+every new connection on the app's SQLite engines.
+
+benchmark_profiles() measures what a profile buys: worker processes issue a
+mix of incident list reads and incident inserts against a file database and
+report throughput and lock errors per profile.
+"""
+
+import multiprocessing
+import os
+import random
+import re
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event, func, insert, select, update
+from sqlalchemy.exc import OperationalError
+
+SQLITE_PROFILES = {
+    # SQLite's own settings: rollback journal, synchronous=FULL, no busy handler beyond the driver's
+    'default': {},
+    # Concurrent web workers: readers never block on the writer, commits skip the fsync
+    # per transaction (WAL stays consistent after a crash; the last commits may be lost
+    # on power failure) and writers wait for the lock instead of failing at once
+    'wal': {
+        'busy_timeout': 5000,  # Milliseconds to wait for a lock
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -20000,  # Negative is KiB: 20MB of page cache per connection
+        'mmap_size': 128 * 1024 * 1024,  # Read pages through a 128MB memory map
+        'temp_store': 'MEMORY',  # Sorts and temp indexes stay off disk
+    },
+}
+
+# busy_timeout goes first so switching the journal mode can wait for other connections
+PRAGMA_ORDER = ('busy_timeout', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store')
+
+_PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+_PRAGMA_KEYWORD = re.compile(r'^[A-Za-z_]+$')
+
+
+def resolve_pragmas(profile='default', overrides=None):
+    """
+    Get the PRAGMAs for a profile name with overrides applied, in the order they
+    are set. An override of None removes a PRAGMA. Raises ValueError for an
+    unknown profile or a malformed PRAGMA.
+    """
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f'Unknown SQLite profile: {profile} (choose from {", ".join(SQLITE_PROFILES)})')
+
+    pragmas = dict(SQLITE_PROFILES[profile])
+    pragmas.update(overrides or {})
+    pragmas = {name: value for name, value in pragmas.items() if value is not None}
+
+    for name, value in pragmas.items():
+        # Values are interpolated into the statement, so only integers and keywords are allowed
+        if not _PRAGMA_NAME.match(name):
+            raise ValueError(f'Invalid PRAGMA name: {name}')
+        if isinstance(value, bool) or not (isinstance(value, int) or _PRAGMA_KEYWORD.match(str(value))):
+            raise ValueError(f'Invalid value for PRAGMA {name}: {value!r}')
+
+    order = {name: i for i, name in enumerate(PRAGMA_ORDER)}
+    return dict(sorted(pragmas.items(), key=lambda item: order.get(item[0], len(order))))
+
+
+def apply_pragmas(dbapi_connection, pragmas, in_memory=False):
+    """Set pragmas on a raw sqlite3 connection. In-memory databases keep their memory journal."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            if name == 'journal_mode' and in_memory:
+                continue
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+def configure_engine(engine, pragmas):
+    """Apply pragmas to every connection the engine opens from now on."""
+    database = engine.url.database
+    in_memory = not database or database == ':memory:' or 'mode=memory' in str(engine.url)
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas, in_memory)
+
+    return _set_pragmas
+
+
+def init_sqlite_profile(app):
+    """Apply the configured SQLite profile to the app's SQLite engines."""
+    from extensions import db
+
+    pragmas = resolve_pragmas(app.config.get('SQLITE_PROFILE', 'default'), app.config.get('SQLITE_PRAGMAS'))
+    if not pragmas:
+        return None
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                configure_engine(engine, pragmas)
+    return pragmas
+
+
+def read_pragmas(connection, names=PRAGMA_ORDER):
+    """Current values of the named PRAGMAs on a SQLAlchemy connection."""
+    return {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in names}
+
+
+# Benchmark --------------------------------------------------------------------
+
+def _engine_for(path, pragmas):
+    engine = create_engine(f'sqlite:///{path}')
+    if pragmas:
+        configure_engine(engine, pragmas)
+    return engine
+
+
+def _incident_row(rng, reporter_id, now):
+    severity = rng.choice(('low', 'medium', 'high', 'critical'))
+    return {
+        'title': f'Benchmark incident {rng.randrange(10 ** 6)}',
+        'description': 'Synthetic incident written by the SQLite benchmark.',
+        'equipment': f'Rig #{rng.randint(1, 50)}', 'location': f'Bay {rng.choice("ABCD")}',
+        'severity': severity, 'priority': severity, 'category': 'other', 'status': 'open',
+        'reporter_id': reporter_id, 'date_reported': now, 'created_at': now, 'updated_at': now,
+    }
+
+
+def _prepare_database(path, pragmas, seed_rows, seed):
+    from models import User, Incident, IncidentStat
+
+    engine = _engine_for(path, pragmas)
+    rng = random.Random(seed)
+    now = datetime(2024, 1, 1)
+    with engine.begin() as connection:
+        User.metadata.create_all(connection)
+        reporter_id = connection.execute(insert(User.__table__).values(
+            username='bench', email='bench@example.com', first_name='Bench', last_name='Mark',
+            password_hash='!', role='user')).inserted_primary_key[0]
+        connection.execute(insert(Incident.__table__), [
+            _incident_row(rng, reporter_id, now + timedelta(minutes=i)) for i in range(seed_rows)
+        ])
+        connection.execute(insert(IncidentStat.__table__), [
+            {'status': 'open', 'severity': severity, 'count': 0}
+            for severity in ('low', 'medium', 'high', 'critical')
+        ])
+    engine.dispose()
+    return reporter_id
+
+
+def _benchmark_worker(path, pragmas, reporter_id, barrier, duration, write_ratio, seed, results):
+    from models import Incident, IncidentStat
+
+    incidents, stats = Incident.__table__, IncidentStat.__table__
+    # What GET /incidents reads: the newest page through ix_incidents_created_at_id
+    list_page = select(incidents.c.id, incidents.c.title, incidents.c.status, incidents.c.created_at).order_by(
+        incidents.c.created_at.desc(), incidents.c.id.desc()).limit(20)
+    total = select(func.sum(stats.c.count))
+
+    engine = _engine_for(path, pragmas)
+    rng = random.Random(seed)
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    with engine.connect() as connection:
+        barrier.wait()
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            try:
+                if rng.random() < write_ratio:
+                    # What creating an incident writes: the row plus its rollup counter
+                    row = _incident_row(rng, reporter_id, datetime.utcnow())
+                    with connection.begin():
+                        connection.execute(insert(incidents), row)
+                        connection.execute(update(stats).where(
+                            stats.c.status == 'open', stats.c.severity == row['severity']
+                        ).values(count=stats.c.count + 1))
+                    counts['writes'] += 1
+                else:
+                    with connection.begin():
+                        connection.execute(list_page).all()
+                        connection.execute(total).scalar()
+                    counts['reads'] += 1
+            except OperationalError:
+                counts['errors'] += 1
+    engine.dispose()
+    results.put(counts)
+
+
+def benchmark_profile(profile, workers=4, duration=5.0, write_ratio=0.2, seed_rows=2000, seed=42, directory=None):
+    """
+    Run the read/write mix from `workers` processes for `duration` seconds
+    against a fresh database file using the named profile. Returns a dict of
+    operation counts and per-second rates.
+    """
+    pragmas = resolve_pragmas(profile) if isinstance(profile, str) else resolve_pragmas('default', profile)
+    context = multiprocessing.get_context('spawn')
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        path = os.path.join(tmp, 'benchmark.db')
+        reporter_id = _prepare_database(path, pragmas, seed_rows, seed)
+
+        barrier, results = context.Barrier(workers), context.Queue()
+        processes = [
+            context.Process(target=_benchmark_worker, args=(
+                path, pragmas, reporter_id, barrier, duration, write_ratio, seed + i, results))
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        counts = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    totals = {key: sum(count[key] for count in counts) for key in ('reads', 'writes', 'errors')}
+    return {
+        'profile': profile, 'workers': workers, 'duration': duration, 'write_ratio': write_ratio,
+        **totals,
+        'reads_per_second': round(totals['reads'] / duration, 1),
+        'writes_per_second': round(totals['writes'] / duration, 1),
+    }
+
+
+def benchmark_profiles(profiles=('default', 'wal'), **options):
+    """Run benchmark_profile() for each profile in turn. Returns the results in order."""
+    return [benchmark_profile(profile, **options) for profile in profiles]
@@ -0,0 +1,34 @@
+"""
+Fixtures for the micro-benchmark suite.
+
+Each benchmark runs against in-memory databases of several sizes filled by
+the synthetic data generator, so a slowdown that only shows up with a large
+parts catalog or many incidents is visible in the numbers.
+"""
+
+import pytest
+from datetime import datetime
+from extensions import create_app, db
+from data_seeder import DataSeeder, SeedPlan
+
+# Database sizes benchmarked, from a small site to a large parts catalog
+DB_SIZES = {
+    'small': SeedPlan(incidents=1000, parts=100, engineers=10, users=20),
+    'large': SeedPlan(incidents=20000, parts=2000, engineers=50, users=200),
+}
+
+# Fixed end date so every run benchmarks the same data
+SEED_NOW = datetime(2024, 6, 30, 23, 59, 59)
+
+
+@pytest.fixture(scope='module', params=list(DB_SIZES))
+def seeded_app(request):
+    """Create an application with a seeded database, shared by a module."""
+    app = create_app('testing')
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        db.create_all()
+        DataSeeder(DB_SIZES[request.param], seed=1, now=SEED_NOW).run()
+        yield app
+        db.session.remove()
+        db.drop_all()
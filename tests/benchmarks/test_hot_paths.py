@@ -0,0 +1,91 @@
+"""
+Micro-benchmarks for model and form hot paths.
+
+Deselected from normal test runs by the benchmark marker. Record a baseline
+for this machine with `make bench-baseline` (baselines are machine-specific
+and not committed), then run `make bench` to compare against it.
+"""
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+pytestmark = pytest.mark.benchmark
+
+from sqlalchemy import func
+from extensions import db
+from models import Incident, Part, incident_parts
+from forms import IncidentForm, EnhancedIncidentForm, populate_parts_choices, get_parts_by_category
+from parts_cache import cached_parts_choices, clear_parts_cache
+
+# Incidents evaluated per round of the per-row model method benchmarks
+INCIDENT_SAMPLE = 500
+
+# Parts ticked in the large form validation benchmark
+SELECTED_PARTS = 200
+
+
+@pytest.fixture(scope='module')
+def incidents(seeded_app):
+    """A sample of incidents in every status."""
+    return Incident.query.order_by(Incident.id).limit(INCIDENT_SAMPLE).all()
+
+
+@pytest.fixture(scope='module')
+def busiest_part(seeded_app):
+    """The part with the most incident_parts rows."""
+    part_id = db.session.query(incident_parts.c.part_id).group_by(incident_parts.c.part_id).order_by(
+        func.count().desc()
+    ).limit(1).scalar()
+    return db.session.get(Part, part_id)
+
+
+def test_is_overdue(benchmark, incidents):
+    benchmark(lambda: [incident.is_overdue() for incident in incidents])
+
+
+def test_get_duration_minutes(benchmark, incidents):
+    benchmark(lambda: [incident.get_duration_minutes() for incident in incidents])
+
+
+def test_total_usage_count(benchmark, busiest_part):
+    assert benchmark(busiest_part.total_usage_count) > 0
+
+
+def test_populate_parts_choices_cached(benchmark, seeded_app):
+    with seeded_app.test_request_context():
+        form = IncidentForm()
+        benchmark(populate_parts_choices, form)
+    assert form.parts.choices
+
+
+def test_populate_parts_choices_cold(benchmark, seeded_app):
+    with seeded_app.test_request_context():
+        form = IncidentForm()
+        benchmark.pedantic(populate_parts_choices, args=(form,), setup=clear_parts_cache, rounds=50)
+    assert form.parts.choices
+
+
+def test_get_parts_by_category_cached(benchmark, seeded_app):
+    get_parts_by_category()
+    assert benchmark(get_parts_by_category)
+
+
+def test_get_parts_by_category_cold(benchmark, seeded_app):
+    assert benchmark.pedantic(get_parts_by_category, setup=clear_parts_cache, rounds=50)
+
+
+@pytest.mark.parametrize('selected', [1, SELECTED_PARTS])
+def test_enhanced_form_validation(benchmark, seeded_app, selected):
+    part_ids = [str(part_id) for part_id, _ in cached_parts_choices()[:selected]]
+    data = {
+        'title': 'Conveyor jam on line 3', 'description': 'Belt stopped under load during shift change',
+        'equipment': 'Conveyor Belt #3', 'location': 'Production Floor A', 'severity': 'high',
+        'category': 'mechanical', 'priority': 'high', 'parts_select': part_ids,
+    }
+
+    def validate():
+        with seeded_app.test_request_context(method='POST', data=data):
+            return EnhancedIncidentForm().validate()
+
+    assert benchmark(validate)
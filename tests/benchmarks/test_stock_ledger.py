@@ -0,0 +1,41 @@
+"""
+Throughput benchmark for concurrent part installs on a WAL database file.
+
+Deselected from normal test runs by the benchmark marker; see test_hot_paths.py
+for recording a baseline and comparing against it.
+"""
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+pytestmark = pytest.mark.benchmark
+
+from sqlalchemy import delete, update
+from extensions import db
+from models import Part, StockMovement, incident_parts
+from tests.test_stock_ledger import add_incident, add_user, file_app, run_installs  # noqa: F401
+
+INCIDENTS = 100
+STOCK = 1000
+
+
+def test_concurrent_installs(benchmark, file_app):
+    """Eight workers installing two hot parts on every incident, each install attempted twice."""
+    user = add_user()
+    db.session.add_all([Part(part_number='HOT-1', name='Bearing', current_stock=STOCK),
+                        Part(part_number='HOT-2', name='Seal', current_stock=STOCK)])
+    db.session.flush()
+    incidents = [add_incident(user, {1: 1, 2: 1}).id for _ in range(INCIDENTS)]
+    db.session.commit()
+    jobs = [(incident_id, part_id) for incident_id in incidents for part_id in (1, 2)] * 2
+
+    def reset():
+        db.session.execute(update(incident_parts).values(status='required'))
+        db.session.execute(update(Part).values(current_stock=STOCK))
+        db.session.execute(delete(StockMovement))
+        db.session.commit()
+
+    results, _ = benchmark.pedantic(run_installs, args=(db.engine, jobs), setup=reset, rounds=5)
+    assert results.count('installed') == len(jobs) // 2
+    benchmark.extra_info['installs_per_second'] = len(jobs) / benchmark.stats.stats.mean
@@ -0,0 +1,51 @@
+"""
+Shared pytest fixtures.
+"""
+
+import pytest
+from extensions import create_app, db
+from models import User
+from query_counter import assert_max_queries
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user(app):
+    """Create the admin user 'viewer' that incidents are reported by and the client logs in as."""
+    user = User(username='viewer', email='viewer@example.com', first_name='View', last_name='Er', role='admin')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def client(app, user):
+    """Create a test client logged in as the viewer user."""
+    client = app.test_client()
+    client.post('/auth/login', data={'username': 'viewer', 'password': 'password'})
+    return client
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Check a block against a statement budget and for N+1 query patterns.
+
+    Usage:
+        def test_page(app, client, query_budget):
+            with app.app_context(), query_budget(5):
+                client.get('/incidents')
+    """
+    return assert_max_queries
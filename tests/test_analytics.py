@@ -0,0 +1,147 @@
+"""
+Tests for the MTTR / downtime / cost analytics rollup and /api/analytics.
+"""
+
+from datetime import date, datetime, timedelta
+import pytest
+from extensions import db
+from models import Incident, IncidentAnalyticsDay, IncidentAnalyticsStaleDay
+from analytics import RESOLVE_BUCKETS, analytics_report, percentile, refresh_analytics
+from query_counter import QueryCounter
+
+REPORTED = datetime(2026, 3, 1, 8, 0)
+
+
+def add_incident(user, category='mechanical', equipment='Pump Station A', days=0, resolve_minutes=None,
+                 downtime=0, cost=None):
+    reported = REPORTED + timedelta(days=days)
+    incident = Incident(title='Pump failure', description='Pump stopped responding', equipment=equipment,
+                        location='Building 1', severity='high', category=category, reporter_id=user.id,
+                        date_reported=reported, downtime_minutes=downtime, cost_estimate=cost)
+    if resolve_minutes is not None:
+        incident.status = 'resolved'
+        incident.resolved_at = reported + timedelta(minutes=resolve_minutes)
+    db.session.add(incident)
+    db.session.commit()
+    return incident
+
+
+@pytest.fixture
+def incidents(user):
+    """Incidents over two months in two categories, most of them resolved."""
+    add_incident(user, resolve_minutes=30, downtime=60, cost=100.0)
+    add_incident(user, resolve_minutes=90, downtime=120, cost=250.5)
+    add_incident(user, equipment='Conveyor #3', days=31, resolve_minutes=600, downtime=30)
+    add_incident(user, category='electrical', days=1, resolve_minutes=120, downtime=15, cost=40.0)
+    add_incident(user, category='electrical', days=2)
+    refresh_analytics()
+    db.session.commit()
+
+
+def test_percentile_interpolates_within_buckets():
+    """Percentiles come from the histogram, interpolated inside a bucket."""
+    histogram = [0] * (len(RESOLVE_BUCKETS) + 1)
+    assert percentile(histogram, 0.5) is None
+
+    histogram[RESOLVE_BUCKETS.index(60)] = 4
+    assert percentile(histogram, 0.5) == 45.0
+    histogram[-1] = 4
+    assert percentile(histogram, 0.95) == float(RESOLVE_BUCKETS[-1])
+
+
+def test_report_totals_and_groups(app, incidents):
+    """The rollup reproduces counts, mean time-to-resolve, downtime and cost."""
+    totals, groups = analytics_report()
+    assert groups == []
+    assert totals['incidents'] == 5 and totals['resolved'] == 4
+    assert totals['mttr_minutes']['mean'] == 210.0
+    assert totals['downtime_minutes'] == 225 and totals['cost'] == 390.5
+
+    _, groups = analytics_report('category')
+    assert [(g['category'], g['incidents'], g['downtime_minutes']) for g in groups] == [
+        ('mechanical', 3, 210), ('electrical', 2, 15)]
+    assert groups[1]['mttr_minutes']['mean'] == 120.0
+
+    _, groups = analytics_report('month')
+    assert [(g['month'], g['incidents']) for g in groups] == [('2026-03', 4), ('2026-04', 1)]
+
+    totals, _ = analytics_report(start=date(2026, 3, 2), end=date(2026, 3, 31))
+    assert totals['incidents'] == 2
+
+
+def test_incremental_refresh_only_rebuilds_changed_days(app, user, incidents):
+    """A refresh recomputes the days of changed incidents and leaves other days alone."""
+    # Age the existing incidents past the refresh overlap and corrupt an
+    # untouched day, so a rebuild of it would be visible
+    db.session.execute(db.update(Incident).values(updated_at=REPORTED))
+    untouched = (date(2026, 3, 2), 'electrical', 'Pump Station A', 'Building 1')
+    db.session.get(IncidentAnalyticsDay, untouched).downtime_minutes = 999
+    db.session.commit()
+
+    incident = Incident.query.filter_by(category='electrical', resolved_at=None).one()
+    incident.status = 'resolved'
+    incident.resolved_at = incident.date_reported + timedelta(minutes=60)
+    add_incident(user, days=40, resolve_minutes=10)
+
+    with QueryCounter() as counter:
+        rows = refresh_analytics()
+    db.session.commit()
+    assert rows == 2
+    assert counter.count <= 8
+
+    totals, _ = analytics_report()
+    assert totals['resolved'] == 6
+    assert db.session.get(IncidentAnalyticsDay, untouched).downtime_minutes == 999
+
+    refresh_analytics(full=True)
+    db.session.commit()
+    assert analytics_report()[0]['downtime_minutes'] == 225
+
+
+def test_incremental_refresh_covers_deleted_and_moved_incidents(app, incidents):
+    """Days that lose an incident to a delete or a moved report date are rebuilt."""
+    db.session.execute(db.update(Incident).values(updated_at=REPORTED))
+    db.session.commit()
+
+    db.session.delete(Incident.query.filter_by(equipment='Conveyor #3').one())
+    moved = Incident.query.filter_by(category='electrical', resolved_at=None).one()
+    moved.date_reported = REPORTED + timedelta(days=10)
+    db.session.commit()
+    assert {row.day for row in IncidentAnalyticsStaleDay.query} == {date(2026, 3, 3), date(2026, 4, 1)}
+
+    refresh_analytics()
+    db.session.commit()
+    assert IncidentAnalyticsStaleDay.query.count() == 0
+    _, groups = analytics_report('month')
+    assert [(g['month'], g['incidents']) for g in groups] == [('2026-03', 4)]
+    totals, _ = analytics_report(start=date(2026, 3, 3), end=date(2026, 3, 3))
+    assert totals['incidents'] == 0
+    assert analytics_report(start=date(2026, 3, 11), end=date(2026, 3, 11))[0]['incidents'] == 1
+
+
+def test_api_analytics(client, incidents):
+    """The endpoint serves totals and breakdowns and rejects unknown dimensions."""
+    data = client.get('/api/analytics').get_json()
+    assert data['totals']['incidents'] == 5 and data['refreshed_at']
+    assert 'groups' not in data
+
+    data = client.get('/api/analytics/equipment?from=2026-04-01').get_json()
+    assert data['from'] == '2026-04-01'
+    assert [group['equipment'] for group in data['groups']] == ['Conveyor #3']
+    assert data['groups'][0]['mttr_minutes']['mean'] == 600.0
+
+    assert client.get('/api/analytics?by=location').get_json()['groups'][0]['location']
+    assert client.get('/api/analytics/reporter').status_code == 400
+    assert client.get('/api/analytics?by=reporter').status_code == 400
+    assert client.get('/api/analytics?from=2026-13-01').status_code == 400
+    assert client.get('/api/analytics/equipment?to=yesterday').status_code == 400
+
+
+def test_refresh_analytics_command(app, incidents):
+    """The CLI command rebuilds the rollup."""
+    IncidentAnalyticsDay.query.delete()
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['refresh-analytics', '--full'])
+    assert 'Wrote 4 daily row(s)' in result.output
+    assert analytics_report()[0]['incidents'] == 5
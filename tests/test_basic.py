@@ -3,20 +3,9 @@ Basic tests for the Incident Management System.
 """
 
 import pytest
-from extensions import create_app, db
 from models import User, Incident
 
 
-@pytest.fixture
-def app():
-    """Create application for testing."""
-    app = create_app('testing')
-    with app.app_context():
-        db.create_all()
-        yield app
-        db.drop_all()
-
-
 @pytest.fixture
 def client(app):
     """Create test client."""
@@ -0,0 +1,113 @@
+"""
+Tests for ETag / Last-Modified handling on incident pages and the stats API.
+"""
+
+import pytest
+from extensions import db
+from models import User, Incident, Part, incident_parts
+from query_counter import QueryCounter
+
+
+@pytest.fixture
+def incident(app):
+    """Create a reporter and one incident."""
+    user = User(username='reporter', email='reporter@example.com', first_name='Test', last_name='Reporter')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.flush()
+    incident = Incident(title='Pump failure', description='Pump stopped responding',
+                        equipment='Pump Station A', location='Building 1', severity='medium',
+                        category='mechanical', reporter_id=user.id)
+    db.session.add(incident)
+    db.session.commit()
+    return incident
+
+
+@pytest.fixture
+def client(app, incident):
+    """Create a logged-in test client with no pending flash messages."""
+    client = app.test_client()
+    client.post('/auth/login', data={'username': 'reporter', 'password': 'password'})
+    return client
+
+
+@pytest.mark.parametrize('path', ['/incident/{id}', '/incidents', '/api/stats'])
+def test_etag_round_trip(app, client, incident, path):
+    """A matching If-None-Match gets an empty 304 without rendering the page."""
+    url = path.format(id=incident.id)
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert response.headers['Last-Modified']
+
+    with app.app_context(), QueryCounter() as counter:
+        response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    # Validators only: no incident rows or part rows are fetched
+    assert not any('incidents.title' in sql for sql in counter.statements)
+
+
+def test_last_modified_round_trip(client, incident):
+    """A matching If-Modified-Since gets a 304."""
+    url = f'/incident/{incident.id}'
+    last_modified = client.get(url).headers['Last-Modified']
+    assert client.get(url, headers={'If-Modified-Since': last_modified}).status_code == 304
+
+
+def test_changes_invalidate_etag(app, client, incident):
+    """Updating the incident changes the detail, list and stats validators."""
+    urls = [f'/incident/{incident.id}', '/incidents', '/api/stats']
+    etags = {url: client.get(url).headers['ETag'] for url in urls}
+
+    response = client.post(f'/incident/{incident.id}/update', data={'status': 'resolved'})
+    assert response.status_code == 302
+
+    # The redirect target renders the flash message and must not be cacheable
+    response = client.get(f'/incident/{incident.id}')
+    assert b'updated successfully' in response.data
+    assert 'ETag' not in response.headers
+
+    for url in urls:
+        response = client.get(url, headers={'If-None-Match': etags[url]})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etags[url]
+
+
+def test_part_and_reporter_changes_invalidate_detail_etag(app, client, incident):
+    """Editing an attached part or renaming the reporter changes the detail ETag."""
+    part = Part(part_number='P-1', name='Bearing', current_stock=5)
+    db.session.add(part)
+    db.session.flush()
+    db.session.execute(incident_parts.insert(), {'incident_id': incident.id, 'part_id': part.id})
+    db.session.commit()
+
+    url = f'/incident/{incident.id}'
+    etag = client.get(url).headers['ETag']
+    part.name = 'Roller bearing'
+    db.session.commit()
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert b'Roller bearing' in response.data
+
+    etag = response.headers['ETag']
+    incident.reporter.first_name = 'Renamed'
+    db.session.commit()
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert b'Renamed' in response.data
+
+
+def test_etag_varies_by_user(app, client, incident):
+    """HTML pages carry a different ETag for a different user."""
+    url = f'/incident/{incident.id}'
+    etag = client.get(url).headers['ETag']
+
+    other = User(username='other', email='other@example.com', first_name='O', last_name='Ther', role='admin')
+    other.set_password('password')
+    db.session.add(other)
+    db.session.commit()
+
+    other_client = app.test_client()
+    other_client.post('/auth/login', data={'username': 'other', 'password': 'password'})
+    assert other_client.get(url, headers={'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,121 @@
+"""
+Tests for the synthetic data generator.
+"""
+
+import pytest
+from collections import Counter
+from datetime import datetime
+from extensions import db
+from models import User, Incident, Engineer, Part, incident_parts
+from data_seeder import DataSeeder, SeedPlan, parse_size, plan_for_target
+from incident_stats import verify_incident_stats
+from analytics import analytics_report
+from parts_cache import parts_cache_version
+
+NOW = datetime(2024, 6, 30, 23, 59, 59)
+PLAN = SeedPlan(incidents=600, parts=40, engineers=5, users=12)
+
+
+def seed(**options):
+    options.setdefault('now', NOW)
+    options.setdefault('batch_size', 250)
+    return DataSeeder(PLAN, **options).run()
+
+
+def snapshot():
+    return db.session.query(
+        Incident.title, Incident.severity, Incident.status, Incident.date_reported, Incident.resolved_at
+    ).order_by(Incident.id).all()
+
+
+def test_seeds_plan_with_bulk_inserts(app):
+    """Every table gets the planned rows and the rollup matches."""
+    version = parts_cache_version()
+    seed()
+
+    assert Incident.query.count() == 600
+    assert Part.query.count() == 40
+    assert Engineer.query.count() == 5
+    assert User.query.count() == 12
+    assert db.session.query(incident_parts).count() > 0
+    assert verify_incident_stats() == []
+    assert parts_cache_version() > version
+
+
+def test_distributions_are_realistic(app):
+    """Severity is skewed, old incidents are resolved and part usage is uneven."""
+    seed()
+
+    severities = Counter(severity for severity, in db.session.query(Incident.severity))
+    assert severities['low'] > severities['high'] > severities['critical']
+
+    resolved = Incident.query.filter(Incident.status.in_(['resolved', 'closed'])).all()
+    assert len(resolved) > 400
+    assert all(incident.resolved_at > incident.date_reported for incident in resolved)
+    assert all(incident.resolved_at is None for incident in Incident.query.filter_by(status='open'))
+    assert max(incident.date_reported for incident in Incident.query) <= NOW
+
+    usage = Counter(part_id for part_id, in db.session.query(incident_parts.c.part_id))
+    counts = sorted(usage.values(), reverse=True)
+    assert counts[0] > 5 * counts[-1]
+
+
+def test_same_seed_same_data(app):
+    """Reseeding a fresh database with the same seed reproduces the data exactly."""
+    seed(seed=7)
+    first = snapshot()
+
+    db.drop_all()
+    db.create_all()
+    seed(seed=7, batch_size=100)
+    assert snapshot() == first
+
+    db.drop_all()
+    db.create_all()
+    seed(seed=8)
+    assert snapshot() != first
+
+
+def test_reseeding_appends(app):
+    """Seeding twice keeps unique fields unique."""
+    seed()
+    seed(seed=1)
+    assert Incident.query.count() == 1200
+    assert Part.query.count() == 80
+
+
+def test_target_size_scaling():
+    """Sizes parse with suffixes and scale the rest of the plan."""
+    assert parse_size('250k') == 250000
+    assert parse_size('2m') == 2000000
+    plan = plan_for_target(parse_size('1m'))
+    assert plan == SeedPlan(incidents=1000000, parts=2000, engineers=1000, users=5000)
+
+
+def test_seed_command(app):
+    """The seed-data CLI command seeds a small target size."""
+    result = app.test_cli_runner().invoke(args=['seed-data', '--target-size', '1k', '--end-date', '2024-06-30'])
+    assert result.exit_code == 0
+    assert 'Seeded database' in result.output
+    assert Incident.query.count() == 1000
+
+
+def test_seed_command_rejects_empty_window(app):
+    """Incidents need at least one day to be spread over."""
+    result = app.test_cli_runner().invoke(args=['seed-data', '--target-size', '10', '--days', '0'])
+    assert result.exit_code == 2
+    assert "Invalid value for '--days'" in result.output
+    with pytest.raises(ValueError):
+        DataSeeder(SeedPlan(incidents=1, parts=1, engineers=1, users=1), days=0)
+
+
+def test_full_seed_command_refreshes_analytics(app):
+    """The legacy seed-data command takes the same options and fills the analytics rollup."""
+    from cli_commands_full import seed_data
+
+    result = app.test_cli_runner().invoke(seed_data, ['--count', '50', '--days', '30', '--seed', '7'])
+    assert 'Rebuilt the analytics rollup' in result.output
+    assert 'Total incidents: 50' in result.output
+    assert analytics_report()[0]['incidents'] == Incident.query.count() == 50
+
+    assert app.test_cli_runner().invoke(seed_data, ['--count', '10', '--days', '0']).exit_code == 2
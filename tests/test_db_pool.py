@@ -0,0 +1,103 @@
+"""
+Tests for connection pool configuration and pool metrics.
+"""
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, StaticPool
+import config
+from extensions import create_app, db
+from db_pool import TimedQueuePool, apply_pool_config, pool_options, pool_status
+
+POOL_CONFIG = {
+    'DB_POOL_SIZE': 8, 'DB_MAX_OVERFLOW': 4, 'DB_POOL_TIMEOUT': 10,
+    'DB_POOL_RECYCLE': 600, 'DB_POOL_PRE_PING': True, 'DB_STATEMENT_TIMEOUT': 15000,
+}
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Create a metrics-enabled application on a database file with a one-connection pool."""
+    monkeypatch.setattr(config.TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "ims.db"}')
+    monkeypatch.setattr(config.TestingConfig, 'METRICS_ENABLED', True)
+    monkeypatch.setattr(config.TestingConfig, 'DB_POOL_SIZE', 1)
+    monkeypatch.setattr(config.TestingConfig, 'DB_MAX_OVERFLOW', 0)
+    monkeypatch.setattr(config.TestingConfig, 'DB_POOL_TIMEOUT', 1)
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
+def test_pool_options_for_postgresql():
+    """Direct PostgreSQL connections get a sized, pinged, recycled pool and a statement timeout."""
+    options = pool_options(POOL_CONFIG, 'postgresql://ims@db/ims')
+    assert options == {
+        'poolclass': TimedQueuePool, 'pool_size': 8, 'max_overflow': 4, 'pool_timeout': 10,
+        'pool_recycle': 600, 'pool_pre_ping': True,
+        'connect_args': {'options': '-c statement_timeout=15000'},
+    }
+
+
+def test_pool_options_for_pgbouncer():
+    """Behind PgBouncer the app keeps no pool and sends no startup options."""
+    assert pool_options({**POOL_CONFIG, 'DB_PGBOUNCER': True}, 'postgresql://ims@pgbouncer/ims') == \
+        {'poolclass': NullPool}
+
+
+def test_pool_options_for_sqlite():
+    """File databases are pooled without PostgreSQL options; in-memory ones are left alone."""
+    options = pool_options(POOL_CONFIG, 'sqlite:////var/lib/ims/ims.db')
+    assert options['poolclass'] is TimedQueuePool and 'connect_args' not in options
+    assert pool_options(POOL_CONFIG, 'sqlite:///:memory:') == {}
+
+
+def test_apply_pool_config_covers_binds():
+    """Binds get their own pool options; explicitly configured options win."""
+    app = create_app('testing')
+    app.config.update(POOL_CONFIG, SQLALCHEMY_DATABASE_URI='postgresql://ims@db/ims',
+                      SQLALCHEMY_ENGINE_OPTIONS={'pool_size': 20},
+                      SQLALCHEMY_BINDS={'replica': 'postgresql://ims@replica/ims',
+                                        'cache': {'url': 'sqlite://', 'echo': True}})
+    apply_pool_config(app)
+
+    assert app.config['SQLALCHEMY_ENGINE_OPTIONS']['pool_size'] == 20
+    assert app.config['SQLALCHEMY_ENGINE_OPTIONS']['max_overflow'] == 4
+    assert app.config['SQLALCHEMY_BINDS']['replica']['url'] == 'postgresql://ims@replica/ims'
+    assert app.config['SQLALCHEMY_BINDS']['replica']['pool_size'] == 8
+    assert app.config['SQLALCHEMY_BINDS']['cache'] == {'url': 'sqlite://', 'echo': True}
+
+
+def test_testing_config_keeps_static_pool():
+    """The in-memory testing database keeps its single shared connection."""
+    app = create_app('testing')
+    with app.app_context():
+        assert isinstance(db.engine.pool, StaticPool)
+        assert pool_status(db.engine) is None
+
+
+def test_pool_metrics(app):
+    """Checkout waits, saturation and timeouts show up at /metrics."""
+    client = app.test_client()
+
+    held = db.engine.connect()
+    try:
+        assert pool_status(db.engine) == {'size': 1, 'checked_out': 1, 'checked_in': 0, 'overflow': 0}
+        with pytest.raises(PoolTimeoutError):
+            db.engine.connect()
+        body = client.get('/metrics').get_data(as_text=True)
+    finally:
+        held.close()
+
+    assert 'ims_db_pool_size{bind="default"} 1' in body
+    assert 'ims_db_pool_checked_out{bind="default"} 1' in body
+    assert 'ims_db_pool_overflow{bind="default"} 0' in body
+    assert 'ims_db_pool_timeouts_total{bind="default"} 1' in body
+    assert 'ims_db_pool_wait_seconds_bucket{bind="default",le="5.0"}' in body
+
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'ims_db_pool_checked_out{bind="default"} 0' in body
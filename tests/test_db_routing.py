@@ -0,0 +1,134 @@
+"""
+Tests for read-replica routing.
+
+The primary and the replica are separate database files with different
+incidents, so each test can tell which one a query was answered from.
+"""
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+import config
+from extensions import create_app, db
+from models import User, Incident
+from db_routing import PRIMARY_UNTIL_KEY, replica_reads
+
+
+def add_data(session, title):
+    user = session.get(User, 1)
+    if user is None:
+        user = User(id=1, username='viewer', email='viewer@example.com', first_name='View', last_name='Er',
+                    role='admin')
+        user.set_password('password')
+        session.add(user)
+    session.add(Incident(title=title, description='Pump stopped responding', equipment='Pump Station A',
+                         location='Building 1', severity='high', category='mechanical', reporter_id=1))
+    session.commit()
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Create an application with a primary and one replica database file."""
+    monkeypatch.setattr(config.TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "primary.db"}')
+    monkeypatch.setattr(config.TestingConfig, 'REPLICA_DATABASE_URLS', [f'sqlite:///{tmp_path / "replica.db"}'])
+    app = create_app('testing')
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        replica = db.engines['replica_1']
+        db.create_all()
+        db.metadata.create_all(replica)
+        add_data(db.session, 'Primary only incident')
+        with Session(replica) as session:
+            add_data(session, 'Replica only incident')
+        db.session.remove()
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.metadata.drop_all(replica)
+        for engine in db.engines.values():
+            engine.dispose()
+    # init_app gave the shared db an (empty) metadata for the bind; later apps have no such bind
+    db.metadatas.pop('replica_1', None)
+
+
+@pytest.fixture
+def client(app):
+    """Create a logged-in test client that has not written anything recently."""
+    client = app.test_client()
+    with app.app_context():
+        client.post('/auth/login', data={'username': 'viewer', 'password': 'password'})
+    with client.session_transaction() as session:
+        session.pop(PRIMARY_UNTIL_KEY, None)
+    return client
+
+
+def get(app, client, url):
+    with app.app_context():
+        return client.get(url)
+
+
+def test_replica_binds_registered(app):
+    """REPLICA_DATABASE_URLS become replica_N binds next to the primary."""
+    assert set(db.engines) == {None, 'replica_1'}
+
+
+@pytest.mark.parametrize('url', ['/incidents', '/dashboard', '/search?q=incident'])
+def test_read_only_views_use_replica(app, client, url):
+    """Listing views are answered from the replica."""
+    page = get(app, client, url).get_data(as_text=True)
+    # Search highlights the matched word, so only match the start of the titles
+    assert 'Replica only' in page
+    assert 'Primary only' not in page
+
+
+def test_api_stats_uses_replica(app, client):
+    """The stats API reads the replica's rollup."""
+    with app.app_context():
+        add_data(db.session, 'Second primary incident')
+    assert get(app, client, '/api/stats').get_json()['total_incidents'] == 1
+
+
+def test_read_after_write_stays_on_primary(app, client):
+    """After creating an incident the redirect to its detail page reads the primary."""
+    with app.app_context():
+        response = client.post('/report', data={'equipment': 'Conveyor #3', 'location': 'Hall 1',
+                                                'description': 'Belt stopped under load'})
+    assert response.status_code == 302
+    detail_url = response.headers['Location']
+
+    assert get(app, client, detail_url).status_code == 200
+    assert 'Primary only incident' in get(app, client, '/incidents').get_data(as_text=True)
+
+    # Once the client is no longer pinned, the replica (which never got the row) answers
+    with client.session_transaction() as session:
+        session.pop(PRIMARY_UNTIL_KEY)
+    assert get(app, client, detail_url).status_code == 404
+
+
+def test_session_that_wrote_reads_primary(app):
+    """Inside replica_reads(), reads after a flush see the session's own writes."""
+    with app.app_context(), replica_reads():
+        assert db.session.scalars(select(Incident.title)).all() == ['Replica only incident']
+        assert db.session.scalars(select(Incident.title).with_for_update()).all() == ['Primary only incident']
+
+        add_data(db.session, 'New primary incident')
+        titles = db.session.scalars(select(Incident.title).order_by(Incident.id)).all()
+        assert titles == ['Primary only incident', 'New primary incident']
+
+
+def test_outside_replica_reads_uses_primary(app):
+    """Code that does not opt in is unaffected by the replica."""
+    with app.app_context():
+        assert [incident.title for incident in Incident.query.all()] == ['Primary only incident']
+
+
+def test_db_stats_command_uses_replica(app):
+    """The db-stats CLI report reads from the replica."""
+    from cli_commands_full import db_stats
+
+    with app.app_context():
+        add_data(db.session, 'Second primary incident')
+        db.session.remove()
+        result = app.test_cli_runner().invoke(db_stats)
+    assert '#1: Replica only incident' in result.output
+    assert 'Total: 1' in result.output
@@ -0,0 +1,77 @@
+"""
+Tests for the incident detail loader and page.
+"""
+
+import pytest
+from extensions import db
+from models import User, Incident, Part, incident_parts
+from incident_queries import load_incident_detail
+from query_counter import assert_max_queries
+
+
+@pytest.fixture
+def incident(app):
+    """Create an incident with a reporter, an assignee and three parts."""
+    reporter = User(username='reporter', email='reporter@example.com', first_name='Rita', last_name='Reporter')
+    reporter.set_password('password')
+    assignee = User(username='tech', email='tech@example.com', first_name='Tom', last_name='Tech')
+    db.session.add_all([reporter, assignee])
+    db.session.flush()
+
+    incident = Incident(
+        title='Pump failure', description='Pump stopped\nPressure lost',
+        equipment='Pump Station A', location='Building 1', severity='high',
+        category='mechanical', reporter_id=reporter.id, assigned_to_id=assignee.id
+    )
+    db.session.add(incident)
+    parts = [Part(part_number=f'P-{i}', name=f'Seal kit {i}', category='hydraulic') for i in range(3)]
+    db.session.add_all(parts)
+    db.session.flush()
+
+    db.session.execute(incident_parts.insert(), [
+        {'incident_id': incident.id, 'part_id': parts[0].id, 'quantity_used': 4, 'status': 'installed', 'notes': 'Both sides'},
+        {'incident_id': incident.id, 'part_id': parts[1].id, 'quantity_used': 1, 'status': 'ordered', 'notes': None},
+        {'incident_id': incident.id, 'part_id': parts[2].id, 'quantity_used': 2, 'status': 'required', 'notes': None},
+    ])
+    db.session.commit()
+    return incident
+
+
+def test_loader_returns_view_model(app, incident):
+    """The loader returns parts with their usage columns in two queries."""
+    incident_id = incident.id
+    db.session.expunge_all()
+
+    with assert_max_queries(2):
+        detail = load_incident_detail(incident_id)
+        assert detail.incident.reporter.first_name == 'Rita'
+        assert detail.incident.assigned_to.first_name == 'Tom'
+
+    assert detail.parts_count == 3
+    usage = detail.parts[0]
+    assert usage.part.part_number == 'P-0'
+    assert (usage.quantity_used, usage.status, usage.notes) == (4, 'installed', 'Both sides')
+
+
+def test_detail_page_query_budget(app, incident):
+    """The detail page renders in a fixed number of queries."""
+    url = f'/incident/{incident.id}'
+    client = app.test_client()
+    client.post('/auth/login', data={'username': 'reporter', 'password': 'password'})
+
+    # Fresh app context: the request gets its own session and identity map.
+    # User identity, ETag validators, incident with people, parts.
+    with app.app_context(), assert_max_queries(4):
+        response = client.get(url)
+
+    assert response.status_code == 200
+    assert b'Selected Parts (3)' in response.data
+    assert b'Status: Installed' in response.data
+    assert b'Pump stopped<br>\nPressure lost' in response.data
+
+
+def test_missing_incident_is_404(app, incident):
+    """Unknown incident ids return 404."""
+    client = app.test_client()
+    client.post('/auth/login', data={'username': 'reporter', 'password': 'password'})
+    assert client.get('/incident/9999').status_code == 404
@@ -0,0 +1,124 @@
+"""
+Tests for bulk incident import.
+"""
+
+import io
+import json
+import pytest
+from extensions import db
+from models import User, Incident, Part, incident_parts
+from incident_import import import_incidents
+from incident_export import iter_export
+from incident_stats import get_incident_stats, verify_incident_stats
+from incident_search import build_search_query
+from query_counter import QueryCounter
+
+CSV_HEADER = 'title,description,equipment,location,severity,category,status,reporter,parts\n'
+
+
+@pytest.fixture
+def reporter(app):
+    """Create a reporter and two parts."""
+    user = User(username='reporter', email='reporter@example.com', first_name='Test', last_name='Reporter')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.add_all([
+        Part(name='Bearing', part_number='BRG-001', category='mechanical'),
+        Part(name='Fuse', part_number='FUS-002', category='electrical'),
+    ])
+    db.session.commit()
+    return user
+
+
+def csv_rows(count, **overrides):
+    values = {
+        'title': 'Conveyor jam', 'description': 'Belt stopped under load',
+        'equipment': 'Conveyor #3', 'location': 'Hall 1', 'severity': 'high',
+        'category': 'mechanical', 'status': 'open', 'reporter': 'reporter', 'parts': 'BRG-001;FUS-002',
+    }
+    values.update(overrides)
+    line = ','.join(values[name] for name in CSV_HEADER.strip().split(',')) + '\n'
+    return io.StringIO(CSV_HEADER + line * count)
+
+
+def test_csv_import_in_batches(app, reporter):
+    """Rows are inserted a batch per statement, with parts and rollup counts."""
+    with QueryCounter() as counter:
+        stats = import_incidents(csv_rows(25), 'csv', batch_size=10, commit_every=2)
+
+    assert (stats.read, stats.imported, stats.error_count) == (25, 25, 0)
+    assert Incident.query.count() == 25
+    assert db.session.query(incident_parts).count() == 50
+    # Three incident batches, not one INSERT per row
+    assert sum(sql.startswith('INSERT INTO incidents') for sql in counter.statements) == 3
+
+    assert get_incident_stats()['open'] == 25
+    assert verify_incident_stats() == []
+    assert build_search_query('conveyor').query.count() == 25
+
+
+def test_rows_validated_with_form_rules(app, reporter):
+    """Invalid rows are skipped with the form's messages; valid ones still import."""
+    source = io.StringIO(CSV_HEADER + ''.join([
+        'Conveyor jam,Belt stopped under load,Conveyor #3,Hall 1,high,mechanical,open,reporter,\n',
+        'Jam,Belt stopped under load,Conveyor #3,Hall 1,high,mechanical,open,reporter,\n',
+        'Conveyor jam,Too short,Conveyor #3,Hall 1,high,mechanical,open,reporter,\n',
+        'Conveyor jam,Belt stopped under load,Conveyor #3,Hall 1,extreme,mechanical,open,reporter,\n',
+        'Conveyor jam,Belt stopped under load,Conveyor #3,Hall 1,high,mechanical,open,nobody,\n',
+        'Conveyor jam,Belt stopped under load,Conveyor #3,Hall 1,high,mechanical,open,reporter,XYZ\n',
+    ]))
+    stats = import_incidents(source, 'csv')
+
+    assert (stats.imported, stats.error_count) == (1, 5)
+    messages = dict(stats.errors)
+    assert messages[3] == 'Title must be between 5 and 200 characters.'
+    assert messages[4] == 'Description must be between 10 and 2000 characters.'
+    assert messages[5] == 'severity: Not a valid choice.'
+    assert 'Unknown user' in messages[6]
+    assert 'Unknown part' in messages[7]
+
+
+def test_jsonl_import_simple_form_rows(app, reporter):
+    """Rows shaped like IncidentForm get the report routes' title and defaults."""
+    lines = [
+        json.dumps({'equipment': 'Pump A', 'location': 'Basement', 'description': 'Pump leaking oil',
+                    'reporter': 'reporter@example.com', 'parts': ['FUS-002']}),
+        '{not json',
+        json.dumps({'equipment': 'Pump B', 'location': 'Basement', 'description': 'Pump leaking oil'}),
+    ]
+    stats = import_incidents(io.StringIO('\n'.join(lines)), 'jsonl', default_reporter='reporter')
+
+    assert (stats.imported, stats.error_count) == (2, 1)
+    assert stats.errors[0][0] == 2
+    incident = Incident.query.filter_by(equipment='Pump A').one()
+    assert (incident.title, incident.severity, incident.category, incident.priority) == \
+        ('Incident at Basement', 'medium', 'other', 'medium')
+    assert [part.part_number for part in incident.parts] == ['FUS-002']
+
+
+def test_dry_run_writes_nothing(app, reporter):
+    """A dry run validates every row without inserting."""
+    stats = import_incidents(csv_rows(5), 'csv', dry_run=True)
+    assert stats.imported == 5
+    assert Incident.query.count() == 0
+
+
+def test_export_round_trip(app, reporter):
+    """An NDJSON export imports back as the same incidents."""
+    import_incidents(csv_rows(3, parts=''), 'csv')
+    exported = ''.join(iter_export('ndjson'))
+
+    stats = import_incidents(io.StringIO(exported), 'jsonl')
+    assert (stats.imported, stats.error_count) == (3, 0)
+    assert Incident.query.filter_by(title='Conveyor jam').count() == 6
+
+
+def test_import_command(app, reporter, tmp_path):
+    """The import-incidents CLI command infers the format and reports progress."""
+    source = tmp_path / 'legacy.csv'
+    source.write_text(csv_rows(4).getvalue(), encoding='utf-8')
+
+    result = app.test_cli_runner().invoke(args=['import-incidents', str(source), '--batch-size', '2'])
+    assert result.exit_code == 0
+    assert 'Imported 4 of 4 row(s)' in result.output
+    assert Incident.query.count() == 4
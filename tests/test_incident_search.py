@@ -0,0 +1,99 @@
+"""
+Tests for the incident full-text search index.
+"""
+
+import pytest
+from flask_migrate import downgrade, stamp, upgrade
+from sqlalchemy.exc import OperationalError
+from extensions import db
+from models import User, Incident
+from incident_search import build_search_query, to_search_hits
+
+
+@pytest.fixture
+def user(app):
+    """Create a reporter with a few searchable incidents."""
+    user = User(username='reporter', email='reporter@example.com', first_name='Test', last_name='Reporter')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.flush()
+
+    db.session.add_all([
+        Incident(title='Hydraulic pump failure', description='Pressure dropped on line 2',
+                 equipment='Pump Station A', location='Building 1', severity='high',
+                 category='mechanical', reporter_id=user.id),
+        Incident(title='Conveyor jam', description='Belt stopped after the pump upstream tripped',
+                 equipment='Conveyor Belt #3', location='Warehouse B', severity='low',
+                 category='mechanical', reporter_id=user.id),
+        Incident(title='Label printer offline', description='Printer <b>offline</b> again',
+                 equipment='Zebra printer', location='Packing', severity='low',
+                 category='electrical', reporter_id=user.id, root_cause='Loose network cable'),
+    ])
+    db.session.commit()
+    return user
+
+
+def search_ids(text):
+    search = build_search_query(text)
+    return [row.Incident.id for row in search.query.order_by(*[c.desc() for c in search.columns])]
+
+
+def test_search_ranks_title_matches_first(app, user):
+    """Matches in the title outrank matches in the description."""
+    pump = Incident.query.filter_by(title='Hydraulic pump failure').one()
+    conveyor = Incident.query.filter_by(title='Conveyor jam').one()
+    assert search_ids('pump') == [pump.id, conveyor.id]
+
+
+def test_search_covers_extra_columns_and_prefixes(app, user):
+    """Equipment, root cause and word prefixes are searchable."""
+    printer = Incident.query.filter_by(title='Label printer offline').one()
+    assert search_ids('zebra') == [printer.id]
+    assert search_ids('netw') == [printer.id]
+    assert search_ids('"') == []
+
+
+def test_index_stays_in_sync_on_write(app, user):
+    """Updates and deletes are reflected in the index."""
+    printer = Incident.query.filter_by(title='Label printer offline').one()
+    printer.corrective_action = 'Replaced the ethernet cable'
+    db.session.commit()
+    assert search_ids('ethernet') == [printer.id]
+
+    db.session.delete(printer)
+    db.session.commit()
+    assert search_ids('ethernet') == []
+
+
+def test_upgrade_indexes_existing_incidents(app, user):
+    """Upgrading a database that predates the search index creates and fills it."""
+    stamp()
+    downgrade(revision='base')
+    db.session.commit()
+    with pytest.raises(OperationalError):
+        search_ids('pump')
+    db.session.rollback()
+
+    upgrade()
+    assert len(search_ids('pump')) == 2
+    assert len(search_ids('cable')) == 1
+
+
+def test_snippets_are_escaped_and_highlighted(app, user):
+    """Highlighting happens server-side and escapes incident text."""
+    search = build_search_query('offline')
+    hits = to_search_hits(search.query.all(), 'offline')
+    assert len(hits) == 1
+    assert str(hits[0].title_html) == 'Label printer <mark>offline</mark>'
+    assert '&lt;b&gt;<mark>offline</mark>&lt;/b&gt;' in str(hits[0].snippet_html)
+
+
+def test_search_route(app, user):
+    """The search page renders highlighted results."""
+    client = app.test_client()
+    client.post('/auth/login', data={'username': 'reporter', 'password': 'password'})
+
+    response = client.get('/search?q=pump')
+    assert response.status_code == 200
+    assert b'<strong>2</strong> result(s)' in response.data
+    assert b'<mark>pump</mark>' in response.data
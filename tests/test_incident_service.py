@@ -0,0 +1,79 @@
+"""
+Tests for the shared incident creation service.
+"""
+
+import pytest
+from extensions import db
+from models import User, Incident, Part, incident_parts
+from incident_service import create_incident
+from query_counter import QueryCounter
+
+
+@pytest.fixture
+def user(app):
+    """Create a reporter and a small parts catalog."""
+    user = User(username='reporter', email='reporter@example.com', first_name='Test', last_name='Reporter')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.add_all([Part(part_number=f'P-{i}', name=f'Part {i}') for i in range(1, 11)])
+    db.session.commit()
+    return user
+
+
+def incident_fields(user):
+    return {
+        'title': 'Pump failure', 'description': 'Pump stopped responding',
+        'equipment': 'Pump Station A', 'location': 'Building 1',
+        'severity': 'medium', 'category': 'mechanical', 'reporter_id': user.id
+    }
+
+
+def attached_part_ids(incident_id):
+    rows = db.session.query(incident_parts.c.part_id).filter_by(incident_id=incident_id)
+    return sorted(part_id for (part_id,) in rows)
+
+
+def test_parts_attached_with_constant_queries(app, user):
+    """Attaching 2 or 8 parts costs the same number of statements."""
+    fields = incident_fields(user)
+
+    with QueryCounter() as few:
+        create_incident(part_ids=['1', '2'], **fields)
+    with QueryCounter() as many:
+        incident, parts = create_incident(part_ids=[str(i) for i in range(1, 9)], **fields)
+    db.session.commit()
+
+    assert few.count == many.count
+    assert [name for _, name in parts] == [f'Part {i}' for i in range(1, 9)]
+    assert attached_part_ids(incident.id) == list(range(1, 9))
+
+
+def test_unknown_and_duplicate_parts_are_ignored(app, user):
+    """Unknown ids, junk values and duplicates do not create association rows."""
+    incident, parts = create_incident(part_ids=[3, '3', 999, 'abc'], **incident_fields(user))
+    db.session.commit()
+
+    assert parts == [(3, 'Part 3')]
+    assert attached_part_ids(incident.id) == [3]
+
+
+@pytest.mark.parametrize('url, data', [
+    ('/incident/new', {'parts_dropdown': ['2', '5']}),
+    ('/incident/new/simple', {'parts': ['2', '5']}),
+    ('/report', {'parts_dropdown': ['2', '5']}),
+    ('/incident/new/enhanced', {'title': 'Pump failure', 'severity': 'high', 'category': 'mechanical',
+                                'priority': 'high', 'parts_select': ['2', '5']}),
+])
+def test_create_routes_attach_parts(app, user, url, data):
+    """Every create route attaches the selected parts."""
+    client = app.test_client()
+    client.post('/auth/login', data={'username': 'reporter', 'password': 'password'})
+
+    form = {'equipment': 'Pump Station A', 'location': 'Building 1',
+            'description': 'Pump stopped responding'}
+    form.update(data)
+    response = client.post(url, data=form)
+
+    assert response.status_code == 302
+    incident = Incident.query.one()
+    assert attached_part_ids(incident.id) == [2, 5]
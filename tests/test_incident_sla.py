@@ -0,0 +1,106 @@
+"""
+Tests for stored SLA deadlines and the overdue / due-soon work queue.
+"""
+
+from datetime import datetime, timedelta
+import pytest
+from flask_migrate import downgrade, stamp, upgrade
+from extensions import db
+from models import Incident, SLA_HOURS
+from incident_service import bulk_insert_incidents
+from incident_queries import MAX_DUE_WITHIN_HOURS
+from query_counter import QueryCounter
+
+
+def add_incident(user, title, severity='medium', hours_ago=0, status='open'):
+    incident = Incident(title=title, description='Pump stopped responding', equipment='Pump Station A',
+                        location='Building 1', severity=severity, category='mechanical', status=status,
+                        reporter_id=user.id, date_reported=datetime.utcnow() - timedelta(hours=hours_ago))
+    db.session.add(incident)
+    db.session.commit()
+    return incident
+
+
+def test_sla_due_at_set_on_create_and_severity_change(app, user):
+    """The deadline follows the severity's SLA hours from the report time."""
+    incident = add_incident(user, 'Pump failure', severity='low')
+    assert incident.sla_due_at == incident.date_reported + timedelta(hours=SLA_HOURS['low'])
+
+    incident.severity = 'critical'
+    db.session.commit()
+    assert incident.sla_due_at == incident.date_reported + timedelta(hours=SLA_HOURS['critical'])
+
+    incident.status = 'in_progress'
+    db.session.commit()
+    assert incident.sla_due_at == incident.date_reported + timedelta(hours=SLA_HOURS['critical'])
+
+
+def test_bulk_insert_sets_sla_due_at(app, user):
+    """Core bulk inserts fill in the deadline the mapper events would."""
+    reported = datetime(2026, 1, 1, 8, 0)
+    bulk_insert_incidents([
+        {'title': 'Imported', 'description': 'From CSV', 'equipment': 'Press', 'location': 'Hall 2',
+         'severity': severity, 'category': 'mechanical', 'reporter_id': user.id, 'date_reported': reported}
+        for severity in ('high', 'low')
+    ])
+    db.session.commit()
+
+    due = db.session.execute(db.select(Incident.severity, Incident.sla_due_at).order_by(Incident.id)).all()
+    assert due == [('high', reported + timedelta(hours=8)), ('low', reported + timedelta(hours=72))]
+
+
+def test_is_overdue_uses_stored_deadline(app, user):
+    """is_overdue compares against the stored deadline."""
+    assert add_incident(user, 'Late', severity='critical', hours_ago=3).is_overdue()
+    assert not add_incident(user, 'On time', severity='low', hours_ago=3).is_overdue()
+
+
+def test_queue_splits_overdue_and_due_soon(app, client, user):
+    """The queue lists active incidents by deadline, split at now."""
+    add_incident(user, 'Critical overdue', severity='critical', hours_ago=3)
+    add_incident(user, 'High overdue', severity='high', hours_ago=10)
+    add_incident(user, 'Critical due soon', severity='critical', hours_ago=1)
+    add_incident(user, 'Medium due later', severity='medium', hours_ago=1)
+    add_incident(user, 'Resolved overdue', severity='critical', hours_ago=5, status='resolved')
+
+    with QueryCounter() as counter:
+        data = client.get('/api/incidents/queue').get_json()
+    assert counter.count <= 2
+
+    assert [item['title'] for item in data['overdue']] == ['High overdue', 'Critical overdue']
+    assert [item['title'] for item in data['due_soon']] == ['Critical due soon']
+    assert data['overdue'][0]['minutes_remaining'] < 0 < data['due_soon'][0]['minutes_remaining']
+    assert data['due_within_hours'] == app.config['SLA_DUE_SOON_HOURS']
+
+    data = client.get('/api/incidents/queue?due_within=48&limit=3').get_json()
+    assert [item['title'] for item in data['due_soon']] == ['Critical due soon']
+    data = client.get('/api/incidents/queue?due_within=48').get_json()
+    assert [item['title'] for item in data['due_soon']] == ['Critical due soon', 'Medium due later']
+
+
+def test_queue_rejects_unbounded_look_ahead(app, client, user):
+    """Non-finite look-aheads are rejected and huge ones clamped instead of overflowing."""
+    for value in ('inf', '-inf', 'nan'):
+        assert client.get(f'/api/incidents/queue?due_within={value}').status_code == 400
+
+    response = client.get('/api/incidents/queue?due_within=1e9')
+    assert response.status_code == 200
+    assert response.get_json()['due_within_hours'] == MAX_DUE_WITHIN_HOURS
+    assert client.get('/api/incidents/queue?due_within=-5').get_json()['due_within_hours'] == 0
+
+
+def test_migration_backfills_sla_due_at(app, user):
+    """Upgrading fills in the deadline for incidents created before the column existed."""
+    stamp()
+    downgrade(revision='a1c4e7b20d3f')
+    db.session.commit()
+    db.session.execute(db.text(
+        "INSERT INTO incidents (title, description, equipment, location, severity, category, status, "
+        "reporter_id, date_reported) VALUES ('Old', 'Legacy row', 'Press', 'Hall 2', 'high', 'electrical', "
+        "'open', :reporter, '2026-01-01 08:00:00.000000')"
+    ), {'reporter': user.id})
+    db.session.commit()
+
+    upgrade()
+    db.session.commit()
+    assert db.session.scalar(db.select(Incident.sla_due_at)) == datetime(2026, 1, 1, 16, 0)
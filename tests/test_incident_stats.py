@@ -0,0 +1,126 @@
+"""
+Tests for the incrementally maintained incident_stats rollup.
+"""
+
+import pytest
+from flask_migrate import downgrade, stamp, upgrade
+from extensions import db
+from models import User, Incident, IncidentStat
+from incident_stats import get_incident_stats, rebuild_incident_stats, verify_incident_stats
+
+
+@pytest.fixture
+def user(app):
+    """Create a reporter for test incidents."""
+    user = User(username='reporter', email='reporter@example.com', first_name='Test', last_name='Reporter')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def make_incident(user, **kwargs):
+    """Build an incident with sensible defaults."""
+    fields = {
+        'title': 'Pump failure',
+        'description': 'Pump stopped responding',
+        'equipment': 'Pump Station A',
+        'location': 'Building 1',
+        'severity': 'medium',
+        'category': 'mechanical',
+        'reporter_id': user.id
+    }
+    fields.update(kwargs)
+    return Incident(**fields)
+
+
+def test_insert_updates_rollup(app, user):
+    """Inserting incidents increments the matching counters."""
+    db.session.add_all([
+        make_incident(user),
+        make_incident(user, severity='critical'),
+        make_incident(user, status='resolved', severity='critical')
+    ])
+    db.session.commit()
+
+    stats = get_incident_stats()
+    assert stats['total'] == 3
+    assert stats['open'] == 2
+    assert stats['resolved'] == 1
+    assert stats['by_severity'] == {'medium': 1, 'critical': 2}
+    assert verify_incident_stats() == []
+
+
+def test_status_and_severity_change_moves_counts(app, user):
+    """Updating status or severity moves the incident between counters."""
+    incident = make_incident(user)
+    db.session.add(incident)
+    db.session.commit()
+
+    incident.status = 'in_progress'
+    incident.severity = 'high'
+    db.session.commit()
+
+    stats = get_incident_stats()
+    assert stats['total'] == 1
+    assert stats['open'] == 0
+    assert stats['in_progress'] == 1
+    assert stats['by_severity'].get('medium', 0) == 0
+    assert stats['by_severity']['high'] == 1
+
+    # Unrelated updates leave the rollup alone
+    incident.description = 'Pump restarted but still noisy'
+    db.session.commit()
+    assert get_incident_stats()['in_progress'] == 1
+
+    db.session.delete(incident)
+    db.session.commit()
+    assert get_incident_stats()['total'] == 0
+
+
+def test_rebuild_repairs_drift(app, user):
+    """Rebuilding recomputes counters that drifted from the incidents table."""
+    db.session.add_all([make_incident(user), make_incident(user, severity='low')])
+    db.session.commit()
+
+    IncidentStat.query.delete()
+    db.session.commit()
+    assert len(verify_incident_stats()) == 2
+
+    assert rebuild_incident_stats() == 2
+    db.session.commit()
+    assert verify_incident_stats() == []
+    assert get_incident_stats()['total'] == 2
+
+
+def test_rebuild_stats_command(app, user):
+    """The rebuild-stats CLI command reports and fixes drift."""
+    db.session.add(make_incident(user))
+    db.session.commit()
+    IncidentStat.query.delete()
+    db.session.commit()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['rebuild-stats', '--verify-only'])
+    assert 'mismatched' in result.output
+    assert verify_incident_stats() != []
+
+    result = runner.invoke(args=['rebuild-stats'])
+    assert 'Rebuilt incident_stats' in result.output
+    assert verify_incident_stats() == []
+
+
+def test_migration_creates_and_backfills_rollup(app, user):
+    """Upgrading a database without incident_stats creates and fills the table."""
+    db.session.add_all([make_incident(user), make_incident(user), make_incident(user, status='resolved')])
+    db.session.commit()
+
+    stamp()
+    downgrade(revision='e2a7c4f9b613')
+    db.session.commit()
+    assert 'incident_stats' not in db.inspect(db.engine).get_table_names()
+
+    upgrade()
+    db.session.commit()
+    assert verify_incident_stats() == []
+    assert get_incident_stats()['total'] == 3
@@ -0,0 +1,113 @@
+"""
+Tests for the incident_daily_counts trend rollup and /api/trends.
+"""
+
+from datetime import date, datetime, timedelta
+import pytest
+from extensions import db
+from models import Incident, IncidentDailyCount
+from incident_service import bulk_insert_incidents
+from incident_trends import MAX_TREND_DAYS, backfill_daily_counts, daily_trend, trend_range
+from query_counter import QueryCounter
+
+REPORTED = datetime(2026, 3, 1, 8, 0)
+
+
+def add_incident(user, severity='high', category='mechanical', days=0):
+    incident = Incident(title='Pump failure', description='Pump stopped responding', equipment='Pump Station A',
+                        location='Building 1', severity=severity, category=category, reporter_id=user.id,
+                        date_reported=REPORTED + timedelta(days=days))
+    db.session.add(incident)
+    db.session.commit()
+    return incident
+
+
+def stored_counts():
+    return {(row.day, row.status, row.severity, row.category, row.location): row.count
+            for row in IncidentDailyCount.query.all() if row.count}
+
+
+def test_rollup_follows_inserts_and_changes(app, user):
+    """Inserts, status and severity changes and deletes keep the rollup equal to a backfill."""
+    add_incident(user)
+    add_incident(user, severity='low', days=1)
+    incident = add_incident(user, days=1)
+
+    incident.status = 'resolved'
+    incident.severity = 'critical'
+    db.session.commit()
+    db.session.delete(Incident.query.filter_by(severity='low').one())
+    db.session.commit()
+
+    day = REPORTED.date()
+    assert stored_counts() == {
+        (day, 'open', 'high', 'mechanical', 'Building 1'): 1,
+        (day + timedelta(days=1), 'resolved', 'critical', 'mechanical', 'Building 1'): 1,
+    }
+
+    expected = stored_counts()
+    IncidentDailyCount.query.delete()
+    backfill_daily_counts()
+    db.session.commit()
+    assert stored_counts() == expected
+
+
+def test_bulk_insert_updates_rollup(app, user):
+    """Core bulk inserts add their aggregated counts."""
+    bulk_insert_incidents([
+        {'title': 'Imported', 'description': 'From CSV', 'equipment': 'Press', 'location': 'Hall 2',
+         'severity': 'high', 'category': 'electrical', 'reporter_id': user.id, 'date_reported': REPORTED}
+        for _ in range(3)
+    ])
+    db.session.commit()
+    assert stored_counts() == {(REPORTED.date(), 'open', 'high', 'electrical', 'Hall 2'): 3}
+
+
+def test_daily_trend_series(app, user):
+    """Series are zero-filled per day, split and filtered by dimension, in one query."""
+    add_incident(user)
+    add_incident(user, severity='low')
+    add_incident(user, severity='low', category='electrical', days=2)
+    start = REPORTED.date()
+
+    with QueryCounter() as counter:
+        days, series = daily_trend(start, start + timedelta(days=3), by='severity')
+    assert counter.count == 1
+    assert len(days) == 4
+    assert series == {'high': [1, 0, 0, 0], 'low': [1, 0, 1, 0]}
+
+    _, series = daily_trend(start, start + timedelta(days=3), category='electrical')
+    assert series == {'total': [0, 0, 1, 0]}
+
+
+def test_trend_range_defaults_and_limits():
+    """Ranges default to the last 30 days and are capped at MAX_TREND_DAYS."""
+    today = date(2026, 10, 18)
+    assert trend_range(today=today) == (today - timedelta(days=29), today)
+    assert trend_range(date(2020, 1, 1), today) == (today - timedelta(days=MAX_TREND_DAYS - 1), today)
+    assert trend_range(today, date(2026, 10, 1)) == (date(2026, 10, 1), today)
+
+
+def test_api_trends(app, user, client):
+    """The endpoint returns labelled days and series and rejects unknown dimensions."""
+    add_incident(user)
+
+    data = client.get('/api/trends?from=2026-02-28&to=2026-03-02&by=category').get_json()
+    assert data['days'] == ['2026-02-28', '2026-03-01', '2026-03-02']
+    assert data['series'] == {'mechanical': [0, 1, 0]}
+
+    assert client.get('/api/trends?by=reporter').status_code == 400
+    assert client.get('/api/trends?from=2026-02-30').status_code == 400
+    assert client.get('/api/trends?to=03/02/2026').status_code == 400
+
+
+def test_backfill_trends_command(app, user):
+    """The CLI command rebuilds a date range of the rollup."""
+    add_incident(user)
+    add_incident(user, days=5)
+    IncidentDailyCount.query.delete()
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['backfill-trends', '--start', '2026-03-01', '--end', '2026-03-02'])
+    assert 'Wrote 1 daily count row(s)' in result.output
+    assert list(stored_counts()) == [(REPORTED.date(), 'open', 'high', 'mechanical', 'Building 1')]
@@ -0,0 +1,68 @@
+"""
+Tests that incident list pages cost a constant number of queries.
+"""
+
+import pytest
+from extensions import db
+from models import User, Incident
+from query_counter import QueryCounter, assert_max_queries
+
+
+@pytest.fixture
+def client(app, client):
+    """Warm the logged-in client's cached user identity so counts only cover the page itself."""
+    with app.app_context():
+        client.get('/dashboard')
+    return client
+
+
+def add_incidents(count):
+    """Add incidents, each reported by a different user."""
+    start = User.query.count()
+    for i in range(start, start + count):
+        reporter = User(username=f'reporter{i}', email=f'reporter{i}@example.com',
+                        first_name=f'First{i}', last_name=f'Last{i}')
+        db.session.add(reporter)
+        db.session.flush()
+        db.session.add(Incident(
+            title=f'Pump failure {i}', description='Pump stopped responding',
+            equipment='Pump Station A', location='Building 1', severity='medium',
+            category='mechanical', reporter_id=reporter.id, assigned_to_id=reporter.id
+        ))
+    db.session.commit()
+
+
+def queries_for(app, client, url):
+    # A fresh app context gives the request its own session, as in production
+    with app.app_context(), QueryCounter() as counter:
+        response = client.get(url)
+    assert response.status_code == 200
+    return counter.count
+
+
+@pytest.mark.parametrize('url', ['/incidents', '/search', '/search?q=pump', '/dashboard'])
+def test_list_pages_cost_constant_queries(app, client, url):
+    """Rendering 2 or 15 rows costs the same number of queries."""
+    add_incidents(2)
+    small = queries_for(app, client, url)
+
+    add_incidents(13)
+    large = queries_for(app, client, url)
+
+    assert large == small
+
+
+def test_reporters_render_without_lazy_loads(app, client):
+    """Reporter names come from the eager-loaded relationship."""
+    add_incidents(5)
+    with app.app_context(), assert_max_queries(5):
+        response = client.get('/incidents')
+    assert b'First5 Last5' in response.data
+
+
+def test_assert_max_queries_reports_statements(app):
+    """Exceeding the budget fails with the statements that ran."""
+    with pytest.raises(AssertionError, match='Expected at most 1 queries, got 2'):
+        with assert_max_queries(1):
+            User.query.count()
+            Incident.query.count()
@@ -0,0 +1,83 @@
+"""
+Tests for the concurrent load-test harness.
+"""
+
+import json
+import pytest
+import config
+from extensions import create_app, db
+from models import User, Incident
+from load_test import parse_mix, percentile, run_load_test, serve_app
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Create application for testing on a file database shared by server threads."""
+    monkeypatch.setattr(config.TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'load.db'}")
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        user = User(username='demo_user', email='demo@example.com', first_name='Demo', last_name='User')
+        user.set_password('password')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Incident(title='Pump failure', description='Pump stopped responding',
+                                equipment='Pump Station A', location='Building 1', severity='medium',
+                                category='mechanical', reporter_id=user.id))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_percentile():
+    """Percentiles use the nearest-rank method."""
+    values = list(range(1, 101))
+    assert [percentile(values, pct) for pct in (50, 95, 99)] == [50, 95, 99]
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
+
+
+def test_parse_mix():
+    """Mixes parse into weights and reject unknown actions."""
+    assert parse_mix('dashboard=3, report=1') == {'dashboard': 3, 'report': 1}
+    with pytest.raises(ValueError):
+        parse_mix('checkout=1')
+
+
+def test_load_test_reports_every_route(app):
+    """Concurrent users log in, read pages and submit incidents through CSRF-protected forms."""
+    with serve_app(app) as base_url:
+        report = run_load_test(base_url, users=4, requests_per_user=15, seed=3)
+
+    assert report['config']['login_failures'] == 0
+    assert report['total_errors'] == 0
+    assert report['total_requests'] >= 60
+    assert {'GET /dashboard', 'GET /incidents', 'GET /search', 'GET /incident/<id>', 'POST /report'} <= set(report['routes'])
+
+    submitted = report['routes']['POST /report']['requests']
+    assert Incident.query.filter(Incident.equipment.like('Load Test Rig%')).count() == submitted
+
+    route = report['routes']['GET /dashboard']
+    assert route['p50_ms'] <= route['p95_ms'] <= route['p99_ms'] <= route['max_ms']
+    json.dumps(report)
+
+
+def test_bad_credentials_are_reported(app):
+    """Users that cannot log in are counted and send no traffic."""
+    with serve_app(app) as base_url:
+        report = run_load_test(base_url, users=2, requests_per_user=5, password='wrong')
+    assert report['config']['login_failures'] == 2
+    assert report['total_requests'] == 0
+
+
+def test_load_test_command(app, tmp_path):
+    """The load-test CLI command starts the app locally and writes the JSON report."""
+    output = tmp_path / 'report.json'
+    result = app.test_cli_runner().invoke(args=[
+        'load-test', '--users', '2', '--requests', '5', '--mix', 'dashboard=1,incidents=1', '--output', str(output)
+    ])
+    assert result.exit_code == 0
+    report = json.loads(output.read_text(encoding='utf-8'))
+    assert report['total_requests'] == 10
+    assert set(report['routes']) <= {'GET /dashboard', 'GET /incidents'}
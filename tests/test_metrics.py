@@ -0,0 +1,94 @@
+"""
+Tests for request, SQL and template metrics at /metrics.
+"""
+
+import pytest
+import config
+from extensions import create_app, db
+from models import User, Incident
+from metrics import Histogram, get_registry
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """Create application for testing with metrics enabled."""
+    monkeypatch.setattr(config.TestingConfig, 'METRICS_ENABLED', True)
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        user = User(username='reporter', email='reporter@example.com', first_name='Test', last_name='Reporter')
+        user.set_password('password')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Incident(title='Pump failure', description='Pump stopped responding',
+                                equipment='Pump Station A', location='Building 1', severity='medium',
+                                category='mechanical', reporter_id=user.id))
+        db.session.commit()
+        yield app
+        db.drop_all()
+
+
+def sample(text, line_prefix):
+    """The value of the first exposition line starting with line_prefix."""
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(' ', 1)[1])
+    raise AssertionError(f'{line_prefix} not found')
+
+
+def test_histogram_exposition():
+    """Buckets are cumulative and end with +Inf, _sum and _count."""
+    histogram = Histogram('latency_seconds', 'Latency.', ('route',), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, 'a"b')
+
+    assert histogram.render() == [
+        '# HELP latency_seconds Latency.',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{route="a\\"b",le="0.1"} 2',
+        'latency_seconds_bucket{route="a\\"b",le="1.0"} 3',
+        'latency_seconds_bucket{route="a\\"b",le="+Inf"} 4',
+        'latency_seconds_sum{route="a\\"b"} 3.65',
+        'latency_seconds_count{route="a\\"b"} 4',
+    ]
+
+
+def test_requests_sql_and_templates_are_recorded(app):
+    """Page views show up as request, SQL and template series."""
+    client = app.test_client()
+    client.post('/auth/login', data={'username': 'reporter', 'password': 'password'})
+    with app.app_context():
+        client.get('/incidents')
+        client.get('/incidents')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+
+    assert sample(text, 'ims_http_requests_total{endpoint="main.incidents",method="GET",status="200"}') == 2
+    assert sample(text, 'ims_http_request_duration_seconds_count{endpoint="main.incidents",method="GET"}') == 2
+    assert sample(text, 'ims_sql_statements_per_request_sum{endpoint="main.incidents"}') >= 2
+    assert sample(text, 'ims_sql_duration_seconds_per_request_sum{endpoint="main.incidents"}') > 0
+    assert sample(text, 'ims_template_render_duration_seconds_count{template="incidents.html"}') == 2
+    assert sample(text, 'ims_http_requests_total{endpoint="auth.login",method="POST",status="302"}') == 1
+    # The scrape itself is not recorded
+    assert 'endpoint="metrics"' not in text
+
+
+def test_sql_outside_requests_is_ignored(app):
+    """Queries from CLI commands or scripts do not touch request metrics."""
+    Incident.query.count()
+    assert 'ims_sql_statements_per_request_bucket' not in get_registry(app).render()
+
+
+def test_disabled_by_default():
+    """Without METRICS_ENABLED there is no endpoint, registry or engine listener."""
+    from sqlalchemy import event
+    from metrics import _after_cursor_execute
+
+    app = create_app('testing')
+    assert get_registry(app) is None
+    assert app.test_client().get('/metrics').status_code == 404
+    with app.app_context():
+        assert not event.contains(db.engine, 'after_cursor_execute', _after_cursor_execute)
@@ -0,0 +1,125 @@
+"""
+Tests for keyset (cursor) pagination of incident listings.
+"""
+
+import re
+import pytest
+from datetime import datetime, timedelta
+from extensions import db
+from models import User, Incident
+from incident_queries import LIST_ORDER, list_order_key
+from pagination import encode_cursor, decode_cursor, keyset_paginate, InvalidCursor
+
+
+@pytest.fixture
+def app(app):
+    """Show five incidents per page."""
+    app.config['INCIDENTS_PER_PAGE'] = 5
+    return app
+
+
+@pytest.fixture
+def user(app):
+    """Create a user with a batch of incidents, some sharing a timestamp."""
+    user = User(username='reporter', email='reporter@example.com', first_name='Test', last_name='Reporter')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.flush()
+
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    for i in range(12):
+        db.session.add(Incident(
+            title=f'Incident {i}',
+            description='Conveyor belt jammed',
+            equipment='Conveyor Belt #3',
+            location='Production Floor A',
+            severity='medium',
+            category='mechanical',
+            reporter_id=user.id,
+            # Pairs of incidents share a created_at so the id tiebreaker matters
+            created_at=base + timedelta(minutes=i // 2)
+        ))
+    db.session.commit()
+    return user
+
+
+def test_cursor_round_trip():
+    """Cursors are opaque tokens that decode back to their values."""
+    when = datetime(2024, 5, 1, 8, 30, 15, 123)
+    token = encode_cursor([when, 42], 'prev')
+    assert decode_cursor(token) == ([when, 42], 'prev')
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor('not-a-cursor')
+
+
+def test_keyset_walks_all_pages(app, user):
+    """Following next then prev cursors visits every incident exactly once."""
+    columns = [Incident.created_at, Incident.id]
+    expected = [i.id for i in Incident.query.order_by(Incident.created_at.desc(), Incident.id.desc())]
+
+    seen = []
+    pages = []
+    page = keyset_paginate(Incident.query, columns, per_page=5)
+    assert not page.has_prev
+    while True:
+        pages.append([i.id for i in page.items])
+        seen.extend(pages[-1])
+        if not page.has_next:
+            break
+        page = keyset_paginate(Incident.query, columns, cursor=page.next_cursor, per_page=5)
+
+    assert seen == expected
+    assert [len(p) for p in pages] == [5, 5, 2]
+
+    # Walk back from the last page
+    page = keyset_paginate(Incident.query, columns, cursor=page.prev_cursor, per_page=5)
+    assert [i.id for i in page.items] == pages[1]
+    assert page.has_next and page.has_prev
+
+
+def test_list_order_keeps_incidents_without_created_at(app, user):
+    """Incidents with a NULL created_at are paged by their report time instead of dropping out."""
+    db.session.execute(db.update(Incident).where(Incident.id % 3 == 0).values(created_at=None))
+    db.session.commit()
+
+    seen = []
+    page = keyset_paginate(Incident.query, LIST_ORDER, per_page=5, key=list_order_key)
+    seen.extend(i.id for i in page.items)
+    while page.has_next:
+        page = keyset_paginate(Incident.query, LIST_ORDER, cursor=page.next_cursor, per_page=5, key=list_order_key)
+        seen.extend(i.id for i in page.items)
+    assert sorted(seen) == [i.id for i in Incident.query.order_by(Incident.id)]
+    assert len(seen) == 12
+
+
+def test_invalid_cursor_starts_from_first_page(app, user):
+    """A garbage cursor falls back to the first page instead of erroring."""
+    page = keyset_paginate(Incident.query, [Incident.created_at, Incident.id], cursor='garbage', per_page=5)
+    assert len(page.items) == 5
+    assert not page.has_prev
+
+
+def test_incidents_route_uses_cursors(app, user):
+    """The incidents page links to the next page with a cursor token."""
+    client = app.test_client()
+    client.post('/auth/login', data={'username': 'reporter', 'password': 'password'})
+
+    response = client.get('/incidents')
+    assert response.status_code == 200
+    assert b'12</strong> incident(s) in total' in response.data
+
+    match = re.search(rb'href="(/incidents\?cursor=[^"]+)">Next', response.data)
+    assert match is not None
+    response = client.get(match.group(1).decode())
+    assert response.status_code == 200
+    assert b'Previous' in response.data
+
+    response = client.get('/search?q=Conveyor')
+    assert response.status_code == 200
+    assert b'cursor=' in response.data
+
+    # Ranked search pages link back to the best matches, not the "newest"
+    match = re.search(rb'href="(/search\?[^"]*cursor=[^"]+)">Next', response.data)
+    response = client.get(match.group(1).decode().replace('&amp;', '&'))
+    assert b'>Best matches<' in response.data and b'>Newest<' not in response.data
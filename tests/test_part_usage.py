@@ -0,0 +1,90 @@
+"""
+Tests for set-based part usage statistics and the parts usage leaderboard.
+"""
+
+from datetime import datetime, timedelta
+import pytest
+from extensions import db
+from models import Incident, Part, incident_parts
+from part_usage import PartUsage, incident_part_usage, part_usage_leaderboard, part_usage_stats
+from query_counter import QueryCounter
+
+USED_AT = datetime(2026, 3, 1, 8, 0)
+
+
+@pytest.fixture
+def parts(user):
+    """Three incidents using four parts in different quantities; one part is never used."""
+    parts = [Part(part_number=f'P-{i}', name=f'Part {i}', category='mechanical' if i % 2 else 'electrical',
+                  unit_cost=10.0 * i, current_stock=5) for i in range(1, 6)]
+    db.session.add_all(parts)
+    db.session.flush()
+
+    usage = [
+        {1: 1, 2: 4},
+        {1: 2, 3: 1},
+        {1: 1, 2: 1, 4: None},
+    ]
+    for number, used in enumerate(usage):
+        incident = Incident(title='Pump failure', description='Pump stopped responding', equipment='Pump Station A',
+                            location='Building 1', severity='high', category='mechanical', reporter_id=user.id)
+        db.session.add(incident)
+        db.session.flush()
+        db.session.execute(incident_parts.insert(), [
+            {'incident_id': incident.id, 'part_id': part_id, 'quantity_used': quantity,
+             'created_at': USED_AT + timedelta(days=number)}
+            for part_id, quantity in used.items()
+        ])
+    db.session.commit()
+    return parts
+
+
+def test_part_usage_stats_in_one_query(app, parts):
+    """Counts, quantities and last use for many parts come from one GROUP BY."""
+    part_ids = [part.id for part in parts]
+    with QueryCounter() as counter:
+        stats = part_usage_stats(part_ids)
+    assert counter.count == 1
+
+    assert stats[1] == PartUsage(1, 3, 4, USED_AT + timedelta(days=2))
+    assert stats[2] == PartUsage(2, 2, 5, USED_AT + timedelta(days=2))
+    assert stats[4].quantity_used == 1
+    assert stats[5] == PartUsage(5, 0, 0, None)
+    assert {part.id: part.total_usage_count() for part in parts} == \
+        {part_id: usage.usage_count for part_id, usage in stats.items()}
+
+
+def test_part_usage_stats_since_and_all_parts(app, parts):
+    """Usage can be limited to recent links; no ids means every used part."""
+    assert set(part_usage_stats()) == {1, 2, 3, 4}
+    recent = part_usage_stats([1, 3], since=USED_AT + timedelta(days=2))
+    assert recent[1].usage_count == 1 and recent[3].usage_count == 0
+
+
+def test_incident_part_usage(app, parts):
+    """All parts of an incident are read at once."""
+    usage = incident_part_usage(1)
+    assert {part_id: row.quantity_used for part_id, row in usage.items()} == {1: 1, 2: 4}
+
+
+def test_leaderboard_orders(app, parts):
+    """The leaderboard ranks by usage, quantity, cost or recency."""
+    assert [entry['part_number'] for entry in part_usage_leaderboard()] == ['P-1', 'P-2', 'P-3', 'P-4']
+    by_cost = part_usage_leaderboard('cost', limit=3)
+    assert [(entry['part_number'], entry['cost']) for entry in by_cost] == [('P-2', 100.0), ('P-1', 40.0),
+                                                                          ('P-4', 40.0)]
+    assert [entry['part_number'] for entry in part_usage_leaderboard(category='electrical')] == ['P-2', 'P-4']
+    with pytest.raises(ValueError):
+        part_usage_leaderboard('name')
+
+
+def test_leaderboard_views(client, parts):
+    """The page and the JSON endpoint show the leaderboard."""
+    page = client.get('/parts/usage?order=quantity').get_data(as_text=True)
+    assert 'Parts Usage Leaderboard' in page
+    assert page.index('P-2') < page.index('P-1')
+
+    data = client.get('/api/parts/usage?limit=1').get_json()
+    assert data['order'] == 'usage'
+    assert data['parts'][0]['part_number'] == 'P-1'
+    assert data['parts'][0]['last_used_at'] == (USED_AT + timedelta(days=2)).isoformat()
@@ -0,0 +1,79 @@
+"""
+Tests for the versioned parts choices cache.
+"""
+
+import pytest
+from extensions import create_app, db
+from models import Part
+from forms import IncidentForm, EnhancedIncidentForm, IncidentPartsForm, get_parts_by_category
+from parts_cache import cached_parts_choices, parts_cache_version, bump_parts_version
+from query_counter import QueryCounter
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Part(part_number='P-1', name='Seal kit', category='hydraulic'),
+            Part(part_number='P-2', name='Fuse', category='electrical'),
+            Part(part_number='P-3', name='Old relay', category='electrical', status='obsolete'),
+        ])
+        db.session.commit()
+        yield app
+        db.drop_all()
+
+
+def test_forms_hit_database_once(app):
+    """After the first load, building forms runs no queries."""
+    with app.test_request_context():
+        IncidentForm()
+        with QueryCounter() as counter:
+            form = IncidentForm()
+            EnhancedIncidentForm()
+            IncidentPartsForm()
+            grouped = get_parts_by_category()
+            get_parts_by_category()
+
+    # Only the first grouped lookup loads from the database
+    assert counter.count == 1
+    assert [name for _, name in form.parts.choices] == ['Seal kit', 'Fuse', 'Old relay']
+    assert grouped == [('electrical', [('2', 'P-2 - Fuse')]), ('hydraulic', [('1', 'P-1 - Seal kit')])]
+
+
+def test_part_writes_invalidate_after_commit(app):
+    """Inserting, renaming and deleting parts show up in the next lookup."""
+    cached_parts_choices()
+    version = parts_cache_version()
+
+    part = Part(part_number='P-4', name='Bearing')
+    db.session.add(part)
+    db.session.flush()
+    assert parts_cache_version() == version  # Not visible until commit
+    db.session.commit()
+    assert parts_cache_version() == version + 1
+    assert (part.id, 'Bearing') in cached_parts_choices()
+
+    part.name = 'Roller bearing'
+    db.session.commit()
+    assert (part.id, 'Roller bearing') in cached_parts_choices()
+
+    db.session.delete(part)
+    db.session.commit()
+    assert all(name != 'Roller bearing' for _, name in cached_parts_choices())
+
+
+def test_rolled_back_writes_do_not_invalidate(app):
+    """A rolled back part change leaves the cache version alone."""
+    cached_parts_choices()
+    version = parts_cache_version()
+
+    db.session.add(Part(part_number='P-5', name='Gasket'))
+    db.session.flush()
+    db.session.rollback()
+
+    assert parts_cache_version() == version
+    bump_parts_version()
+    assert parts_cache_version() == version + 1
@@ -0,0 +1,142 @@
+"""
+Query budgets for every route, with N+1 detection.
+
+Each route is requested with enough incidents, reporters and parts on the
+page that a per-row query would show up as a repeated statement, and must
+stay within its statement budget. Adding a route without a budget fails
+test_every_route_has_a_budget.
+"""
+
+import pytest
+from extensions import db
+from models import User, Incident, Part, incident_parts
+from query_counter import QueryCounter
+
+ROWS = 6
+
+
+@pytest.fixture
+def incident_id(user):
+    """Create incidents from different reporters, each with several parts."""
+    parts = [Part(part_number=f'P-{i}', name=f'Part {i}', category='mechanical' if i % 2 else 'electrical',
+                  current_stock=i, minimum_stock=2) for i in range(ROWS)]
+    db.session.add_all(parts)
+    db.session.flush()
+
+    for i in range(ROWS):
+        reporter = User(username=f'reporter{i}', email=f'reporter{i}@example.com',
+                        first_name=f'First{i}', last_name=f'Last{i}')
+        db.session.add(reporter)
+        db.session.flush()
+        incident = Incident(title=f'Pump failure {i}', description='Pump stopped responding',
+                            equipment='Pump Station A', location='Building 1', severity='high',
+                            category='mechanical', reporter_id=reporter.id, assigned_to_id=user.id)
+        db.session.add(incident)
+        db.session.flush()
+        db.session.execute(incident_parts.insert(), [
+            {'incident_id': incident.id, 'part_id': part.id} for part in parts
+        ])
+    db.session.commit()
+    return incident.id
+
+
+@pytest.fixture
+def client(app, client, incident_id):
+    """Create a logged-in test client with a warm identity and parts cache."""
+    with app.app_context():
+        client.get('/dashboard')
+        client.get('/incident/new')
+    return client
+
+
+INCIDENT_FORM = {'equipment': 'Conveyor #3', 'location': 'Hall 1',
+                 'description': 'Belt stopped under load', 'parts_dropdown': ['1', '2', '3']}
+ENHANCED_FORM = {'title': 'Conveyor jam', 'equipment': 'Conveyor #3', 'location': 'Hall 1',
+                 'description': 'Belt stopped under load', 'severity': 'high', 'category': 'mechanical',
+                 'priority': 'high', 'parts_select': ['1', '2', '3']}
+REGISTER_FORM = {'username': 'newbie', 'email': 'newbie@example.com', 'password': 'password123',
+                 'first_name': 'New', 'last_name': 'Bie'}
+
+# (endpoint, method) -> (url, form data, max statements)
+ROUTE_BUDGETS = {
+    ('main.home', 'GET'): ('/', None, 0),
+    ('main.index', 'GET'): ('/dashboard', None, 3),
+    ('main.incidents', 'GET'): ('/incidents', None, 3),
+    ('main.search', 'GET'): ('/search?q=pump', None, 2),
+    ('main.incident_detail', 'GET'): ('/incident/{id}', None, 3),
+    ('main.update_incident', 'POST'): ('/incident/{id}/update', {'status': 'resolved'}, 6),
+    ('main.api_stats', 'GET'): ('/api/stats', None, 2),
+    ('main.incident_queue', 'GET'): ('/api/incidents/queue?due_within=48', None, 1),
+    ('main.api_analytics', 'GET'): ('/api/analytics/category', None, 3),
+    ('main.api_trends', 'GET'): ('/api/trends?by=severity', None, 1),
+    ('main.parts_usage', 'GET'): ('/parts/usage', None, 1),
+    ('main.api_parts_usage', 'GET'): ('/api/parts/usage?order=cost&days=30', None, 1),
+    ('main.api_low_stock', 'GET'): ('/api/parts/low-stock', None, 1),
+    ('main.install_incident_part', 'POST'): ('/incident/{id}/parts/2/install', {}, 4),
+    ('main.export_incidents', 'GET'): ('/incidents/export?format=ndjson', None, 1),
+    ('main.new_incident', 'GET'): ('/incident/new', None, 0),
+    ('main.new_incident', 'POST'): ('/incident/new', INCIDENT_FORM, 5),
+    ('main.new_incident_enhanced', 'GET'): ('/incident/new/enhanced', None, 0),
+    ('main.new_incident_enhanced', 'POST'): ('/incident/new/enhanced', ENHANCED_FORM, 5),
+    ('main.new_incident_simple', 'GET'): ('/incident/new/simple', None, 0),
+    ('main.new_incident_simple', 'POST'): ('/incident/new/simple', INCIDENT_FORM, 5),
+    ('main.report', 'GET'): ('/report', None, 0),
+    ('main.report', 'POST'): ('/report', INCIDENT_FORM, 5),
+    ('main.incident_parts', 'GET'): ('/incident/parts', None, 0),
+    ('main.incident_parts', 'POST'): ('/incident/parts', {}, 0),
+    ('main.about', 'GET'): ('/about', None, 0),
+    ('main.contact', 'GET'): ('/contact', None, 0),
+    ('main.demo', 'GET'): ('/demo', None, 0),
+    ('auth.login', 'GET'): ('/auth/login', None, 0),
+    ('auth.login', 'POST'): ('/auth/login', {'username': 'viewer', 'password': 'password'}, 1),
+    ('auth.register', 'GET'): ('/auth/register', None, 0),
+    ('auth.register', 'POST'): ('/auth/register', REGISTER_FORM, 3),
+    ('auth.demo_login', 'GET'): ('/auth/demo-login', None, 3),
+    ('auth.logout', 'GET'): ('/auth/logout', None, 0),
+}
+
+
+def test_every_route_has_a_budget(app):
+    """New routes must come with a query budget."""
+    routes = {
+        (rule.endpoint, method)
+        for rule in app.url_map.iter_rules() if rule.endpoint not in ('static', 'metrics')
+        for method in rule.methods - {'HEAD', 'OPTIONS'}
+    }
+    assert routes == set(ROUTE_BUDGETS)
+
+
+@pytest.mark.parametrize('route', sorted(ROUTE_BUDGETS), ids=lambda route: f'{route[1]} {route[0]}')
+def test_route_query_budget(app, client, incident_id, query_budget, route):
+    """Each route stays within its statement budget with no per-row queries."""
+    url, data, budget = ROUTE_BUDGETS[route]
+    url = url.format(id=incident_id)
+
+    # A fresh app context gives the request its own session, as in production
+    with app.app_context(), query_budget(budget):
+        response = client.post(url, data=data) if route[1] == 'POST' else client.get(url)
+    assert response.status_code < 400
+
+
+def test_n_plus_one_is_detected(app, incident_id):
+    """Loading each incident's reporter lazily is flagged as N+1."""
+    with QueryCounter() as counter:
+        for incident in Incident.query.all():
+            incident.reporter.username
+
+    (statement, times), = counter.suspected_n_plus_one()
+    assert 'FROM users' in statement
+    assert times == ROWS
+
+
+def test_budget_fails_on_n_plus_one(app, incident_id, query_budget):
+    """The budget fixture fails on N+1 even when the total is within budget."""
+    with pytest.raises(AssertionError, match='Suspected N\\+1'):
+        with query_budget(100):
+            for incident in Incident.query.all():
+                incident.reporter.username
+
+    db.session.expire_all()
+    with query_budget(100, allow_n_plus_one=True):
+        for incident in Incident.query.all():
+            incident.reporter.username
@@ -0,0 +1,101 @@
+"""
+Tests for the hot-query indexes, their migration and the EXPLAIN check.
+"""
+
+import pytest
+from alembic.script import ScriptDirectory
+from flask import current_app
+from flask_migrate import downgrade, stamp, upgrade
+from extensions import db
+from query_plans import HOT_QUERIES, check_query_plans, uses_index
+
+
+def index_names():
+    inspector = db.inspect(db.engine)
+    return {index['name'] for table in ('incidents', 'incident_parts', 'users')
+            for index in inspector.get_indexes(table)}
+
+
+def test_hot_queries_use_indexes(app):
+    """Every hot query is served by an index on the current schema."""
+    failures = {check.name: check.plan for check in check_query_plans() if not check.uses_index}
+    assert failures == {}
+    assert len(check_query_plans()) == len(HOT_QUERIES)
+
+
+def test_migration_adds_and_removes_indexes(app):
+    """Downgrading drops the indexes; upgrading restores them."""
+    stamp()
+    downgrade(revision='base')
+    db.session.commit()
+    assert 'ix_incidents_created_at_id' not in index_names()
+    assert 'ix_incidents_status_sla_due_at' not in index_names()
+
+    upgrade()
+    db.session.commit()
+    assert {'ix_incidents_created_at_id', 'ix_incident_parts_part_id', 'ix_users_role'} <= index_names()
+    assert all(check.uses_index for check in check_query_plans())
+
+
+def test_upgrade_skips_existing_indexes(app):
+    """A database built by create_all upgrades without duplicate-index errors."""
+    upgrade()
+    assert 'ix_incidents_status_severity' in index_names()
+
+
+def stamped_revision():
+    return db.session.scalar(db.text('SELECT version_num FROM alembic_version'))
+
+
+def head_revision():
+    config = current_app.extensions['migrate'].migrate.get_config()
+    return ScriptDirectory.from_config(config).get_current_head()
+
+
+def test_init_db_stamps_new_database(app):
+    """init-db creates the tables of an empty database and stamps it at head."""
+    db.drop_all()
+    result = app.test_cli_runner().invoke(args=['init-db'])
+    assert 'Stamped database at the latest migration' in result.output
+    assert stamped_revision() == head_revision()
+
+
+def test_init_db_migrates_existing_database(app):
+    """init-db upgrades an existing database instead of stamping a schema it does not have."""
+    stamp()
+    downgrade(revision='base')
+    db.session.commit()
+    assert 'sla_due_at' not in {column['name'] for column in db.inspect(db.engine).get_columns('incidents')}
+
+    result = app.test_cli_runner().invoke(args=['init-db'])
+    assert 'Database upgraded to the latest migration' in result.output
+    assert 'sla_due_at' in {column['name'] for column in db.inspect(db.engine).get_columns('incidents')}
+    assert stamped_revision() == head_revision()
+
+
+def test_uses_index_rules():
+    """Table scans and whole-table sorts fail; index searches pass."""
+    assert not uses_index(['SCAN incidents'])
+    assert not uses_index(['SEARCH incidents'])
+    assert not uses_index(['SCAN users_1'])
+    assert uses_index(['SEARCH incidents USING INDEX ix_incidents_status_severity (status=?)',
+                       'SEARCH users USING INTEGER PRIMARY KEY (rowid=?) LEFT-JOIN'])
+    assert not uses_index(['SCAN incidents USING INDEX ix_incidents_created_at_id'])
+    assert uses_index(['SCAN incidents USING INDEX ix_incidents_created_at_id'], index_scan_ok=True)
+    assert not uses_index(['SCAN incidents USING INDEX ix_incidents_updated_at', 'USE TEMP B-TREE FOR ORDER BY'],
+                          index_scan_ok=True)
+    assert not uses_index(['Seq Scan on incidents  (cost=0.00..1.01 rows=1 width=4)'])
+
+
+def test_check_indexes_command(app):
+    """The check-indexes CLI command exits non-zero when an index is missing."""
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['check-indexes'])
+    assert result.exit_code == 0
+    assert f'All {len(HOT_QUERIES)} queries use an index' in result.output
+
+    db.session.execute(db.text('DROP INDEX ix_users_role'))
+    db.session.commit()
+    result = runner.invoke(args=['check-indexes'])
+    assert result.exit_code == 1
+    assert '❌ users_by_role' in result.output
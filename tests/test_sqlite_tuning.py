@@ -0,0 +1,71 @@
+"""
+Tests for the SQLite connection profiles.
+"""
+
+import pytest
+import config
+from extensions import create_app, db
+from sqlite_tuning import SQLITE_PROFILES, benchmark_profile, read_pragmas, resolve_pragmas
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """Create an application on a database file with the 'wal' profile."""
+    monkeypatch.setattr(config.TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "ims.db"}')
+    monkeypatch.setattr(config.TestingConfig, 'SQLITE_PROFILE', 'wal')
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
+def test_resolve_pragmas():
+    """Profiles resolve in application order; overrides replace or remove PRAGMAs."""
+    assert resolve_pragmas('default') == {}
+    pragmas = resolve_pragmas('wal', {'mmap_size': 0, 'temp_store': None})
+    assert list(pragmas) == ['busy_timeout', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size']
+    assert pragmas['mmap_size'] == 0
+
+    with pytest.raises(ValueError):
+        resolve_pragmas('turbo')
+    with pytest.raises(ValueError):
+        resolve_pragmas('wal', {'synchronous': 'OFF; DROP TABLE users'})
+
+
+def test_profile_applied_on_connect(file_app):
+    """Every connection to a file database gets the profile's PRAGMAs."""
+    with db.engine.connect() as connection:
+        values = read_pragmas(connection)
+
+    assert values['journal_mode'] == 'wal'
+    assert values['busy_timeout'] == SQLITE_PROFILES['wal']['busy_timeout']
+    assert values['synchronous'] == 1  # NORMAL
+    assert values['cache_size'] == SQLITE_PROFILES['wal']['cache_size']
+    assert values['temp_store'] == 2  # MEMORY
+
+
+def test_in_memory_database_keeps_memory_journal(monkeypatch):
+    """An in-memory database skips journal_mode but still gets the other PRAGMAs."""
+    monkeypatch.setattr(config.TestingConfig, 'SQLITE_PROFILE', 'wal')
+    app = create_app('testing')
+    with app.app_context(), db.engine.connect() as connection:
+        values = read_pragmas(connection, ('journal_mode', 'busy_timeout'))
+    assert values == {'journal_mode': 'memory', 'busy_timeout': SQLITE_PROFILES['wal']['busy_timeout']}
+
+
+def test_default_profile_leaves_sqlite_defaults():
+    """The testing config's 'default' profile sets nothing."""
+    app = create_app('testing')
+    with app.app_context(), db.engine.connect() as connection:
+        assert read_pragmas(connection, ('temp_store',)) == {'temp_store': 0}
+
+
+def test_benchmark_profile(tmp_path):
+    """The benchmark runs the read/write mix from worker processes and counts both."""
+    result = benchmark_profile('wal', workers=2, duration=0.5, seed_rows=50, directory=tmp_path)
+    assert result['profile'] == 'wal'
+    assert result['reads'] > 0 and result['writes'] > 0
+    assert result['errors'] == 0
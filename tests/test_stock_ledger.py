@@ -0,0 +1,198 @@
+"""
+Tests for the stock_movements ledger, part installs and the low-stock view.
+"""
+
+import threading
+import time
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+import config
+from extensions import create_app, db
+from models import User, Incident, Part, StockMovement, incident_parts
+from inventory import InsufficientStock, install_part, low_stock_parts, restock_part, stock_history
+from query_counter import QueryCounter
+
+
+def add_user():
+    user = User(username='viewer', email='viewer@example.com', first_name='View', last_name='Er', role='admin')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+def add_incident(user, used):
+    """Create an incident using parts as {part_id: quantity_used}."""
+    incident = Incident(title='Pump failure', description='Pump stopped responding', equipment='Pump Station A',
+                        location='Building 1', severity='high', category='mechanical', reporter_id=user.id)
+    db.session.add(incident)
+    db.session.flush()
+    db.session.execute(incident_parts.insert(), [
+        {'incident_id': incident.id, 'part_id': part_id, 'quantity_used': quantity}
+        for part_id, quantity in used.items()
+    ])
+    return incident
+
+
+@pytest.fixture
+def stock(user):
+    """Three parts with different stock margins, used by one incident."""
+    parts = [
+        Part(part_number='P-1', name='Bearing', current_stock=5, minimum_stock=2),
+        Part(part_number='P-2', name='Seal', current_stock=1, minimum_stock=3),
+        Part(part_number='P-3', name='Belt', current_stock=2, minimum_stock=2),
+    ]
+    db.session.add_all(parts)
+    db.session.flush()
+    incident = add_incident(user, {1: 3, 2: 2, 3: None})
+    db.session.commit()
+    return incident.id
+
+
+def test_install_takes_stock_once(app, stock):
+    """An install takes quantity_used out of stock and records it; a repeat does nothing."""
+    movement = install_part(stock, 1)
+    db.session.commit()
+    assert (movement.quantity, movement.stock_after, movement.reason) == (-3, 2, 'install')
+    assert db.session.get(Part, 1).current_stock == 2
+
+    assert install_part(stock, 1) is None
+    db.session.commit()
+    assert db.session.get(Part, 1).current_stock == 2
+    assert db.session.scalar(select(incident_parts.c.status).where(incident_parts.c.part_id == 1)) == 'installed'
+    assert [m.quantity for m in stock_history(1)] == [-3]
+
+    # A missing quantity_used counts as one part
+    assert install_part(stock, 3).stock_after == 1
+
+
+def test_install_without_enough_stock_changes_nothing(app, stock):
+    """Overselling raises InsufficientStock and the rollback leaves stock and status alone."""
+    with pytest.raises(InsufficientStock) as error:
+        install_part(stock, 2)
+    db.session.rollback()
+    assert error.value.needed == 2
+
+    assert db.session.get(Part, 2).current_stock == 1
+    assert db.session.scalar(select(incident_parts.c.status).where(incident_parts.c.part_id == 2)) == 'required'
+    assert StockMovement.query.count() == 0
+
+    with pytest.raises(LookupError):
+        install_part(stock, 99)
+
+
+def test_restock_and_history(app, stock):
+    """Restocks add to stock and the history lists movements newest first."""
+    restock_part(2, 4, note='PO-1001')
+    install_part(stock, 2)
+    db.session.commit()
+
+    assert db.session.get(Part, 2).current_stock == 3
+    assert [(m.reason, m.quantity, m.stock_after) for m in stock_history(2)] == \
+        [('install', -2, 3), ('restock', 4, 5)]
+    with pytest.raises(ValueError):
+        restock_part(2, 0)
+
+
+def test_low_stock_parts(client, stock):
+    """Parts at or below minimum stock come from one query, lowest margin first."""
+    with QueryCounter() as counter:
+        rows = low_stock_parts()
+    assert counter.count == 1
+    assert [(part.part_number, margin) for part, margin in rows] == [('P-2', -2), ('P-3', 0)]
+    assert [part.part_number for part in Part.get_low_stock_parts()] == ['P-2', 'P-3']
+
+    data = client.get('/api/parts/low-stock?limit=1').get_json()
+    assert [(part['part_number'], part['shortfall']) for part in data['parts']] == [('P-2', 2)]
+
+
+def test_install_route(client, stock):
+    """The install button flashes the outcome and redirects back to the incident."""
+    response = client.post(f'/incident/{stock}/parts/1/install', follow_redirects=True)
+    assert 'Part installed; 2 left in stock.' in response.get_data(as_text=True)
+    response = client.post(f'/incident/{stock}/parts/1/install', follow_redirects=True)
+    assert 'Part was already installed.' in response.get_data(as_text=True)
+    response = client.post(f'/incident/{stock}/parts/2/install', follow_redirects=True)
+    assert 'Not enough stock to install this part.' in response.get_data(as_text=True)
+    assert client.post(f'/incident/{stock}/parts/99/install').status_code == 404
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """Create an application on a database file with the 'wal' profile."""
+    monkeypatch.setattr(config.TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "ims.db"}')
+    monkeypatch.setattr(config.TestingConfig, 'SQLITE_PROFILE', 'wal')
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
+def run_installs(engine, jobs, workers=8):
+    """
+    Attempt the (incident_id, part_id) installs from a pool of threads, each
+    with its own session. Returns the outcome of every attempt and the
+    seconds the workers took.
+    """
+    jobs = list(jobs)
+    lock = threading.Lock()
+    results = []
+
+    def worker():
+        while True:
+            with lock:
+                if not jobs:
+                    return
+                incident_id, part_id = jobs.pop()
+            with Session(engine) as session:
+                try:
+                    movement = install_part(incident_id, part_id, session=session)
+                    session.commit()
+                    outcome = 'installed' if movement else 'repeat'
+                except InsufficientStock:
+                    session.rollback()
+                    outcome = 'short'
+            with lock:
+                results.append(outcome)
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def test_concurrent_installs_never_oversell(file_app):
+    """Workers installing the same hot parts at once never oversell or install a part twice."""
+    user = add_user()
+    db.session.add_all([Part(part_number='HOT-1', name='Bearing', current_stock=30),
+                        Part(part_number='HOT-2', name='Seal', current_stock=20)])
+    db.session.flush()
+    incidents = [add_incident(user, {1: 1 + i % 2, 2: 1}).id for i in range(40)]
+    db.session.commit()
+
+    # Every install is attempted twice, by different workers
+    jobs = [(incident_id, part_id) for incident_id in incidents for part_id in (1, 2)] * 2
+    results, seconds = run_installs(db.engine, jobs)
+    print(f'{len(results)} concurrent install attempts in {seconds:.2f}s ({len(results) / seconds:.0f}/s)')
+
+    db.session.expire_all()
+    stock = {part.id: part.current_stock for part in Part.query.all()}
+    taken = dict(db.session.execute(
+        select(StockMovement.part_id, -func.sum(StockMovement.quantity)).group_by(StockMovement.part_id)).all())
+    assert stock[1] >= 0 and stock[2] >= 0
+    assert taken == {1: 30 - stock[1], 2: 20 - stock[2]}
+
+    # Seals run out after 20 installs; bearings (1 or 2 each) can leave at most one unit behind
+    assert taken[2] == 20 and stock[1] <= 1
+    installed = db.session.execute(
+        select(incident_parts.c.part_id, func.count()).where(incident_parts.c.status == 'installed')
+        .group_by(incident_parts.c.part_id)).all()
+    assert sum(count for _, count in installed) == results.count('installed') == StockMovement.query.count()
+    assert len(results) == 160
@@ -0,0 +1,95 @@
+"""
+Tests for the cached Flask-Login user loader.
+"""
+
+import pytest
+from extensions import db
+from models import User, Incident
+from user_cache import load_cached_user, UserIdentity
+from query_counter import QueryCounter
+
+
+@pytest.fixture
+def user(app):
+    """Create a regular user."""
+    user = User(username='worker', email='worker@example.com', first_name='Wendy', last_name='Worker')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_identity_is_cached(app, user):
+    """Repeated loads return the same identity without querying."""
+    identity = load_cached_user(str(user.id))
+    assert isinstance(identity, UserIdentity)
+    assert (identity.username, identity.first_name, identity.role) == ('worker', 'Wendy', 'user')
+    assert identity.is_authenticated and identity.is_active
+    assert identity.get_id() == str(user.id)
+
+    with QueryCounter() as counter:
+        assert load_cached_user(user.id) is identity
+    assert counter.count == 0
+
+    assert load_cached_user('9999') is None
+    assert load_cached_user('not-an-id') is None
+
+
+def test_user_update_evicts_after_commit(app, user):
+    """Changing a user's role is visible on the next load."""
+    load_cached_user(user.id)
+
+    user.role = 'manager'
+    db.session.flush()
+    assert load_cached_user(user.id).role == 'user'  # Not committed yet
+
+    db.session.commit()
+    assert load_cached_user(user.id).role == 'manager'
+
+
+def test_cache_is_bounded(app, user):
+    """The least recently used identity is dropped when the cache is full."""
+    app.config['USER_CACHE_SIZE'] = 2
+    others = [User(username=f'u{i}', email=f'u{i}@example.com', first_name='U', last_name=str(i)) for i in range(2)]
+    db.session.add_all(others)
+    db.session.commit()
+
+    first = load_cached_user(user.id)
+    load_cached_user(others[0].id)
+    load_cached_user(others[1].id)
+
+    assert load_cached_user(user.id) is not first
+
+
+def test_ttl_expires_entries(app, user):
+    """Entries older than USER_CACHE_TTL are reloaded."""
+    app.config['USER_CACHE_TTL'] = 0
+    first = load_cached_user(user.id)
+    assert load_cached_user(user.id) is not first
+
+
+def test_permission_check_uses_cached_identity(app, user):
+    """update_incident authorizes with the cached identity and no user row lookup."""
+    manager = User(username='boss', email='boss@example.com', first_name='Bo', last_name='Ss', role='manager')
+    manager.set_password('password')
+    db.session.add(manager)
+    db.session.flush()
+    incident = Incident(title='Pump failure', description='Pump stopped responding',
+                        equipment='Pump Station A', location='Building 1', severity='medium',
+                        category='mechanical', reporter_id=user.id)
+    db.session.add(incident)
+    db.session.commit()
+    incident_id = incident.id
+
+    client = app.test_client()
+    client.post('/auth/login', data={'username': 'boss', 'password': 'password'})
+
+    with app.app_context():
+        client.get('/dashboard')  # Warm the identity cache
+    with app.app_context(), QueryCounter() as counter:
+        response = client.post(f'/incident/{incident_id}/update', data={'status': 'in_progress'})
+
+    assert response.status_code == 302
+    assert not any('FROM users' in sql for sql in counter.statements)
+    db.session.expire_all()
+    assert db.session.get(Incident, incident_id).status == 'in_progress'
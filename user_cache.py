@@ -0,0 +1,120 @@
+"""
+Cached user loading for Flask-Login.
+
+The user_loader runs on every authenticated request. Instead of loading the
+full User row each time, it returns a lightweight UserIdentity (id, username,
+names, role, is_active) from a bounded LRU cache with a TTL. Entries are
+evicted when a User row is updated or deleted and that transaction commits;
+USER_CACHE_TTL bounds staleness across worker processes.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from extensions import db
+from models import User
+
+DEFAULT_SIZE = 1024
+DEFAULT_TTL = 60
+
+
+class UserIdentity(UserMixin):
+    """
+    Read-only identity of a logged-in user, safe to share between requests.
+    Use load() when a route needs the full User model (e.g. to modify it).
+    """
+
+    def __init__(self, id, username, first_name, last_name, role, is_active):
+        self.id = id
+        self.username = username
+        self.first_name = first_name
+        self.last_name = last_name
+        self.role = role
+        self._is_active = is_active
+
+    @property
+    def is_active(self):
+        return self._is_active is not False
+
+    def load(self):
+        """Load the full User row for this identity."""
+        return db.session.get(User, self.id)
+
+    def __repr__(self):
+        return f'<UserIdentity {self.username}>'
+
+
+_lock = threading.Lock()
+_cache = OrderedDict()  # (engine, user_id) -> (loaded_at, UserIdentity)
+
+
+def _setting(name, default):
+    return current_app.config.get(name, default)
+
+
+def load_cached_user(user_id):
+    """Get the UserIdentity for user_id, loading it from the database on a miss."""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    now = time.monotonic()
+    key = (db.engine, user_id)
+    with _lock:
+        cached = _cache.get(key)
+        if cached and now - cached[0] < _setting('USER_CACHE_TTL', DEFAULT_TTL):
+            _cache.move_to_end(key)
+            return cached[1]
+
+    row = db.session.query(
+        User.id, User.username, User.first_name, User.last_name, User.role, User.is_active
+    ).filter(User.id == user_id).first()
+    if row is None:
+        return None
+
+    identity = UserIdentity(*row)
+    with _lock:
+        _cache[key] = (now, identity)
+        _cache.move_to_end(key)
+        while len(_cache) > _setting('USER_CACHE_SIZE', DEFAULT_SIZE):
+            _cache.popitem(last=False)
+    return identity
+
+
+def evict_user(user_id):
+    """Drop one user from the cache."""
+    with _lock:
+        for key in [key for key in _cache if key[1] == user_id]:
+            del _cache[key]
+
+
+def clear_user_cache():
+    """Drop every cached user."""
+    with _lock:
+        _cache.clear()
+
+
+def _mark_user_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_user_ids', set()).add(target.id)
+
+
+event.listen(User, 'after_update', _mark_user_changed)
+event.listen(User, 'after_delete', _mark_user_changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _evict_after_commit(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        evict_user(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_after_rollback(session):
+    session.info.pop('changed_user_ids', None)